@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# asyncio tests. Requires Python 3.5 or above, imported from basetests.
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+import asyncio
+from popbill.base import PopbillException, JsonObject, JsonDict
+from popbill.clientContext import ClientContext
+from popbill.asyncService import AsyncConnection, AsyncConnectionPool, AsyncTaxinvoiceService
+from popbill.mockServer import MockPopbillServer
+from popbill.taxinvoiceService import Taxinvoice
+
+__all__ = ["AsyncConnectionTestCase", "AsyncServiceTestCase"]
+
+class AsyncConnectionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.accepted = 0
+        self.hosts = []
+
+    def tearDown(self):
+        self.loop.close()
+
+    async def _serve(self, reader, writer):
+        self.accepted += 1
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            while True:
+                header = await reader.readline()
+                if header in (b'\r\n', b''):
+                    break
+                if header.lower().startswith(b'host:'):
+                    self.hosts.append(header[5:].strip().decode('latin-1'))
+            if line.startswith(b'GET /close'):
+                # Connection 헤더 없이 응답 후 연결을 닫는다.
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}')
+                await writer.drain()
+                break
+            if line.startswith(b'GET /chunked'):
+                writer.write(b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n'
+                             b'5\r\n{"a":\r\n2\r\n1}\r\n0\r\n\r\n')
+            else:
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 7\r\n\r\n{"a":1}')
+            await writer.drain()
+        writer.close()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_keepAlive(self):
+        async def scenario():
+            server = await asyncio.start_server(self._serve, '127.0.0.1', 0)
+            port = self.port = server.sockets[0].getsockname()[1]
+            pool = AsyncConnectionPool('127.0.0.1', maxSize=2,
+                                       connectionFactory=lambda host: AsyncConnection(host, port, useSSL=False))
+            bodies = []
+            for url in ('/', '/chunked'):
+                pooled = await pool.checkout()
+                response = await pooled.conn.request('GET', url, '', {})
+                bodies.append(response.body)
+                await pool.checkin(pooled, not response.will_close)
+            await pool.close()
+            await asyncio.sleep(0.01)
+            server.close()
+            await server.wait_closed()
+            return bodies
+
+        bodies = self._run(scenario())
+        self.assertEqual(bodies, [b'{"a":1}', b'{"a":1}'])
+        self.assertEqual(self.accepted, 1, "keep-alive 커넥션 재사용")
+        self.assertEqual(self.hosts, ['127.0.0.1:%d' % self.port] * 2, "기본 port 가 아니면 Host 헤더에 port 포함")
+
+    def test_liveness(self):
+        async def scenario():
+            server = await asyncio.start_server(self._serve, '127.0.0.1', 0)
+            conn = AsyncConnection('127.0.0.1', server.sockets[0].getsockname()[1], useSSL=False)
+            response = await conn.request('GET', '/close', '', {})
+            alive = conn.isAlive()
+            await asyncio.sleep(0.05)
+            closed = conn.isAlive()
+            conn.close()
+            server.close()
+            await server.wait_closed()
+            return response.will_close, alive, closed
+
+        self.assertEqual(self._run(scenario()), (False, True, False), "서버가 닫은 유휴 커넥션은 재사용하지 않음")
+
+class AsyncServiceTestCase(unittest.TestCase):
+
+    SecretKey = 'r1bp+HzSDrMkSS8921B8Dyrn83Y/yDcOnru2OBTT2Z8='
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.server = MockPopbillServer(credentials={'MOCKTESTER': self.SecretKey}).start()
+        self.service = AsyncTaxinvoiceService('MOCKTESTER', self.SecretKey)
+        self.server.attach(self.service)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.service.close())
+        AsyncTaxinvoiceService.release('MOCKTESTER')
+        self.server.stop()
+        self.loop.close()
+
+    def test_calls(self):
+        service = self.service
+
+        async def scenario():
+            self.assertEqual(await service.getUnitCost('1234567890'), 10.0)
+            self.assertEqual(await service.getBalance('1234567890'), 100000.0)
+
+            taxinvoice = Taxinvoice(invoicerMgtKey = 'KEY1', invoicerCorpNum = '1234567890', writeDate = '20160531')
+            self.assertEqual((await service.register('1234567890', taxinvoice)).code, 1)
+            self.assertTrue(await service.checkMgtKeyInUse('1234567890', 'SELL', 'KEY1'))
+            self.assertFalse(await service.checkMgtKeyInUse('1234567890', 'SELL', 'KEY2'))
+            self.assertEqual((await service.getInfo('1234567890', 'SELL', 'KEY1')).stateCode, 100)
+
+            self.server.inject((400, -11000005, "not found"))
+            try:
+                await service.getUnitCost('1234567890')
+                self.fail("오류 응답")
+            except PopbillException as PE:
+                self.assertEqual(PE.code, -11000005)
+
+        self.loop.run_until_complete(scenario())
+        self.assertTrue(isinstance(service.getContext(), ClientContext), "getContext 는 바로 결과를 돌려줌")
+
+        pool = service.getContext().asyncPool
+        self.assertEqual(pool.stats()["idle"], 1)
+        AsyncTaxinvoiceService.release('MOCKTESTER')
+        self.assertEqual(pool.stats()["idle"], 0, "registry 에서 제거하면 풀을 닫음")
+
+    def test_responseMode(self):
+        service = self.service
+        self.server.addDocument('1234567890', Taxinvoice(invoicerMgtKey = 'KEY1'), 'SELL')
+
+        async def dictInfo():
+            with service.responseMode('dict'):
+                return await service.getInfo('1234567890', 'SELL', 'KEY1')
+
+        async def scenario():
+            return await asyncio.gather(dictInfo(), service.getInfo('1234567890', 'SELL', 'KEY1'))
+
+        dictResult, objectResult = self.loop.run_until_complete(scenario())
+        self.assertTrue(isinstance(dictResult, JsonDict))
+        self.assertTrue(isinstance(objectResult, JsonObject), "다른 task 의 응답형식은 바뀌지 않음")
+
+        with service.deadline(10):
+            self.assertEqual(service.tokenCacheStats()["size"], 1)
+        self.assertRaises(ValueError, service.responseMode('xml').__enter__)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,1262 @@
+# -*- coding: utf-8 -*-
+# code for console Encoding difference. Dont' mind on it
+import sys
+try:
+    reload(sys)
+    sys.setdefaultencoding('UTF8')
+except Exception as E: pass
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+import gzip
+import logging
+import os
+import pickle
+import socket
+import tempfile
+import threading
+import time
+import zlib
+from io import BytesIO
+import linkhub
+from popbill.base import PopbillBase, PopbillException, Utils, JsonObject, JsonDict, RawResponse, File, _networkError
+from popbill.multipart import MultipartBody
+from popbill.serverClock import ServerClock
+from popbill.connectionPool import ConnectionPool, ConnectionPoolTimeout, PooledConnection, PopbillHTTPSConnection
+from popbill.retryPolicy import RetryPolicy
+from popbill.circuitBreaker import CircuitBreaker
+from popbill.tokenCache import TokenCache
+from popbill.tokenRefresher import TokenRefresher
+from popbill.clientContext import ClientContext
+from popbill.instrumentation import RequestHooks, endpointTemplate
+from popbill.metrics import MetricsCollector
+from popbill.diagnostics import SlowCallLog, CallProfiler, countItems
+from popbill.mockServer import MockPopbillServer
+from popbill.faxService import FaxService
+from popbill.taxinvoiceService import TaxinvoiceService
+from popbill.cashbillService import CashbillService, Cashbill
+from popbill.closedownService import ClosedownService
+from popbill.statementService import StatementService, Statement
+from popbill.tokenStore import MemoryTokenStore, SQLiteTokenStore, SharedMemoryTokenStore
+from popbill import jsonBackend
+from popbill.messageService import MessageReceiver
+from popbill.taxinvoiceService import Taxinvoice, TaxinvoiceDetail
+try:
+    import http.client as httpclient
+except ImportError:
+    import httplib as httpclient
+if sys.version_info >= (3, 5):
+    # asyncio 테스트는 Python 3.5 이상에서만 해석할 수 있는 별도 모듈에 있다.
+    from asynctests import *
+
+class FakeConnection(object):
+    def __init__(self,host):
+        self.host = host
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class FakeResponse(object):
+    def __init__(self,headers,will_close=False):
+        self.headers = headers
+        self.will_close = will_close
+
+    def getheader(self,name,default=None):
+        return self.headers.get(name,default)
+
+class ConnectionPoolTestCase(unittest.TestCase):
+
+    def test_reuse(self):
+        pool = ConnectionPool("localhost", maxSize=2, connectionFactory=FakeConnection)
+        first = pool.checkout()
+        pool.checkin(first)
+        second = pool.checkout()
+        self.assertIs(first, second, "반납된 커넥션은 재사용")
+        pool.checkin(second)
+
+    def test_maxSize(self):
+        pool = ConnectionPool("localhost", maxSize=2, connectionFactory=FakeConnection)
+        a = pool.checkout()
+        b = pool.checkout()
+        self.assertIsNot(a.conn, b.conn)
+        self.assertRaises(ConnectionPoolTimeout, pool.checkout, 0.05)
+
+        waiter = []
+        t = threading.Thread(target=lambda: waiter.append(pool.checkout(5)))
+        t.start()
+        pool.checkin(a)
+        t.join(5)
+        self.assertIs(waiter[0], a, "대기중인 스레드가 반납된 커넥션을 받음")
+
+    def test_discard(self):
+        pool = ConnectionPool("localhost", maxSize=1, connectionFactory=FakeConnection)
+        a = pool.checkout()
+        pool.discard(a)
+        self.assertTrue(a.conn.closed)
+        b = pool.checkout()
+        self.assertIsNot(a, b)
+        self.assertEqual(pool.stats()["inUse"], 1)
+
+    def test_idleEviction(self):
+        pool = ConnectionPool("localhost", maxSize=1, idleTimeout=0, connectionFactory=FakeConnection)
+        a = pool.checkout()
+        pool.checkin(a)
+        b = pool.checkout()
+        self.assertTrue(a.conn.closed, "유휴시간이 지난 커넥션은 폐기")
+        self.assertIsNot(a, b)
+
+    def test_connectionClose(self):
+        pool = ConnectionPool("localhost", maxSize=1, connectionFactory=FakeConnection)
+        a = pool.checkout()
+        pool.checkin(a, response=FakeResponse({"Connection": "close"}, will_close=True))
+        self.assertTrue(a.conn.closed, "Connection: close 응답 후에는 재사용하지 않음")
+        self.assertEqual(pool.stats()["idle"], 0)
+
+    def test_keepAliveTimeout(self):
+        pool = ConnectionPool("localhost", maxSize=1, connectionFactory=FakeConnection)
+        a = pool.checkout()
+        pool.checkin(a, response=FakeResponse({"Keep-Alive": "timeout=0, max=100"}))
+        self.assertEqual(a.keepAliveTimeout, 0)
+        b = pool.checkout()
+        self.assertIsNot(a, b, "서버 유지시간이 지난 커넥션은 폐기")
+
+        pool.checkin(b, response=FakeResponse({"Keep-Alive": "timeout=5"}))
+        self.assertIs(pool.checkout(), b)
+
+    def test_liveness(self):
+        local, remote = socket.socketpair()
+        conn = FakeConnection("localhost")
+        conn.sock = local
+        pool = ConnectionPool("localhost", maxSize=1, connectionFactory=lambda host: conn)
+        a = pool.checkout()
+        pool.checkin(a)
+        self.assertIs(pool.checkout(), a, "살아있는 커넥션은 재사용")
+        pool.checkin(a)
+
+        remote.close()
+        b = pool.checkout()
+        self.assertIsNot(a, b, "서버가 닫은 커넥션은 재사용 전에 폐기")
+        self.assertEqual(pool.stats()["stale"], 1)
+        local.close()
+
+    def test_livenessHighFileno(self):
+        local, remote = socket.socketpair()
+        try:
+            os.dup2(local.fileno(), 1500)
+            high = socket.socket(local.family, local.type, fileno=1500)
+        except (OSError, TypeError):
+            local.close()
+            remote.close()
+            self.skipTest("fd 1500 을 사용할 수 없음")
+        conn = FakeConnection("localhost")
+        conn.sock = high
+        pooled = PooledConnection(conn)
+        self.assertTrue(pooled.isAlive(), "1024 이상의 fd 도 살아있는 커넥션은 재사용")
+        remote.close()
+        self.assertFalse(pooled.isAlive())
+        high.close()
+        local.close()
+
+class SlowTokenService(PopbillBase):
+    def _generateToken(self,CorpNum):
+        time.sleep(1)
+
+class TimeoutTestCase(unittest.TestCase):
+
+    def test_connectTimeout(self):
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        conn = PopbillHTTPSConnection('127.0.0.1', connectTimeout=1, readTimeout=0.2)
+        conn.port = listener.getsockname()[1]
+        started = time.time()
+        # TLS handshake 응답이 오지 않는 서버. 연결 제한시간 안에 실패해야 한다.
+        try:
+            conn.connect()
+            self.fail("연결 제한시간 초과")
+        except Exception as E:
+            self.assertEqual(_networkError(E).message, 'REQUEST TIMEOUT')
+        self.assertLess(time.time() - started, 2)
+        conn.close()
+        listener.close()
+
+    def test_deadline(self):
+        service = SlowTokenService('TESTER', 'SECRET')
+        started = time.time()
+        with service.deadline(0.2):
+            try:
+                service._getToken('1234567890')
+                self.fail("제한시간 초과")
+            except PopbillException as PE:
+                self.assertEqual(PE.message, 'DEADLINE EXCEEDED')
+        self.assertLess(time.time() - started, 0.9, "토큰갱신도 제한시간을 따름")
+        self.assertEqual(service._remainingTime(), None, "with 블록 밖에서는 제한없음")
+
+def serverTime(offset=0):
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(time.time() + offset))
+
+class FakeToken(object):
+    def __init__(self,session_token,lifetime=600):
+        self.session_token = session_token
+        self.expiration = serverTime(lifetime)[:-1] + '.000Z'
+
+class CountingTokenService(PopbillBase):
+    def prepare(self,delay,error=None):
+        self.generated = 0
+        self.delay = delay
+        self.error = error
+
+    def _serverTime(self):
+        return serverTime()
+
+    def _generateToken(self,CorpNum):
+        self.generated += 1
+        time.sleep(self.delay)
+        if self.error != None:
+            raise self.error
+        return FakeToken("token%d" % self.generated)
+
+class TokenCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.service = CountingTokenService('TESTER', 'SECRET')
+
+    def _concurrent(self,CorpNum,count=10):
+        results = []
+        def run():
+            try:
+                results.append(self.service._getToken(CorpNum).session_token)
+            except PopbillException as PE:
+                results.append(PE.message)
+        threads = [threading.Thread(target=run) for i in range(count)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_singleFlight(self):
+        self.service.prepare(0.2)
+        self.assertEqual(self._concurrent('1000000001'), ["token1"] * 10, "한 스레드만 갱신")
+        self.assertEqual(self.service.generated, 1)
+        self.service._cacheToken('1000000001', FakeToken("expired", -1))
+        self.assertEqual(self._concurrent('1000000001'), ["token2"] * 10, "만료되면 다시 한번만 갱신")
+        self.assertEqual(self.service.generated, 2)
+
+    def test_error(self):
+        self.service.prepare(0.1, PopbillException(-11000000, "auth error"))
+        self.assertEqual(self._concurrent('1000000002'), ["auth error"] * 10, "실패는 기다리던 스레드 모두에게 전달")
+        self.assertEqual(self.service.generated, 1)
+        self.service.prepare(0)
+        self.assertEqual(self.service._getToken('1000000002').session_token, "token1", "실패한 갱신은 남지 않음")
+
+    def test_leaderDeadline(self):
+        self.service.prepare(0.3)
+        results = []
+        def wait():
+            time.sleep(0.05)
+            results.append(self.service._getToken('1000000003').session_token)
+        waiter = threading.Thread(target=wait)
+        waiter.start()
+        with self.service.deadline(0.1):
+            self.assertRaises(PopbillException, self.service._getToken, '1000000003')
+        waiter.join()
+        self.assertEqual(results, ["token1"], "제한시간이 지난 스레드와 상관없이 갱신은 완료")
+        self.assertEqual(self.service.generated, 1)
+
+    def test_lru(self):
+        cache = TokenCache(maxSize=2)
+        never = float('inf')
+        cache.put('A', "a", never, never)
+        cache.put('B', "b", never, never)
+        self.assertEqual(cache.lookup('A'), "a")
+        cache.put('C', "c", never, never)
+        self.assertFalse('B' in cache, "가장 오래 사용하지 않은 항목 제거")
+        self.assertEqual(cache.lookup('B'), None)
+        self.assertEqual(cache.stats(), {"size": 2, "maxSize": 2, "hits": 1, "misses": 1, "evictions": 1, "expired": 0})
+
+    def test_sweep(self):
+        cache = TokenCache(sweepInterval=0)
+        cache.put('A', "a", 0, 0)
+        cache.put('B', "b", float('inf'), float('inf'))
+        self.assertEqual(len(cache), 1, "저장할 때 만료된 항목 정리")
+        self.assertEqual(cache.stats()["expired"], 1)
+
+class ServerClockTestCase(unittest.TestCase):
+
+    def test_offset(self):
+        calls = []
+        def timeSource():
+            calls.append(1)
+            return serverTime(100)
+        clock = ServerClock(timeSource, syncInterval=3600)
+        self.assertTrue(99 <= clock.offset() <= 101, "서버 시계가 100초 빠름")
+        self.assertTrue(abs(clock.now() - time.time() - clock.offset()) < 0.1)
+        self.assertEqual(len(calls), 1, "syncInterval 동안 다시 조회하지 않음")
+        clock.syncInterval = 0
+        clock.offset()
+        self.assertEqual(len(calls), 2)
+
+    def test_tokenExpiry(self):
+        service = CountingTokenService('TESTER', 'SECRET')
+        service.prepare(0)
+        clock = service._serverClock()
+        clock.timeSource = lambda: serverTime(100)
+        clock.sync()
+        try:
+            token = FakeToken("skewed", 160)
+            self.assertTrue(55 <= service._tokenLifetime(token) <= 61, "서버 시간 기준으로 남은 시간 계산")
+
+            service._cacheToken('1000000009', FakeToken("margin", 105))
+            self.assertEqual(service._cachedToken('1000000009'), None, "만료 TokenExpiryMargin 초 전부터 갱신 대상")
+            service._cacheToken('1000000009', token)
+            clock.timeSource = None
+            self.assertEqual(service._getToken('1000000009').session_token, "skewed", "토큰 조회시 서버 시간을 묻지 않음")
+            self.assertEqual(service.generated, 0)
+        finally:
+            clock.timeSource = service._serverTime
+            clock.sync()
+
+class RefreshingTokenService(CountingTokenService):
+    pass
+
+class TokenRefresherTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.service = RefreshingTokenService('TESTER', 'SECRET')
+        self.service.prepare(0)
+        self.refresher = self.service.Refresher = TokenRefresher(margin=30, idleTimeout=0.2, interval=0.05)
+
+    def tearDown(self):
+        self.refresher.stop()
+        del self.service.Refresher
+
+    def test_refresh(self):
+        self.service._cacheToken('1000000011', FakeToken("early", 35))
+        self.service._cacheToken('1000000012', FakeToken("fresh", 600))
+        self.assertEqual(self.service._refreshTokens(30, 60), (1, 0, 0), "갱신시점이 가까운 토큰만 미리 갱신")
+        self.assertEqual(self.service._getToken('1000000011').session_token, "token1")
+        self.assertEqual(self.service._getToken('1000000012').session_token, "fresh")
+        self.assertEqual(self.service.generated, 1)
+
+    def test_idle(self):
+        self.service._cacheToken('1000000013', FakeToken("idle", 600))
+        self.service._cacheToken('1000000014', FakeToken("busy", 600))
+        for i in range(10):
+            time.sleep(0.05)
+            self.service._getToken('1000000014')
+        self.assertEqual(self.refresher.stats()['dropped'], 1, "사용하지 않은 CorpNum 의 토큰은 제거")
+        self.assertEqual(self.service._getToken('1000000014').session_token, "busy")
+        self.assertEqual(self.service._getToken('1000000013').session_token, "token1")
+
+class WorkerTokenService(CountingTokenService):
+    pass
+
+class OtherWorkerTokenService(CountingTokenService):
+    pass
+
+class TokenStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        for path in (self.path, self.path + '.lock'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _roundTrip(self,store):
+        store.save('K', FakeToken("stored"), time.time() + 600)
+        token = store.load('K')
+        self.assertEqual(token.session_token, "stored")
+        self.assertEqual(token.expiration, FakeToken("stored").expiration)
+        store.delete('K')
+        self.assertEqual(store.load('K'), None)
+        store.save('K', FakeToken("expired"), time.time() - 1)
+        self.assertEqual(store.load('K'), None, "만료된 토큰은 반환하지 않음")
+
+    def test_stores(self):
+        self._roundTrip(MemoryTokenStore())
+        self._roundTrip(SQLiteTokenStore(self.path))
+        self._roundTrip(SharedMemoryTokenStore(slots=4))
+
+    def test_shared(self):
+        stores = (MemoryTokenStore(), SQLiteTokenStore(self.path), SharedMemoryTokenStore(slots=16))
+        for i, store in enumerate(stores):
+            first = WorkerTokenService('TESTER', 'SECRET')
+            second = OtherWorkerTokenService('TESTER', 'SECRET')
+            first.TokenStore = second.TokenStore = store
+            try:
+                first.prepare(0)
+                second.prepare(0)
+                CorpNum = '100000002%d' % i
+                self.assertEqual(first._getToken(CorpNum).session_token, "token1")
+                self.assertEqual(second._getToken(CorpNum).session_token, "token1", "다른 worker 가 발급한 토큰 사용")
+                self.assertEqual(second.generated, 0)
+            finally:
+                del first.TokenStore
+                del second.TokenStore
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "fork 가 필요함")
+    def test_sharedMemoryFork(self):
+        store = SharedMemoryTokenStore(slots=16)
+        pid = os.fork()
+        if pid == 0:
+            store.save('K', FakeToken("child"), time.time() + 600)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertEqual(store.load('K').session_token, "child", "fork 한 프로세스가 저장한 토큰")
+
+    @unittest.skipUnless(hasattr(os, 'fork'), "fork 가 필요함")
+    def test_sqliteKeyLock(self):
+        import select
+        store = SQLiteTokenStore(self.path)
+        read, write = os.pipe()
+        def received(timeout):
+            if not select.select([read], [], [], timeout)[0]:
+                return None
+            return os.read(read, 1)
+
+        pid = None
+        try:
+            with store.lock('A'):
+                pid = os.fork()
+                if pid == 0:
+                    for key in ('B', 'A'):
+                        with store.lock(key):
+                            os.write(write, key.encode('ascii'))
+                    os._exit(0)
+                self.assertEqual(received(2), b'B', "다른 key 는 기다리지 않음")
+                self.assertEqual(received(0.2), None, "같은 key 는 다른 프로세스가 풀 때까지 대기")
+
+                acquired = []
+                def other():
+                    with store.lock('B'):
+                        acquired.append(True)
+                t = threading.Thread(target=other)
+                t.daemon = True
+                t.start()
+                t.join(1)
+                self.assertEqual(acquired, [True], "다른 key 는 같은 프로세스의 스레드도 기다리지 않음")
+            self.assertEqual(received(2), b'A')
+            os.waitpid(pid, 0)
+            pid = None
+        finally:
+            if pid != None:
+                os.kill(pid, 9)
+                os.waitpid(pid, 0)
+            os.close(read)
+            os.close(write)
+
+class TaxinvoiceTokenService(CountingTokenService):
+    def __init__(self,LinkID,SecretKey):
+        super(TaxinvoiceTokenService,self).__init__(LinkID,SecretKey)
+        self._addScope("110")
+
+class MessageTokenService(CountingTokenService):
+    def __init__(self,LinkID,SecretKey):
+        super(MessageTokenService,self).__init__(LinkID,SecretKey)
+        self._addScope("150")
+
+class ClientContextTestCase(unittest.TestCase):
+
+    def test_shared(self):
+        taxinvoice = TaxinvoiceTokenService('TESTER', 'SECRET')
+        message = MessageTokenService('TESTER', 'SECRET')
+        taxinvoice.prepare(0)
+        message.prepare(0)
+
+        taxinvoice._getToken('1000000031')
+        message.useContext(taxinvoice.getContext())
+        self.assertEqual(message.getContext().scopes, ["member", "110", "150"], "scope 를 합쳐 발급")
+        self.assertEqual(taxinvoice.getContext().tokenCache.entry('1000000031'), None, "scope 가 늘면 기존 토큰은 폐기")
+
+        self.assertEqual(taxinvoice._getToken('1000000031').session_token, "token2")
+        self.assertEqual(message._getToken('1000000031').session_token, "token2", "CorpNum 별로 하나의 토큰 사용")
+        self.assertEqual(message.generated, 0)
+        self.assertTrue(message._getPool() is taxinvoice._getPool(), "커넥션 풀 공유")
+
+    def test_linkID(self):
+        service = CountingTokenService('TESTER', 'SECRET')
+        context = ClientContext()
+        context.linkID = 'OTHER'
+        self.assertRaises(PopbillException, service.useContext, context)
+
+    def test_environment(self):
+        real = TaxinvoiceTokenService('TESTER5', 'SECRET')
+        test = MessageTokenService('TESTER5', 'SECRET', IsTest=True)
+        mock = CountingTokenService('TESTER5', 'SECRET')
+        mock.ServiceURL = 'http://127.0.0.1:8080'
+        try:
+            self.assertRaises(PopbillException, test.useContext, real.getContext())
+            self.assertRaises(PopbillException, mock.useContext, real.getContext())
+            self.assertFalse(test.getContext() is real.getContext())
+
+            mock.ServiceURL = None
+            mock.useContext(real.getContext())
+            self.assertTrue(mock.getContext() is real.getContext())
+        finally:
+            for cls in (TaxinvoiceTokenService, CountingTokenService):
+                cls.release('TESTER5')
+            MessageTokenService.release('TESTER5', IsTest=True)
+
+class RegistryTestCase(unittest.TestCase):
+
+    def test_tenants(self):
+        first = CountingTokenService('TESTER', 'SECRET')
+        self.assertTrue(CountingTokenService('TESTER', 'SECRET') is first, "같은 LinkID 는 같은 객체")
+        other = CountingTokenService('TESTER2', 'SECRET2')
+        self.assertFalse(other is first, "LinkID 별로 별도 객체")
+        self.assertFalse(other.getContext() is first.getContext(), "풀과 토큰 캐시도 별도")
+
+        test = CountingTokenService('TESTER2', 'SECRET2', IsTest=True)
+        self.assertFalse(test is other, "환경별로 별도 객체")
+        self.assertTrue(test.IsTest)
+        self.assertFalse(other.IsTest)
+
+        self.assertRaises(PopbillException, CountingTokenService, 'TESTER2', 'WRONG')
+        self.assertTrue(CountingTokenService.release('TESTER2') is other)
+        self.assertTrue(CountingTokenService.release('TESTER2', IsTest=True) is test)
+        self.assertFalse(CountingTokenService('TESTER2', 'SECRET2') is other)
+        CountingTokenService.release('TESTER2')
+
+    def test_releaseClosesPool(self):
+        first = CountingTokenService('TESTER4', 'SECRET')
+        second = MessageTokenService('TESTER4', 'SECRET')
+        second.useContext(first.getContext())
+        pool = first._getPool()
+        pool._factory = FakeConnection
+        pooled = pool.checkout()
+        pool.checkin(pooled)
+
+        CountingTokenService.release('TESTER4')
+        self.assertFalse(pooled.conn.closed, "context 를 공유중인 서비스가 있으면 풀을 닫지 않음")
+        MessageTokenService.release('TESTER4')
+        self.assertTrue(pooled.conn.closed, "유휴 커넥션을 닫음")
+        self.assertTrue(first.getContext().pool == None)
+
+        # 제거된 객체를 계속 사용해도 닫힌 풀 대신 새 풀을 만든다.
+        first.getContext().pool = pool
+        self.assertTrue(pool.closed)
+        self.assertFalse(first._getPool() is pool)
+        self.assertFalse(first._getPool().closed)
+
+    def test_releaseUnregisters(self):
+        refresher = TokenRefresher(interval=3600)
+        service = CountingTokenService('TESTER6', 'SECRET')
+        service.Refresher = refresher
+        try:
+            refresher.register(service)
+            self.assertEqual(refresher.stats()['services'], 1)
+            CountingTokenService.release('TESTER6')
+            self.assertEqual(refresher.stats()['services'], 0, "release 하면 갱신 대상에서 제외")
+        finally:
+            refresher.stop()
+
+    def test_concurrent(self):
+        instances = []
+        def create():
+            instances.append(CountingTokenService('TESTER3', 'SECRET3'))
+        threads = [threading.Thread(target=create) for i in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertTrue(all(i is instances[0] for i in instances), "동시에 생성해도 하나만 만들어짐")
+        CountingTokenService.release('TESTER3')
+
+class ScriptedConnection(FakeConnection):
+    """ 미리 정해둔 결과(예외 또는 응답)를 순서대로 돌려주는 커넥션. """
+    def __init__(self,host,script,requests):
+        FakeConnection.__init__(self,host)
+        self.sock = None
+        self.script = script
+        self.requests = requests
+
+    def setTimeouts(self,connectTimeout,readTimeout):
+        pass
+
+    def connect(self):
+        self.sock = socket.socket()
+
+    def close(self):
+        FakeConnection.close(self)
+        if self.sock != None:
+            self.sock.close()
+            self.sock = None
+
+    def request(self,method,url,body,headers):
+        self.requests.append((method, url, body, headers))
+        if hasattr(body, 'read'):
+            self.requests[-1] = (method, url, body.read(), headers)
+        self.result = self.script.pop(0)
+        if isinstance(self.result, Exception):
+            raise self.result
+
+    def getresponse(self):
+        return self.result
+
+class ScriptedResponse(FakeResponse):
+    def __init__(self,status,body):
+        FakeResponse.__init__(self,{})
+        self.status = status
+        self.body = body
+
+    def read(self):
+        return self.body
+
+class RetryService(PopbillBase):
+    Retry = RetryPolicy(maxAttempts=3, backoff=0)
+
+    def prepare(self,script):
+        self.requests = []
+        pool = ConnectionPool("localhost", connectionFactory=lambda host: ScriptedConnection(host, script, self.requests))
+        self._getPool = lambda: pool
+
+class RetryPolicyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.service = RetryService('TESTER', 'SECRET')
+
+    def test_idempotency(self):
+        policy = RetryPolicy()
+        self.assertTrue(policy.isIdempotent('GET'))
+        self.assertTrue(policy.isIdempotent('POST', None, True), "getInfos 등 조회성 POST")
+        self.assertFalse(policy.isIdempotent('POST'), "문자 전송")
+        self.assertFalse(policy.isIdempotent('POST', 'ISSUE', True))
+        self.assertTrue(RetryPolicy(idempotentActions=['PATCH']).isIdempotent('POST', 'PATCH'))
+
+    def test_backoff(self):
+        policy = RetryPolicy(backoff=0.1, maxBackoff=0.3, jitter=False)
+        self.assertEqual([policy.backoffTime(i) for i in (1, 2, 3)], [0.1, 0.2, 0.3])
+        jittered = RetryPolicy(backoff=0.1, maxBackoff=0.3)
+        self.assertTrue(0 <= jittered.backoffTime(2) <= 0.2)
+
+    def test_retryIdempotent(self):
+        self.service.prepare([socket.error("reset"), httpclient.BadStatusLine(""), ScriptedResponse(200, b'{"url":"ok"}')])
+        self.assertEqual(self.service._httpget('/Test').url, "ok")
+        self.assertEqual(len(self.service.requests), 3)
+
+    def test_noReplayAfterSend(self):
+        self.service.prepare([socket.error("reset"), ScriptedResponse(200, b'{}')])
+        try:
+            self.service._httppost('/SMS', '{}')
+            self.fail("전송 요청은 재시도하지 않음")
+        except PopbillException as PE:
+            self.assertEqual(PE.message, 'CONNECTION ERROR')
+        self.assertEqual(len(self.service.requests), 1)
+
+    def test_retryStatus(self):
+        self.service.prepare([ScriptedResponse(503, b''), ScriptedResponse(200, b'{"code":1}')])
+        self.assertEqual(self.service._httppost('/CloseDown', '[]', Idempotent = True).code, 1)
+
+    def test_exhausted(self):
+        self.service.prepare([socket.timeout(), socket.timeout(), socket.timeout()])
+        try:
+            self.service._httpget('/Test')
+            self.fail("최대 시도횟수 초과")
+        except PopbillException as PE:
+            self.assertEqual(PE.message, 'REQUEST TIMEOUT')
+        self.assertEqual(len(self.service.requests), 3)
+
+class CircuitBreakerTestCase(unittest.TestCase):
+
+    def test_openOnFailureRate(self):
+        breaker = CircuitBreaker(failureRateThreshold=0.5, windowSize=4, minimumCalls=4, openTimeout=60)
+        for success in (True, False, True):
+            breaker.record(success, 0.01)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED, "최소 호출건수 전에는 판단하지 않음")
+        breaker.record(False, 0.01)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allowRequest())
+        self.assertEqual(breaker.stats()["rejected"], 1)
+
+    def test_openOnLatency(self):
+        breaker = CircuitBreaker(slowCallThreshold=0.5, slowCallRateThreshold=0.5, windowSize=2, minimumCalls=2)
+        breaker.record(True, 1.0)
+        breaker.record(True, 1.0)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN, "느린 호출 비율 초과")
+
+    def test_halfOpen(self):
+        breaker = CircuitBreaker(windowSize=1, minimumCalls=1, openTimeout=0)
+        breaker.record(False, 0)
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN, "openTimeout 경과")
+        self.assertTrue(breaker.allowRequest())
+        self.assertFalse(breaker.allowRequest(), "시험 호출은 halfOpenCalls 건만 허용")
+        breaker.record(True, 0)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_requestPath(self):
+        service = RetryService('TESTER', 'SECRET')
+        service.Breaker = CircuitBreaker(windowSize=2, minimumCalls=2, openTimeout=60)
+        try:
+            service.prepare([ScriptedResponse(502, b'{"code":-1,"message":"bad gateway"}')] * 6)
+            for i in range(2):
+                self.assertRaises(PopbillException, service._httppost, '/SMS', '{}')
+            self.assertEqual(service.Breaker.state, CircuitBreaker.OPEN)
+            try:
+                service._httpget('/Test')
+                self.fail("OPEN 상태에서는 즉시 실패")
+            except PopbillException as PE:
+                self.assertEqual(PE.message, 'CIRCUIT BREAKER OPEN')
+            self.assertEqual(len(service.requests), 2)
+        finally:
+            service.Breaker = None
+
+    def test_localErrors(self):
+        service = RetryService('TESTER', 'SECRET')
+        service.Breaker = CircuitBreaker(windowSize=2, minimumCalls=2, openTimeout=60)
+        service.PoolTimeout = 0.01
+        try:
+            pool = ConnectionPool("localhost", maxSize=1, connectionFactory=FakeConnection)
+            pool.checkout()
+            service._getPool = lambda: pool
+            for i in range(2):
+                self.assertRaises(PopbillException, service._httpget, '/Test')
+            with service.deadline(0):
+                self.assertRaises(PopbillException, service._httpget, '/Test')
+            self.assertEqual(service.Breaker.stats()["calls"], 0, "커넥션 풀 대기, 호출 제한시간 초과는 기록하지 않음")
+
+            service.prepare([socket.error("reset")] * 6)
+            for i in range(2):
+                self.assertRaises(PopbillException, service._httpget, '/Test')
+            self.assertEqual(service.Breaker.state, CircuitBreaker.OPEN, "네트워크 오류는 실패로 기록")
+        finally:
+            service.Breaker = None
+            del service.PoolTimeout
+
+        breaker = CircuitBreaker(windowSize=1, minimumCalls=1, openTimeout=0)
+        breaker.record(False, 0)
+        self.assertTrue(breaker.allowRequest())
+        breaker.ignore()
+        self.assertTrue(breaker.allowRequest(), "기록하지 않은 시험 호출 기회는 돌려받음")
+
+class UtilsTestCase(unittest.TestCase):
+
+    def test_json2obj(self):
+        result = Utils.json2obj(b'[{"itemKey":"1","detail":{"class":"A"}},{"itemKey":"2"}]')
+        self.assertEqual(result[0].itemKey, "1")
+        self.assertEqual(getattr(result[0].detail, "class"), "A", "예약어 key 도 허용")
+        self.assertEqual(result[1].detail, None, "없는 속성은 None")
+        self.assertTrue(isinstance(result[1], JsonObject))
+        self.assertEqual(JsonObject({"code": 1}).code, 1)
+
+class JsonBackendTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = jsonBackend.getBackend()
+        self.backends = []
+        for name in ('orjson', 'ujson', 'simplejson', 'json'):
+            try:
+                self.backends.append(jsonBackend.selectBackend(name))
+            except ImportError:
+                pass
+
+    def tearDown(self):
+        jsonBackend.selectBackend(self.previous)
+
+    def test_dumps(self):
+        req = {"msgs": [MessageReceiver(rcv="01012341234", rcvnm="수신자명", msg="메시지 내용")]}
+        for backend in self.backends:
+            encoded = backend.dumps(req)
+            if isinstance(encoded, bytes): encoded = encoded.decode('utf-8')
+            self.assertEqual(jsonBackend.StdlibBackend().loads(encoded)["msgs"][0]["rcvnm"], "수신자명", backend.name)
+
+    def test_loads(self):
+        for backend in self.backends:
+            jsonBackend.selectBackend(backend)
+            result = Utils.json2obj(b'[{"itemKey":"1","detail":{"name":"\xed\x92\x88\xeb\xaa\xa9"}}]')
+            self.assertTrue(isinstance(result[0].detail, JsonObject), backend.name)
+            self.assertEqual(result[0].detail.name, "품목", backend.name)
+            self.assertEqual(Utils.json2dict(b'{"url":"ok"}').url, "ok", backend.name)
+
+class ModelTestCase(unittest.TestCase):
+
+    def test_slots(self):
+        detail = TaxinvoiceDetail(serialNum = 1, itemName = "품목1")
+        self.assertFalse(hasattr(detail, '__dict__'), "인스턴스별 dict 없음")
+        self.assertEqual(detail.itemName, "품목1")
+        self.assertRaises(AttributeError, getattr, detail, 'qty')
+        self.assertRaises(AttributeError, setattr, detail, 'newField', 'Y')
+        detail.setExtra('newField', 'Y')
+        self.assertEqual(detail.newField, 'Y')
+
+        receiver = MessageReceiver(rcv = "010", newField = "Y")
+        self.assertEqual((receiver.snd, receiver.rcv, receiver.newField), (None, "010", "Y"))
+        self.assertEqual(pickle.loads(pickle.dumps(receiver))._toDict(), receiver._toDict())
+
+    def test_toJson(self):
+        taxinvoice = Taxinvoice(writeDate = "20150121", newField = "Y",
+                                detailList = [TaxinvoiceDetail(serialNum = 1, itemName = "품목1")])
+        taxinvoice.writeSpecification = True
+        self.assertEqual(taxinvoice.newField, "Y", "선언하지 않은 필드도 허용")
+        self.assertEqual(jsonBackend.toJson(taxinvoice),
+                         {"writeDate": "20150121", "writeSpecification": True, "newField": "Y",
+                          "detailList": taxinvoice.detailList})
+        self.assertEqual(jsonBackend.toJson(MessageReceiver(rcv = "010")),
+                         {"snd": None, "rcv": "010", "rcvnm": None, "msg": None, "sjt": None})
+
+class MultipartTestCase(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.write(fd, b'%PDF' * 50000)
+        os.close(fd)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def test_layout(self):
+        body = MultipartBody("--B--", '{"a":1}', [File.fromPath('file', self.path), File(fieldName='file', fileName='b.txt', fileData=b'xyz')])
+        head = ('\r\n----B--\r\nContent-Disposition: form-data; name="form"\r\n\r\n{"a":1}'
+                '\r\n----B--\r\nContent-Disposition: form-data; name="file"; filename="%s"\r\n'
+                'Content-Type: Application/octet-stream\r\n\r\n' % self.path).encode('utf-8')
+        tail = ('\r\n----B--\r\nContent-Disposition: form-data; name="file"; filename="b.txt"\r\n'
+                'Content-Type: Application/octet-stream\r\n\r\nxyz\r\n----B----\r\n\r\n').encode('utf-8')
+        expected = head + b'%PDF' * 50000 + tail
+
+        self.assertEqual(len(body), len(expected), "Content-Length 를 미리 계산")
+        chunks = []
+        while True:
+            chunk = body.read(8192)
+            if not chunk:
+                break
+            self.assertTrue(len(chunk) <= 8192)
+            chunks.append(chunk)
+        self.assertEqual(b''.join(chunks), expected)
+        body.seek(0)
+        self.assertEqual(body.read(), expected, "재시도시 처음부터 다시 읽음")
+        body.close()
+
+    def test_sources(self):
+        import io
+        content = b'%PDF' * 50000
+        stream = io.BytesIO(b'skip' + content)
+        stream.seek(4)
+        with open(self.path, 'rb') as F:
+            files = [File.fromSource('file', ('a.pdf', content)),
+                     File.fromSource('file', ('b.pdf', memoryview(bytearray(content)))),
+                     File.fromSource('file', ('c.pdf', stream)),
+                     File.fromSource('file', F)]
+            self.assertEqual(files[3].fileName, self.path)
+            if hasattr(os, 'fspath'):
+                import pathlib
+                files.append(File.fromSource('file', pathlib.Path(self.path)))
+                self.assertEqual((files[4].fileName, files[4].filePath), (self.path, self.path))
+            body = MultipartBody("--B--", None, files)
+            for i in range(2):
+                body.seek(0)
+                sent = body.read()
+                self.assertEqual(sent.count(content), len(files))
+                self.assertEqual(len(sent), len(body))
+            self.assertFalse(F.closed, "호출자가 넘긴 file 객체는 닫지 않음")
+        self.assertRaises(PopbillException, File.fromSource, 'file', io.BytesIO(content))
+        self.assertRaises(PopbillException, File.fromSource, 'file', 1234)
+
+    def test_missingFile(self):
+        self.assertRaises(IOError, File.fromPath, 'file', self.path + '.none')
+
+        service = RetryService('TESTER', 'SECRET')
+        service.prepare([ScriptedResponse(200, b'{"receiptNum":"1"}')])
+        files = [File.fromPath('file', self.path)]
+        os.remove(self.path)
+        try:
+            service._httppost_files('/FAX', '{}', files, None)
+            self.fail("전송 도중 파일을 읽지 못함")
+        except PopbillException as PE:
+            self.assertEqual(PE.code, -99999999)
+        self.assertEqual(len(service.requests), 1, "재시도하지 않음")
+
+class CompressionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.service = RetryService('TESTER', 'SECRET')
+        self.service.RequestCompression = 'gzip'
+        self.service.ResponseCompression = True
+
+    def tearDown(self):
+        del self.service.RequestCompression
+        del self.service.ResponseCompression
+
+    def test_request(self):
+        corpNums = '[' + ','.join('"%010d"' % i for i in range(1000)) + ']'
+        self.service.prepare([ScriptedResponse(200, b'[]'), ScriptedResponse(200, b'{"code":1}')])
+        self.service._httppost('/CloseDown', corpNums)
+        method, url, body, headers = self.service.requests[0]
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(headers["Accept-Encoding"], "gzip, deflate")
+        self.assertTrue(len(body) < len(corpNums) / 3)
+        self.assertEqual(gzip.GzipFile(fileobj=BytesIO(body)).read().decode('utf-8'), corpNums)
+
+        self.service._httppost('/Taxinvoice/SELL/1', '{"memo":"x"}', ActionOverride = 'ISSUE')
+        method, url, body, headers = self.service.requests[1]
+        self.assertFalse("Content-Encoding" in headers, "CompressionThreshold 미만은 압축하지 않음")
+
+    def test_response(self):
+        compressed = ScriptedResponse(200, zlib.compress(b'{"url":"ok"}'))
+        compressed.headers = {"Content-Encoding": "deflate"}
+        broken = ScriptedResponse(200, b'not gzip')
+        broken.headers = {"Content-Encoding": "gzip"}
+        self.service.prepare([compressed, broken])
+        self.assertEqual(self.service._httpget('/?TG=LOGIN').url, "ok")
+        try:
+            self.service._httpget('/?TG=LOGIN')
+            self.fail("압축해제 실패")
+        except PopbillException as PE:
+            self.assertEqual(PE.message, 'UNEXPECTED EXCEPTION')
+
+class InstrumentationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.service = RetryService('TESTER', 'SECRET')
+        self.events = []
+        hooks = self.service.Hooks = RequestHooks()
+        hooks.onBeforeRequest(lambda event: self.events.append(('before', event.endpoint)))
+        hooks.onAfterResponse(lambda event: self.events.append(('after', event.status)))
+        hooks.onError(lambda event: self.events.append(('error', event.error.message)))
+
+    def tearDown(self):
+        del self.service.Hooks
+
+    def test_endpointTemplate(self):
+        self.assertEqual(endpointTemplate('/Taxinvoice/SELL/20150101-01/Logs'), '/Taxinvoice/SELL/{}/Logs')
+        self.assertEqual(endpointTemplate('/Taxinvoice/SELL/KEY1?TG=POPUP'), '/Taxinvoice/SELL/{}?TG=POPUP')
+        self.assertEqual(endpointTemplate('/CloseDown?CN=1234567890'), '/CloseDown?CN={}')
+        self.assertEqual(endpointTemplate('/FAX/015012345678/Cancel'), '/FAX/{}/Cancel')
+        self.assertEqual(endpointTemplate('/Cashbill/ABCDEF?TG=XYZ'), '/Cashbill/{}?TG={}', "관리번호 형태와 상관없이 치환")
+        self.assertEqual(endpointTemplate('/Statement/121/KEY1?Detail'), '/Statement/{}/{}?Detail')
+        self.assertEqual(endpointTemplate('/Message/UnitCost?Type=SMS'), '/Message/UnitCost?Type=SMS')
+
+    def test_events(self):
+        details = []
+        self.service.Hooks.onAfterResponse(details.append)
+        self.service.Hooks.onAfterResponse(lambda event: 1 / 0)
+        self.service.prepare([socket.error("reset"), ScriptedResponse(200, b'{"url":"ok"}'),
+                              ScriptedResponse(400, b'{"code":-11000000,"message":"bad"}')])
+
+        self.assertEqual(self.service._httpget('/Taxinvoice/SELL/KEY1?TG=POPUP').url, "ok", "callback 예외는 무시")
+        event = details[0]
+        self.assertEqual((event.method, event.url, event.status), ('GET', '/Taxinvoice/SELL/KEY1?TG=POPUP', 200))
+        self.assertEqual((event.attempts, event.retries, event.reconnects), (2, 1, 2))
+        self.assertEqual((event.requestSize, event.responseSize), (0, 12))
+        for name in ('poolWait', 'connect', 'send', 'serverWait', 'read', 'total'):
+            self.assertTrue(name in event.timings, name)
+
+        self.assertRaises(PopbillException, self.service._httppost, '/Taxinvoice/SELL/KEY1', '{}', ActionOverride = 'ISSUE')
+        self.assertEqual(details[1].action, 'ISSUE')
+        self.assertEqual(self.events, [('before', '/Taxinvoice/SELL/{}?TG=POPUP'), ('after', 200),
+                                       ('before', '/Taxinvoice/SELL/{}'), ('after', 400), ('error', 'bad')])
+
+class MetricsTestCase(unittest.TestCase):
+
+    def test_render(self):
+        service = RetryService('TESTER', 'SECRET')
+        metrics = MetricsCollector(buckets=(0.1, 1))
+        metrics.install(service)
+        metrics.install(service)
+        try:
+            service.prepare([ScriptedResponse(200, b'{"url":"ok"}'), ScriptedResponse(200, b'{"url":"ok"}'),
+                             ScriptedResponse(400, b'{"code":-11000000,"message":"bad"}')])
+            service._httpget('/Taxinvoice/SELL/KEY1?TG=POPUP')
+            service._httpget('/Taxinvoice/SELL/KEY2?TG=POPUP')
+            self.assertRaises(PopbillException, service._httppost, '/Taxinvoice/SELL/KEY1', '{}', ActionOverride = 'ISSUE')
+
+            text = metrics.render()
+            labels = 'service="RetryService",endpoint="/Taxinvoice/SELL/{}?TG=POPUP",action="GET"'
+            self.assertTrue('popbill_request_duration_seconds_bucket{%s,le="0.1"} 2' % labels in text, text)
+            self.assertTrue('popbill_request_duration_seconds_bucket{%s,le="+Inf"} 2' % labels in text)
+            self.assertTrue('popbill_request_duration_seconds_count{%s} 2' % labels in text)
+            self.assertTrue('popbill_requests_total{%s,outcome="success",code="0"} 2' % labels in text, "한번만 등록")
+            self.assertTrue('popbill_requests_total{service="RetryService",endpoint="/Taxinvoice/SELL/{}",action="ISSUE",'
+                            'outcome="error",code="-11000000"} 1' in text)
+            self.assertTrue('popbill_response_bytes_total{%s} 24' % labels in text)
+            self.assertTrue('popbill_request_bytes_total{service="RetryService",endpoint="/Taxinvoice/SELL/{}",action="ISSUE"} 2' in text)
+            self.assertTrue('# TYPE popbill_token_cache_size gauge' in text)
+        finally:
+            del service.Hooks
+
+class RecordingSpan(object):
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+        self.parent = tracer.stack[-1].name if tracer.stack else None
+        self.attributes = {}
+
+    def __enter__(self):
+        self.tracer.stack.append(self)
+        self.tracer.spans.append(self)
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.tracer.stack.pop()
+        return False
+
+    def is_recording(self):
+        return True
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+class RecordingTracer(object):
+
+    def __init__(self):
+        self.stack = []
+        self.spans = []
+
+    def start_as_current_span(self, name, **kwargs):
+        return RecordingSpan(self, name)
+
+class TracingService(RetryService):
+
+    def getURL(self, CorpNum):
+        return self._httpget('/Taxinvoice/SELL/KEY1?TG=POPUP', CorpNum).url
+
+class TracingTestCase(unittest.TestCase):
+
+    def test_spans(self):
+        service = TracingService('TESTER', 'SECRET')
+        service.getContext().tokenCache.put('1234567890', FakeToken('TOKEN'), float('inf'), float('inf'))
+        service.prepare([ScriptedResponse(200, b'{"url":"ok"}')])
+        tracer = service.Tracer = RecordingTracer()
+        try:
+
+            self.assertEqual(service.getURL('1234567890'), "ok")
+            self.assertEqual([(span.name, span.parent) for span in tracer.spans],
+                             [('TracingService.getURL', None), ('popbill.token', 'TracingService.getURL'),
+                              ('popbill.http', 'TracingService.getURL'), ('popbill.connect', 'popbill.http')])
+            self.assertEqual(tracer.spans[2].attributes, {'http.method': 'GET', 'http.status_code': 200,
+                                                          'popbill.endpoint': '/Taxinvoice/SELL/{}?TG=POPUP'})
+            service.getContext()
+            self.assertEqual(len(tracer.spans), 4, "설정, 조회용 메소드는 span 을 만들지 않음")
+        finally:
+            del service.Tracer
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+class DiagnosticsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.service = TracingService('TESTER', 'SECRET')
+        self.service.getContext().tokenCache.put('1234567890', FakeToken('TOKEN'), float('inf'), float('inf'))
+
+    def test_countItems(self):
+        self.assertEqual(countItems('["KEY1","KEY2","KEY3"]'), 3)
+        self.assertEqual(countItems('{"snd":"070","rcvs":[{"rcv":"1"},{"rcv":"2"}],"sndDT":null}'), 2)
+        self.assertEqual(countItems('{"invoicerCorpNum":"1234567890"}'), 1)
+        self.assertEqual(countItems(''), None)
+        self.assertEqual(countItems('not json'), None)
+
+    def test_slowCallLog(self):
+        handler = RecordingHandler()
+        logger = logging.getLogger('popbill.test')
+        logger.addHandler(handler)
+        self.service.SlowCallLog = SlowCallLog(threshold=0, logger=logger)
+        try:
+            self.service.prepare([ScriptedResponse(200, b'{"url":"ok"}')])
+            self.service._httppost('/Taxinvoice/SELL', '["KEY1","KEY2"]', '1234567890', Idempotent = True)
+            info = handler.records[0].popbill
+            self.assertEqual((info['action'], info['endpoint'], info['status']), ('POST', '/Taxinvoice/SELL', 200))
+            self.assertEqual((info['requestSize'], info['responseSize'], info['items']), (15, 12, 2))
+            for name in ('token', 'send', 'serverWait', 'client', 'total'):
+                self.assertTrue(name in info['timings'], name)
+
+            self.service.SlowCallLog.threshold = 60
+            self.service.prepare([ScriptedResponse(200, b'{"url":"ok"}')])
+            self.service._httpget('/Taxinvoice/SELL/KEY1?TG=POPUP', '1234567890')
+            self.assertEqual(len(handler.records), 1, "기준시간 미만은 기록하지 않음")
+        finally:
+            logger.removeHandler(handler)
+            del self.service.SlowCallLog
+
+    def test_profiler(self):
+        samples = []
+        self.service.Profiler = CallProfiler(sampleRate=2, callback=samples.append)
+        try:
+            self.service.prepare([ScriptedResponse(200, b'{"url":"ok"}')] * 4)
+            for i in range(4):
+                self.service.getURL('1234567890')
+            self.assertEqual([sample.name for sample in samples], ['TracingService.getURL'] * 2, "2번에 한번 profile")
+            self.assertTrue('json2obj' in samples[0].format(limit=None))
+        finally:
+            del self.service.Profiler
+
+class MockServerTestCase(unittest.TestCase):
+
+    SecretKey = 'r1bp+HzSDrMkSS8921B8Dyrn83Y/yDcOnru2OBTT2Z8='
+
+    def setUp(self):
+        self.server = MockPopbillServer(credentials={'MOCKTESTER': self.SecretKey}).start()
+        self.services = [TaxinvoiceService('MOCKTESTER', self.SecretKey), FaxService('MOCKTESTER', self.SecretKey),
+                         CashbillService('MOCKTESTER', self.SecretKey)]
+        self.server.attach(*self.services)
+
+    def tearDown(self):
+        for service in self.services:
+            type(service).release('MOCKTESTER')
+        self.server.stop()
+
+    def test_documents(self):
+        taxinvoiceService, faxService, cashbillService = self.services
+        self.assertEqual(taxinvoiceService.getBalance('1234567890'), 100000.0)
+        self.assertEqual(taxinvoiceService.checkIsMember('1234567890').code, 1, "토큰을 발급받은 사업자는 회원")
+
+        taxinvoice = Taxinvoice(invoicerMgtKey = 'KEY1', invoicerCorpNum = '1234567890', writeDate = '20160531')
+        self.assertEqual(taxinvoiceService.register('1234567890', taxinvoice).code, 1)
+        self.assertTrue(taxinvoiceService.checkMgtKeyInUse('1234567890', 'SELL', 'KEY1'))
+        self.assertFalse(taxinvoiceService.checkMgtKeyInUse('1234567890', 'SELL', 'KEY2'))
+        taxinvoiceService.issue('1234567890', 'SELL', 'KEY1', '발행메모')
+        self.assertEqual(taxinvoiceService.getInfo('1234567890', 'SELL', 'KEY1').stateCode, 300)
+        self.assertEqual(taxinvoiceService.getDetailInfo('1234567890', 'SELL', 'KEY1').writeDate, '20160531')
+        self.assertEqual(len(taxinvoiceService.getInfos('1234567890', 'SELL', ['KEY1', 'KEY2'])), 1)
+
+        cashbillService.register('1234567890', Cashbill(mgtKey = 'CB1', tradeType = '승인거래'))
+        self.assertEqual(cashbillService.getInfo('1234567890', 'CB1').stateCode, 100)
+
+        receiptNum = faxService.sendFax('1234567890', '07043042991', '010111222', '수신자명', 'test.jpeg')
+        self.assertEqual(faxService.getFaxResult('1234567890', receiptNum)[0].receiveNum, '010111222')
+
+    def test_checkMgtKeyInUse(self):
+        taxinvoiceService, faxService, cashbillService = self.services
+        statementService = StatementService('MOCKTESTER', self.SecretKey)
+        self.server.attach(statementService)
+        try:
+            taxinvoiceService.register('1234567890', Taxinvoice(invoicerMgtKey = 'KEY1', writeDate = '20160531'))
+            statementService.register('1234567890', Statement(itemCode = 121, mgtKey = 'ST1'))
+            cashbillService.register('1234567890', Cashbill(mgtKey = 'CB1', tradeType = '승인거래'))
+
+            self.assertTrue(taxinvoiceService.checkMgtKeyInUse('1234567890', 'SELL', 'KEY1'))
+            self.assertFalse(taxinvoiceService.checkMgtKeyInUse('1234567890', 'SELL', 'KEY2'))
+            self.assertTrue(statementService.checkMgtKeyInUse('1234567890', 121, 'ST1'))
+            self.assertFalse(statementService.checkMgtKeyInUse('1234567890', 121, 'ST2'))
+            self.assertTrue(cashbillService.checkMgtKeyInUse('1234567890', 'CB1'))
+            self.assertFalse(cashbillService.checkMgtKeyInUse('1234567890', 'CB2'))
+        finally:
+            StatementService.release('MOCKTESTER')
+
+    def test_faults(self):
+        taxinvoiceService = self.services[0]
+        self.assertEqual(taxinvoiceService.getUnitCost('1234567890'), 10.0)
+
+        self.server.inject('drop')
+        self.assertEqual(taxinvoiceService.getUnitCost('1234567890'), 10.0, "끊긴 조회 요청은 재시도")
+
+        self.server.inject((400, -11000005, "not found"))
+        try:
+            taxinvoiceService.getUnitCost('1234567890')
+            self.fail("오류 응답")
+        except PopbillException as PE:
+            self.assertEqual(PE.code, -11000005)
+        self.assertEqual(self.server.stats()["drops"], 1)
+
+    def test_authFailure(self):
+        service = ClosedownService('MOCKTESTER', 'AAAA')
+        self.server.attach(service)
+        try:
+            service.getUnitCost('1234567890')
+            self.fail("잘못된 비밀키")
+        except PopbillException as PE:
+            self.assertEqual(PE.code, -11000001)
+        finally:
+            ClosedownService.release('MOCKTESTER')
+
+    def test_authURL(self):
+        previous = linkhub.TokenInstance._ServiceURL
+        other = MockPopbillServer(latency=0.02, credentials={'MOCKTESTER2': self.SecretKey}).start()
+        other.RemainPoint = 5.0
+        service = FaxService('MOCKTESTER2', self.SecretKey)
+        other.attach(service)
+        try:
+            self.server.latency = 0.02
+            results = []
+            def balance(target, expected):
+                for i in range(3):
+                    results.append(target.getBalance('1234567890') == expected)
+            threads = [threading.Thread(target=balance, args=(target, expected))
+                       for target, expected in [(self.services[1], 100000.0), (service, 5.0)] * 3]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(10)
+            self.assertEqual(results, [True] * 18, "동시에 호출해도 서비스마다 자신의 인증서버로 호출")
+            self.assertEqual(linkhub.TokenInstance._ServiceURL, previous, "호출이 끝나면 linkhub 전역 인증서버 주소를 되돌림")
+        finally:
+            FaxService.release('MOCKTESTER2')
+            other.stop()
+
+    def test_linkhubConcurrency(self):
+        # AuthURL 이 없거나 같은 서비스의 linkhub 호출은 서로 기다리지 않는다.
+        for service in (RetryService('TESTER', 'SECRET'), self.services[1]):
+            arrived = []
+            both = threading.Event()
+            def rendezvous():
+                arrived.append(1)
+                if len(arrived) == 2:
+                    both.set()
+                both.wait(5)
+                return both.is_set()
+            results = []
+            threads = [threading.Thread(target=lambda: results.append(service._linkhub(rendezvous)))
+                       for i in range(2)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(10)
+            self.assertEqual(results, [True, True], "linkhub 호출을 동시에 수행")
+
+class ResponseModeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.service = RetryService('TESTER', 'SECRET')
+        self.body = b'[{"itemKey":"1","stateCode":300}]'
+
+    def test_dict(self):
+        self.service.prepare([ScriptedResponse(200, self.body)])
+        with self.service.responseMode('dict'):
+            result = self.service._httpget('/Taxinvoice/SELL')
+        self.assertEqual(result, [{"itemKey": "1", "stateCode": 300}])
+        self.assertTrue(type(result[0]) is dict)
+        self.service.prepare([ScriptedResponse(200, b'{"url":"ok"}')])
+        with self.service.responseMode('dict'):
+            result = self.service._httpget('/?TG=LOGIN')
+        self.assertTrue(isinstance(result, JsonDict))
+        self.assertEqual(result.url, "ok", "필드를 꺼내는 서비스 메소드도 그대로 동작")
+
+    def test_raw(self):
+        self.service.ResponseMode = 'raw'
+        try:
+            self.service.prepare([ScriptedResponse(200, self.body), ScriptedResponse(200, b'{"url":"ok"}')])
+            result = self.service._httpget('/Taxinvoice/SELL')
+            self.assertTrue(isinstance(result, RawResponse))
+            self.assertEqual(result, self.body)
+            self.assertEqual(self.service._httpget('/?TG=LOGIN').url, "ok")
+        finally:
+            del self.service.ResponseMode
+
+    def test_default(self):
+        self.service.prepare([ScriptedResponse(200, self.body), ScriptedResponse(400, b'{"code":-11000001,"message":"error"}')])
+        with self.service.responseMode('dict'):
+            pass
+        self.assertTrue(isinstance(self.service._httpget('/Taxinvoice/SELL')[0], JsonObject))
+        with self.service.responseMode('raw'):
+            try:
+                self.service._httpget('/Taxinvoice/SELL')
+                self.fail("오류 응답은 응답형식과 상관없이 예외")
+            except PopbillException as PE:
+                self.assertEqual(PE.code, -11000001)
+        self.assertRaises(ValueError, self.service.responseMode('xml').__enter__)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Client side micro benchmarks for the Popbill SDK. They run offline and
+# only measure work done inside this library.
+#
+# usage : python benchmarks.py
+from __future__ import print_function
+import json
+import timeit
+from collections import namedtuple
+
+from popbill import jsonBackend
+from popbill.base import Utils, JsonObject
+from popbill.messageService import MessageReceiver
+
+
+def _legacy_object_hook(d):
+    # 1.1.4 까지의 구현. JSON 객체마다 namedtuple 클래스를 새로 만든다.
+    return JsonObject(namedtuple('JsonObject', d.keys())(*d.values()))
+
+
+def _getInfosResponse(count):
+    # getInfos 응답과 같은 형태의 문서상태 목록
+    return json.dumps([{"itemKey": "0123456789%04d" % i,
+                        "invoiceType": "SELL",
+                        "stateCode": 300,
+                        "taxType": "과세",
+                        "writeDate": "20160531",
+                        "invoicerCorpNum": "1234567890",
+                        "invoicerCorpName": "공급자 상호",
+                        "invoiceeCorpNum": "8888888888",
+                        "invoiceeCorpName": "공급받는자 상호",
+                        "supplyCostTotal": "100000",
+                        "taxTotal": "10000",
+                        "lateIssueYN": False,
+                        "stateDT": "20160531103000",
+                        "openYN": False} for i in range(count)])
+
+
+def bench_json2obj(count=1000, number=20):
+    data = _getInfosResponse(count).encode('utf-8')
+
+    legacy = timeit.timeit(lambda: json.loads(data.decode(), object_hook=_legacy_object_hook), number=number)
+    current = timeit.timeit(lambda: Utils.json2obj(data), number=number)
+    asDict = timeit.timeit(lambda: Utils.json2dict(data), number=number)
+
+    print("json2obj %d items x %d" % (count, number))
+    print("  namedtuple per object : %8.2f ms/call" % (legacy * 1000 / number))
+    print("  dict backed JsonObject: %8.2f ms/call" % (current * 1000 / number))
+    print("  speedup               : %8.1fx" % (legacy / current))
+    print("  ResponseMode 'dict'   : %8.2f ms/call" % (asDict * 1000 / number))
+
+
+def bench_jsonBackend(count=1000, number=20):
+    data = _getInfosResponse(count).encode('utf-8')
+    req = {"msgs": [MessageReceiver(snd="07043042991", rcv="0101234%04d" % i, rcvnm="수신자명",
+                                    msg="문자 메시지 내용") for i in range(count)]}
+
+    print("json backend %d items x %d" % (count, number))
+    for name in ('json', 'simplejson', 'ujson', 'orjson'):
+        try:
+            backend = jsonBackend.selectBackend(name)
+        except ImportError:
+            continue
+        loads = timeit.timeit(lambda: Utils.json2obj(data), number=number)
+        dumps = timeit.timeit(lambda: backend.dumps(req), number=number)
+        print("  %-10s : json2obj %8.2f ms/call, sendMessage body %8.2f ms/call"
+              % (name, loads * 1000 / number, dumps * 1000 / number))
+    jsonBackend.selectBackend()
+
+
+def bench_models(count=100000):
+    try:
+        import tracemalloc
+    except ImportError:
+        return
+
+    tracemalloc.start()
+    receivers = [MessageReceiver(rcv="0101234%04d" % (i % 10000), rcvnm="수신자명") for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print("MessageReceiver x %d : %8.1f bytes/object" % (len(receivers), float(size) / count))
+
+
+if __name__ == '__main__':
+    bench_json2obj()
+    bench_jsonBackend()
+    bench_models()
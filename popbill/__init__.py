@@ -6,12 +6,31 @@ __all__ = [ "PopbillException","JoinForm",
 			"StatementService", "Statement","StatementDetail",
 			"CashbillService", "Cashbill",
 			"MessageService", "MessageReceiver",
-			"ClosedownService", "CorpState"]
+			"ClosedownService", "CorpState",
+			"RetryPolicy", "CircuitBreaker", "TokenRefresher", "ClientContext", "RequestHooks", "MetricsCollector",
+			"MemoryTokenStore", "SQLiteTokenStore", "SharedMemoryTokenStore", "NoopTracer",
+			"SlowCallLog", "CallProfiler"]
+
+import sys
 
 from .base import PopbillException , JoinForm
+from .retryPolicy import RetryPolicy
+from .circuitBreaker import CircuitBreaker
+from .tokenRefresher import TokenRefresher
+from .clientContext import ClientContext
+from .instrumentation import RequestHooks
+from .metrics import MetricsCollector
+from .tokenStore import MemoryTokenStore, SQLiteTokenStore, SharedMemoryTokenStore
+from .tracing import NoopTracer
+from .diagnostics import SlowCallLog, CallProfiler
 from .taxinvoiceService import *
 from .statementService import *
 from .faxService import *
 from .cashbillService import *
 from .messageService import *
 from .closedownService import *
+
+if sys.version_info >= (3, 5):
+    from .asyncService import *
+    __all__ += ["AsyncTaxinvoiceService", "AsyncStatementService", "AsyncFaxService",
+                "AsyncCashbillService", "AsyncMessageService", "AsyncClosedownService"]
@@ -0,0 +1,817 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill asyncio API. It provides awaitable variants of every
+# Popbill service on top of pooled keep-alive asyncio connections, so that a
+# single event loop can keep many Popbill calls in flight.
+#
+# Requires Python 3.5 or above.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import asyncio
+import functools
+import inspect
+import socket
+import ssl
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from time import time as stime, monotonic
+try:
+    import contextvars
+except ImportError:
+    contextvars = None
+try:
+    import http.client as httpclient
+except ImportError:
+    import httplib as httpclient
+
+import linkhub
+from linkhub import LinkhubException
+
+from .base import PopbillBase, PopbillException, _networkError, _isTransportError, _decodeBody, \
+    _describeSpan, _finishSpan, _describeConnect, _checkResponseMode
+from .connectionPool import PooledConnection, ConnectionPoolTimeout, keepAliveTimeout
+from .multipart import MultipartError
+from .instrumentation import Stopwatch, describeRequest
+from .tracing import untraced
+from .taxinvoiceService import TaxinvoiceService
+from .statementService import StatementService
+from .faxService import FaxService
+from .cashbillService import CashbillService
+from .messageService import MessageService
+from .closedownService import ClosedownService
+
+__all__ = ["AsyncPopbillBase",
+           "AsyncTaxinvoiceService", "AsyncStatementService", "AsyncFaxService",
+           "AsyncCashbillService", "AsyncMessageService", "AsyncClosedownService"]
+
+
+class AsyncResponse(object):
+    def __init__(self, status, reason, headers, body, willClose):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.will_close = willClose
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name.lower(), default)
+
+
+class AsyncConnection(object):
+    """ asyncio stream 기반의 HTTP/1.1 keep-alive 커넥션.
+
+        connectTimeout 은 TCP 연결과 TLS handshake 에, readTimeout 은 응답 수신 전체에
+        적용된다. 제한시간을 넘기면 동기 커넥션과 같이 socket.timeout 이 발생한다.
+    """
+
+    # 스트리밍 본문을 보낼 때 한번에 읽는 크기
+    chunkSize = 65536
+
+    def __init__(self, host, port=443, useSSL=True, connectTimeout=None, readTimeout=None):
+        self.host = host
+        self.port = port
+        self.useSSL = useSSL
+        self.connectTimeout = connectTimeout
+        self.readTimeout = readTimeout
+        self._reader = None
+        self._writer = None
+        # 마지막 요청의 (전송, 응답 헤더 대기, 응답 본문 수신) 소요시간(초)
+        self.timings = None
+        self._firstByteAt = None
+
+    @property
+    def connected(self):
+        return self._writer != None
+
+    async def connect(self):
+        sslContext = ssl.create_default_context() if self.useSSL else None
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=sslContext), self.connectTimeout)
+        except asyncio.TimeoutError:
+            raise socket.timeout('timed out')
+
+    def close(self):
+        if self._writer != None:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+
+    def isAlive(self):
+        # 유휴 상태에서 EOF 를 받았거나 연결이 닫히는 중이면 재사용할 수 없다.
+        if self._reader == None:
+            return True
+        return not self._reader.at_eof() and not self._writer.transport.is_closing()
+
+    async def request(self, method, url, body, headers):
+        if self._writer == None:
+            await self.connect()
+
+        if body == None:
+            body = b''
+        elif not isinstance(body, bytes) and not hasattr(body, 'read'):
+            body = body.encode('utf-8')
+
+        lines = ['%s %s HTTP/1.1' % (method, url), 'Host: %s' % self._hostHeader(), 'Content-Length: %d' % len(body)]
+        for name, value in headers.items():
+            if name.lower() != 'content-length':
+                lines.append('%s: %s' % (name, value))
+
+        started = monotonic()
+        try:
+            self._writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+            if hasattr(body, 'read'):
+                # 스트리밍 본문(MultipartBody)은 chunk 단위로 보내며 버퍼가 차면 비워질 때까지 기다린다.
+                while True:
+                    chunk = body.read(self.chunkSize)
+                    if not chunk:
+                        break
+                    self._writer.write(chunk)
+                    await asyncio.wait_for(self._writer.drain(), self.readTimeout)
+            elif body:
+                self._writer.write(body)
+            await asyncio.wait_for(self._writer.drain(), self.readTimeout)
+            sentAt = monotonic()
+
+            response = await asyncio.wait_for(self._readResponse(method), self.readTimeout)
+            finished = monotonic()
+            self.timings = (sentAt - started, self._firstByteAt - sentAt, finished - self._firstByteAt)
+            return response
+        except asyncio.TimeoutError:
+            # 응답 도중에 끊긴 커넥션은 재사용할 수 없다.
+            self.close()
+            raise socket.timeout('timed out')
+
+    def _hostHeader(self):
+        # 기본 port 가 아니면 port 를 포함해야 virtual host 로 구분하는 서버가 요청을 찾아간다.
+        if self.port == (443 if self.useSSL else 80):
+            return self.host
+        return '%s:%d' % (self.host, self.port)
+
+    async def _readResponse(self, method):
+        statusLine = await self._reader.readline()
+        self._firstByteAt = monotonic()
+        if not statusLine:
+            raise httpclient.RemoteDisconnected("Remote end closed connection without response")
+
+        try:
+            version, status, reason = (statusLine.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+            status = int(status)
+        except ValueError:
+            raise httpclient.BadStatusLine(statusLine)
+
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get('connection', '').lower()
+        willClose = connection == 'close' or (version == 'HTTP/1.0' and connection != 'keep-alive')
+
+        try:
+            if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+                body = b''
+            elif headers.get('transfer-encoding', '').lower() == 'chunked':
+                body = await self._readChunked()
+            elif 'content-length' in headers:
+                body = await self._reader.readexactly(int(headers['content-length']))
+            else:
+                body = await self._reader.read()
+                willClose = True
+        except asyncio.IncompleteReadError as IRE:
+            raise httpclient.IncompleteRead(IRE.partial)
+
+        if willClose:
+            self.close()
+
+        return AsyncResponse(status, reason, headers, body, willClose)
+
+    async def _readChunked(self):
+        chunks = []
+        while True:
+            sizeLine = await self._reader.readline()
+            try:
+                size = int(sizeLine.split(b';', 1)[0].strip(), 16)
+            except ValueError:
+                raise httpclient.IncompleteRead(b''.join(chunks))
+            if size == 0:
+                # trailer 는 무시한다.
+                while True:
+                    line = await self._reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                break
+            chunks.append(await self._reader.readexactly(size))
+            await self._reader.readexactly(2)
+        return b''.join(chunks)
+
+
+class AsyncConnectionPool(object):
+    """ asyncio 용 커넥션 풀. ConnectionPool 과 동일하게 동작하지만 대기는 이벤트루프에서 한다. """
+
+    def __init__(self, host, maxSize=10, idleTimeout=60, maxAge=None, connectionFactory=None):
+        if maxSize < 1:
+            raise ValueError("maxSize must be at least 1")
+
+        self.host = host
+        self.maxSize = maxSize
+        self.idleTimeout = idleTimeout
+        self.maxAge = maxAge
+        self._factory = connectionFactory or AsyncConnection
+        self._idle = []
+        self._inUse = 0
+        self._cond = asyncio.Condition()
+        self._closed = False
+
+    async def checkout(self, timeout=None):
+        deadline = None if timeout == None else stime() + timeout
+
+        async with self._cond:
+            while True:
+                if self._closed:
+                    raise ValueError("connection pool is closed")
+
+                self._evictIdle()
+
+                while self._idle:
+                    pooled = self._idle.pop()
+                    if pooled.conn.isAlive():
+                        self._inUse += 1
+                        return pooled
+                    pooled.close()
+
+                if self._inUse < self.maxSize:
+                    self._inUse += 1
+                    break
+
+                if deadline == None:
+                    await self._cond.wait()
+                else:
+                    remaining = deadline - stime()
+                    if remaining <= 0:
+                        raise ConnectionPoolTimeout("no connection available within %s seconds" % timeout)
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+
+        try:
+            return PooledConnection(self._factory(self.host))
+        except Exception:
+            async with self._cond:
+                self._inUse -= 1
+                self._cond.notify()
+            raise
+
+    async def checkin(self, pooled, reusable=True, response=None):
+        now = stime()
+        pooled.lastUsedAt = now
+
+        if response != None:
+            if response.will_close:
+                reusable = False
+            else:
+                pooled.keepAliveTimeout = keepAliveTimeout(response)
+
+        if reusable and self.maxAge != None and now - pooled.createdAt >= self.maxAge:
+            reusable = False
+
+        async with self._cond:
+            self._inUse -= 1
+            if reusable and not self._closed:
+                self._idle.append(pooled)
+                pooled = None
+            self._cond.notify()
+
+        if pooled != None:
+            pooled.close()
+
+    async def discard(self, pooled):
+        await self.checkin(pooled, reusable=False)
+
+    async def close(self):
+        async with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pooled in idle:
+            pooled.close()
+
+    def terminate(self):
+        """ 이벤트루프 밖에서 풀을 닫는다. 유휴 커넥션을 바로 닫고, 이후 반납되는 커넥션은 폐기한다. """
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            pooled.close()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def stats(self):
+        return {"idle": len(self._idle), "inUse": self._inUse, "maxSize": self.maxSize}
+
+    def _evictIdle(self):
+        now = stime()
+        keep = []
+        for pooled in self._idle:
+            if pooled.isExpired(now, self.idleTimeout, self.maxAge):
+                pooled.close()
+            else:
+                keep.append(pooled)
+        self._idle = keep
+
+
+class _AsyncResult(object):
+    """ 비동기 요청 결과. await 하면 응답 객체를 돌려준다.
+
+        동기 서비스 코드의 `return result.url` 처럼 응답의 속성을 꺼내는 경우에도
+        그대로 동작하도록, 속성 접근은 해당 속성을 돌려주는 새 _AsyncResult 가 된다.
+    """
+
+    def __init__(self, awaitable, attrs=()):
+        self._awaitable = awaitable
+        self._attrs = attrs
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _AsyncResult(self._awaitable, self._attrs + (name,))
+
+    def __await__(self):
+        return self._resolve().__await__()
+
+    async def _resolve(self):
+        result = await self._awaitable
+        for name in self._attrs:
+            result = getattr(result, name)
+        return result
+
+
+class AsyncPopbillBase(PopbillBase):
+    """ PopbillBase 의 asyncio 구현. 요청, 토큰갱신이 모두 이벤트루프 위에서 수행된다.
+
+        호출 제한시간은 deadline() 대신 asyncio.wait_for 로 지정한다.
+        responseMode() 는 스레드가 아닌 task 단위로 적용된다.
+    """
+
+    def __init__(self, LinkID, SecretKey, timeOut=60):
+        """ 생성자.
+            args
+                LinkID : 링크허브에서 발급받은 LinkID
+                SecretKey : 링크허브에서 발급받은 SecretKey
+                timeOut : 유휴 커넥션 유지시간(초)
+        """
+        super(AsyncPopbillBase, self).__init__(LinkID, SecretKey, timeOut)
+        if contextvars != None:
+            self.__responseMode = contextvars.ContextVar('popbill.responseMode', default=None)
+        else:
+            # contextvars 가 없으면(Python 3.7 미만) task 별로 보관한다.
+            self.__taskModes = weakref.WeakKeyDictionary()
+
+    @untraced
+    @contextmanager
+    def responseMode(self, mode):
+        """ 응답 반환형식 지정.
+            with 블록 안에서 현재 task 가 await 하는 API 호출은 ResponseMode 대신 mode 형식으로 응답을 반환한다.
+            args
+                mode : 'object', 'dict', 'raw' 중 하나
+        """
+        if contextvars != None:
+            _checkResponseMode(mode)
+            previous = self.__responseMode.set(mode)
+            try:
+                yield
+            finally:
+                self.__responseMode.reset(previous)
+            return
+
+        task = _currentTask()
+        if task == None:
+            # 이벤트루프 밖에서는 동기 서비스와 같이 스레드 단위로 적용한다.
+            with super(AsyncPopbillBase, self).responseMode(mode):
+                yield
+            return
+
+        _checkResponseMode(mode)
+        previous = self.__taskModes.get(task)
+        self.__taskModes[task] = mode
+        try:
+            yield
+        finally:
+            if previous == None:
+                self.__taskModes.pop(task, None)
+            else:
+                self.__taskModes[task] = previous
+
+    def _responseMode(self):
+        if contextvars != None:
+            mode = self.__responseMode.get()
+        else:
+            task = _currentTask()
+            mode = None if task == None else self.__taskModes.get(task)
+        if mode != None:
+            return mode
+        return super(AsyncPopbillBase, self)._responseMode()
+
+    def _getAsyncPool(self):
+        loop = asyncio.get_event_loop()
+        host, hostname, port, secure = self._serviceAddress()
+
+        context = self.getContext()
+
+        # 풀과 진행중인 토큰갱신은 이벤트루프에 묶여 있으므로 루프가 바뀌면 새로 만든다.
+        if context.asyncLoop is not loop:
+            context.asyncLoop = loop
+            context.asyncPool = None
+            context.asyncTokenRefreshes = {}
+
+        if context.asyncPool == None or context.asyncPool.closed or context.asyncPool.host != host:
+            if context.asyncPool != None and not context.asyncPool.closed:
+                asyncio.ensure_future(context.asyncPool.close())
+            context.asyncPool = AsyncConnectionPool(host, self.PoolMaxSize, context.timeOut, self.PoolMaxAge,
+                                              lambda host: AsyncConnection(hostname, port, secure,
+                                                                           connectTimeout=self.ConnectTimeout,
+                                                                           readTimeout=self.ReadTimeout))
+
+        return context.asyncPool
+
+    async def _getToken(self, CorpNum):
+        loop = asyncio.get_event_loop()
+        self._getAsyncPool()
+
+        # 토큰 캐시는 동기 호출과 함께 사용한다. 만료 여부는 로컬에서 판단한다.
+        token = self._cachedToken(CorpNum)
+        if token != None:
+            return token
+
+        # 같은 CorpNum 에 대한 갱신은 하나만 수행하고 나머지는 그 결과를 기다린다.
+        refreshes = self.getContext().asyncTokenRefreshes
+        future = refreshes.get(CorpNum)
+        if future == None:
+            generate = functools.partial(self._generateAndCacheToken, CorpNum)
+            if contextvars != None:
+                # 토큰발급 span 이 현재 span 아래에 기록되도록 실행 context 를 넘긴다.
+                generate = functools.partial(contextvars.copy_context().run, generate)
+            future = asyncio.ensure_future(loop.run_in_executor(None, generate))
+            refreshes[CorpNum] = future
+            future.add_done_callback(functools.partial(self.__tokenRefreshed, refreshes, CorpNum))
+
+        return await asyncio.shield(future)
+
+    def __tokenRefreshed(self, refreshes, CorpNum, future):
+        if refreshes.get(CorpNum) is future:
+            del refreshes[CorpNum]
+
+    async def _eventToken(self, CorpNum, Event):
+        if CorpNum == None:
+            return None
+
+        with self._tracer().start_as_current_span('popbill.token'):
+            if Event == None:
+                return await self._getToken(CorpNum)
+
+            started = monotonic()
+            try:
+                return await self._getToken(CorpNum)
+            finally:
+                Event.addTiming('token', monotonic() - started)
+
+    async def _request(self, method, url, body, headers, Idempotent=False, Event=None):
+        if Event != None:
+            describeRequest(Event, method, url, body, headers)
+            self._fireHook('beforeRequest', Event)
+
+        with self._tracer().start_as_current_span('popbill.http') as span:
+            _describeSpan(span, method, url, headers)
+
+            breaker = self.Breaker
+            if breaker == None:
+                status, responseString = await self._exchange(method, url, body, headers, Idempotent, Event)
+            else:
+                if not breaker.allowRequest():
+                    raise PopbillException(int(-99999999), 'CIRCUIT BREAKER OPEN')
+
+                started = monotonic()
+                try:
+                    status, responseString = await self._exchange(method, url, body, headers, Idempotent, Event)
+                except BaseException as E:
+                    if _isTransportError(E):
+                        breaker.record(False, monotonic() - started)
+                    else:
+                        breaker.ignore()
+                    raise
+
+                breaker.record(status < 500, monotonic() - started)
+
+            _finishSpan(span, status, Event)
+
+        if Event != None:
+            Event.status = status
+            self._fireHook('afterResponse', Event)
+        return status, responseString
+
+    async def _exchange(self, method, url, body, headers, Idempotent=False, Event=None):
+        pool = self._getAsyncPool()
+        policy = self.Retry
+        idempotent = policy.isIdempotent(method, headers.get("X-HTTP-Method-Override"), Idempotent)
+        watch = Stopwatch(Event)
+
+        # 재시도 판단은 동기 구현과 동일하다.
+        attempt = 1
+        while True:
+            if Event != None:
+                Event.attempts = attempt
+
+            try:
+                pooled = await pool.checkout(self.PoolTimeout)
+            except ConnectionPoolTimeout:
+                raise PopbillException(int(-99999999), 'CONNECTION POOL TIMEOUT')
+            except ValueError:
+                # release() 로 풀이 닫혔다. 새 풀에서 다시 대여한다.
+                pool = self._getAsyncPool()
+                continue
+            watch.lap('poolWait')
+
+            sent = False
+            try:
+                if not pooled.conn.connected:
+                    with self._tracer().start_as_current_span('popbill.connect') as span:
+                        await pooled.conn.connect()
+                        _describeConnect(span, pooled.conn)
+                    watch.connected(pooled.conn)
+                sent = True
+
+                if hasattr(body, 'seek'):
+                    body.seek(0)
+                response = await pooled.conn.request(method, url, body, headers)
+                watch.split(('send', 'serverWait', 'read'), pooled.conn.timings)
+            except Exception as E:
+                await pool.discard(pooled)
+                if not policy.shouldRetry(attempt, E, idempotent or not sent):
+                    raise _networkError(E)
+            except BaseException:
+                await pool.discard(pooled)
+                raise
+            else:
+                await pool.checkin(pooled, response=response)
+                if not policy.shouldRetryStatus(attempt, response.status, idempotent):
+                    if Event != None:
+                        Event.responseSize = len(response.body)
+                    return response.status, _decodeBody(response, response.body)
+
+            await asyncio.sleep(policy.backoffTime(attempt))
+            watch.lap('backoff')
+            attempt += 1
+
+    # 응답형식은 요청 coroutine 을 만드는 시점에 정한다. _AsyncResult 는 다른 task 에서 await 할 수도 있다.
+    def _httpget(self, url, CorpNum=None, UserID=None):
+        return _AsyncResult(self.__httpget(url, CorpNum, UserID, self._responseMode()))
+
+    def _httppost(self, url, postData, CorpNum=None, UserID=None, ActionOverride=None, Idempotent=False):
+        return _AsyncResult(self.__httppost(url, postData, CorpNum, UserID, ActionOverride, Idempotent,
+                                            self._responseMode()))
+
+    def _httppost_files(self, url, postData, Files, CorpNum, UserID=None):
+        return _AsyncResult(self.__httppost_files(url, postData, Files, CorpNum, UserID, self._responseMode()))
+
+    async def __httpget(self, url, CorpNum, UserID, Mode):
+        with self._instrument(CorpNum, UserID) as event:
+            token = await self._eventToken(CorpNum, event)
+            headers = self._makeHeaders(token, UserID)
+
+            status, responseString = await self._request('GET', url, '', headers, Event=event)
+
+            return self._parseResponse(status, responseString, Mode)
+
+    async def __httppost(self, url, postData, CorpNum, UserID, ActionOverride, Idempotent, Mode):
+        with self._instrument(CorpNum, UserID) as event:
+            if event != None:
+                event.payload = postData
+            token = await self._eventToken(CorpNum, event)
+            headers = self._makeHeaders(token, UserID, "Application/json", ActionOverride)
+            postData = self._compressBody(postData, headers)
+
+            status, responseString = await self._request('POST', url, postData, headers, Idempotent, event)
+
+            return self._parseResponse(status, responseString, Mode)
+
+    async def __httppost_files(self, url, postData, Files, CorpNum, UserID, Mode):
+        boundary = "--POPBILL_PYTHON--"
+
+        with self._instrument(CorpNum, UserID) as event:
+            if event != None:
+                event.payload = postData
+            token = await self._eventToken(CorpNum, event)
+            headers = self._makeHeaders(token, UserID, "multipart/form-data; boundary=%s" % boundary)
+
+            multiparted = self._multipart(boundary, postData, Files)
+
+            try:
+                status, responseString = await self._request('POST', url, multiparted, headers, Event=event)
+            except MultipartError:
+                raise PopbillException(-99999999, "해당경로에 파일이 없거나 읽을 수 없습니다.")
+            finally:
+                multiparted.close()
+
+            return self._parseResponse(status, responseString, Mode)
+
+    async def getBalance(self, CorpNum):
+        """ 팝빌 회원 잔여포인트 확인
+            args
+                CorpNum : 확인하고자 하는 회원 사업자번호
+            return
+                잔여포인트 by float
+            raise
+                PopbillException
+        """
+        token = await self._getToken(CorpNum)
+        try:
+            return await asyncio.get_event_loop().run_in_executor(None, self._linkhub, linkhub.getBalance, token)
+        except LinkhubException as LE:
+            raise PopbillException(LE.code, LE.message)
+
+    async def getPartnerBalance(self, CorpNum):
+        """ 팝빌 파트너 잔여포인트 확인
+            args
+                CorpNum : 확인하고자 하는 회원 사업자번호
+            return
+                잔여포인트 by float
+            raise
+                PopbillException
+        """
+        token = await self._getToken(CorpNum)
+        try:
+            return await asyncio.get_event_loop().run_in_executor(None, self._linkhub, linkhub.getPartnerBalance, token)
+        except LinkhubException as LE:
+            raise PopbillException(LE.code, LE.message)
+
+    @untraced
+    async def close(self):
+        """ 커넥션 풀을 닫는다. """
+        context = self.getContext()
+        if context.asyncPool != None:
+            await context.asyncPool.close()
+            context.asyncPool = None
+
+
+def _currentTask():
+    # 실행중인 task, 이벤트루프 밖이면 None
+    try:
+        if hasattr(asyncio, 'current_task'):
+            return asyncio.current_task()
+        return asyncio.Task.current_task()
+    except RuntimeError:
+        return None
+
+
+def _awaitable(method):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        result = method(*args, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+    return wrapper
+
+
+def _traceCoroutine(name, method):
+    # 동기 서비스의 span 은 요청 결과를 await 하기 전에 끝나므로, await 이 끝날 때까지 span 을 유지한다.
+    @functools.wraps(method)
+    async def traced(self, *args, **kwargs):
+        with self._tracer().start_as_current_span(type(self).__name__ + '.' + name):
+            return await method(self, *args, **kwargs)
+    traced.__traced__ = method
+    return traced
+
+
+# 입출력 없이 바로 결과를 돌려주는 공개 메소드. coroutine 으로 감싸지 않는다.
+_syncMethods = frozenset(['deadline', 'responseMode', 'useContext', 'getContext', 'tokenCacheStats'])
+
+
+def _asyncService(cls):
+    """ 동기 서비스로부터 물려받은 공개 메소드를 모두 coroutine 함수로 감싸고 span 을 추가한다. """
+    for name in dir(cls):
+        if name.startswith('_') or name in _syncMethods:
+            continue
+        attr = getattr(cls, name)
+        if not inspect.isfunction(attr):
+            continue
+        if getattr(attr, '__untraced__', False):
+            if not asyncio.iscoroutinefunction(attr):
+                setattr(cls, name, _awaitable(attr))
+            continue
+
+        method = getattr(attr, '__traced__', attr)
+        if not asyncio.iscoroutinefunction(method):
+            method = _awaitable(method)
+        setattr(cls, name, _traceCoroutine(name, method))
+    return cls
+
+
+@_asyncService
+class AsyncTaxinvoiceService(TaxinvoiceService, AsyncPopbillBase):
+    """ 팝빌 세금계산서 API asyncio Service Implementation."""
+
+    async def getUnitCost(self, CorpNum):
+        result = await self._httpget('/Taxinvoice?cfg=UNITCOST', CorpNum)
+        return float(result.unitCost)
+
+    async def getCertificateExpireDate(self, CorpNum):
+        result = await self._httpget('/Taxinvoice?cfg=CERT', CorpNum)
+        return datetime.strptime(result.certificateExpiration, '%Y%m%d%H%M%S')
+
+    async def checkMgtKeyInUse(self, CorpNum, MgtKeyType, MgtKey):
+        if MgtKeyType not in self._TaxinvoiceService__MgtKeyTypes:
+            raise PopbillException(-99999999, "관리번호 형태가 올바르지 않습니다.")
+        if MgtKey == None or MgtKey == "":
+            raise PopbillException(-99999999, "관리번호가 입력되지 않았습니다.")
+
+        try:
+            result = await self._httpget('/Taxinvoice/' + MgtKeyType + "/" + MgtKey, CorpNum)
+            return result.itemKey != None and result.itemKey != ""
+        except PopbillException as PE:
+            if PE.code == -11000005:
+                return False
+            raise PE
+
+
+@_asyncService
+class AsyncStatementService(StatementService, AsyncPopbillBase):
+    """ 팝빌 전자명세서 API asyncio Service Implementation. """
+
+    async def getUnitCost(self, CorpNum, ItemCode):
+        if ItemCode == None:
+            raise PopbillException(-99999999, "명세서 코드가 입력되지 않았습니다.")
+
+        result = await self._httpget('/Statement/' + str(ItemCode) + '?cfg=UNITCOST', CorpNum)
+        return float(result.unitCost)
+
+    async def checkMgtKeyInUse(self, CorpNum, ItemCode, MgtKey):
+        if MgtKey == None or MgtKey == "":
+            raise PopbillException(-99999999, "관리번호가 입력되지 않았습니다.")
+        if ItemCode == None:
+            raise PopbillException(-99999999, "명세서 코드가 입력되지 않았습니다.")
+
+        try:
+            result = await self._httpget('/Statement/' + str(ItemCode) + '/' + MgtKey, CorpNum)
+            return result.itemKey != None and result.itemKey != ""
+        except PopbillException as PE:
+            if PE.code == -12000004:
+                return False
+            raise PE
+
+
+@_asyncService
+class AsyncFaxService(FaxService, AsyncPopbillBase):
+    """ 팝빌 팩스 API asyncio Service Implementation. """
+
+    async def getUnitCost(self, CorpNum):
+        result = await self._httpget('/FAX/UnitCost', CorpNum)
+        return int(result.unitCost)
+
+
+@_asyncService
+class AsyncCashbillService(CashbillService, AsyncPopbillBase):
+    """ 팝빌 현금영수증 API asyncio Service Implementation. """
+
+    async def getUnitCost(self, CorpNum):
+        result = await self._httpget('/Cashbill?cfg=UNITCOST', CorpNum)
+        return float(result.unitCost)
+
+    async def checkMgtKeyInUse(self, CorpNum, MgtKey):
+        if MgtKey == None or MgtKey == "":
+            raise PopbillException(-99999999, "관리번호가 입력되지 않았습니다.")
+
+        try:
+            result = await self._httpget('/Cashbill/' + MgtKey, CorpNum)
+            return result.itemKey != None and result.itemKey != ""
+        except PopbillException as PE:
+            if PE.code == -14000003:
+                return False
+            raise PE
+
+
+@_asyncService
+class AsyncMessageService(MessageService, AsyncPopbillBase):
+    """ 팝빌 문자 API asyncio Service Implementation. """
+
+    async def getUnitCost(self, CorpNum, MsgType):
+        if MsgType == None or MsgType == "":
+            raise PopbillException(-99999999, "전송유형이 입력되지 않았습니다.")
+
+        result = await self._httpget('/Message/UnitCost?Type=' + MsgType, CorpNum)
+        return float(result.unitCost)
+
+
+@_asyncService
+class AsyncClosedownService(ClosedownService, AsyncPopbillBase):
+    """ 팝빌 휴폐업조회 API asyncio Service Implementation. """
+
+    async def getUnitCost(self, CorpNum):
+        result = await self._httpget('/CloseDown/UnitCost', CorpNum)
+        return float(result.unitCost)
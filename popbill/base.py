@@ -8,21 +8,43 @@
 # Written : 2015-01-21
 # Updated : 2016-05-31
 # Thanks for your interest.
-from io import BytesIO
 import datetime
-import json
-from time import time as stime
+import os
+import socket
+import ssl
+import zlib
+from contextlib import contextmanager
+from time import time as stime, sleep
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
 from json import JSONEncoder
-from collections import namedtuple
 try:
     import http.client as httpclient
 except ImportError:
     import httplib as httpclient
+try:
+    from urllib.parse import urlparse
+except ImportError:
+    from urlparse import urlparse
 import mimetypes
+import threading
 
 import linkhub
 from linkhub import LinkhubException
 
+from .connectionPool import ConnectionPool, ConnectionPoolTimeout, PopbillHTTPSConnection, PopbillHTTPConnection
+from .retryPolicy import RetryPolicy
+from .jsonBackend import getBackend, toJson
+from .model import PopbillModel
+from .multipart import MultipartBody, MultipartError
+from .compression import AcceptEncoding, compress, decompress
+from .serverClock import ServerClock, parseTime
+from .clientContext import ClientContext
+from .instrumentation import RequestEvent, Stopwatch, describeRequest, endpointTemplate
+from .tracing import getTracer, traceMethods, untraced
+
 ServiceID_REAL = 'POPBILL';
 ServiceID_TEST = 'POPBILL_TEST';
 ServiceURL_REAL = 'popbill.linkhub.co.kr';
@@ -36,41 +58,493 @@ def __with_metaclass(meta, *bases):
     return type.__new__(metaclass, 'temporary_class', (), {})
 
 
-class Singleton(type):
+class ServiceRegistry(type):
+    """ 서비스 객체 registry.
+        서비스 객체는 (서비스 클래스, LinkID, 테스트 환경 여부) 별로 하나씩 만들어지며,
+        같은 LinkID 로 다시 생성하면 기존 객체를 반환한다. LinkID 가 다르면 커넥션 풀과
+        토큰 캐시를 따로 가진 별도 객체가 만들어진다.
+        환경은 생성시 IsTest 인자로 지정하며, 지정하지 않으면 클래스의 IsTest 값을 따른다.
+    """
     _instances = {}
-    def __call__(cls, *args, **kwargs):
-        if cls not in cls._instances:
-            cls._instances[cls] = super(Singleton, cls).__call__(*args, **kwargs)
-        return cls._instances[cls]
-
-class PopbillBase(__with_metaclass(Singleton,object)):
+    _lock = threading.RLock()
+
+    def __init__(cls, name, bases, attrs):
+        super(ServiceRegistry, cls).__init__(name, bases, attrs)
+        # 공개 메소드 호출마다 span 을 만든다. Reference PopbillBase.Tracer
+        traceMethods(cls, attrs)
+
+    def __call__(cls, LinkID, SecretKey, *args, **kwargs):
+        IsTest = kwargs.pop('IsTest', None)
+        key = (cls, LinkID, cls.IsTest if IsTest == None else bool(IsTest))
+
+        instance = cls._instances.get(key)
+        if instance == None:
+            with cls._lock:
+                instance = cls._instances.get(key)
+                if instance == None:
+                    instance = super(ServiceRegistry, cls).__call__(LinkID, SecretKey, *args, **kwargs)
+                    if IsTest != None:
+                        instance.IsTest = bool(IsTest)
+                    cls._instances[key] = instance
+
+        if instance._secretKey() != SecretKey:
+            raise PopbillException(-99999999,"이미 다른 SecretKey로 생성된 LinkID 입니다.")
+        return instance
+
+    def release(cls, LinkID, IsTest=None):
+        """ registry 에서 서비스 객체를 제거한다. 이후 같은 LinkID 로 생성하면 새 객체가 만들어진다.
+            useContext 로 공유중인 다른 서비스가 없으면 서비스 객체의 커넥션 풀을 닫는다.
+            Refresher 에 등록되어 있으면 등록을 해제한다.
+            args
+                LinkID : 링크허브에서 발급받은 LinkID
+                IsTest : 테스트 환경 여부, None 이면 클래스의 IsTest 값
+            return
+                제거된 서비스 객체, 없으면 None
+        """
+        key = (cls, LinkID, cls.IsTest if IsTest == None else bool(IsTest))
+        with cls._lock:
+            instance = cls._instances.pop(key, None)
+            if instance == None:
+                return None
+            context = instance.getContext()
+            shared = cls._sharing(context)
+
+        if instance.Refresher != None:
+            instance.Refresher.unregister(instance)
+        if not shared:
+            context.close()
+        return instance
+
+    def _sharing(cls, context):
+        # context 를 사용중인 registry 의 서비스 객체 목록
+        with cls._lock:
+            return [other for other in cls._instances.values() if other.getContext() is context]
+
+# 하위 호환
+Singleton = ServiceRegistry
+
+class _AuthURLGate(object):
+    # linkhub 모듈은 인증서버 주소를 프로세스 전역(linkhub.TokenInstance)으로 가진다.
+    # 같은 주소를 쓰는 linkhub 호출은 동시에 수행하고, 다른 주소가 필요한 호출은
+    # 앞선 호출이 모두 끝난 뒤 주소를 바꿔 수행한다. 주소는 마지막 호출이 끝나면 되돌린다.
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._url = None
+        self._users = 0
+        self._previous = ''
+
+    @contextmanager
+    def use(self, url):
+        with self._cond:
+            while self._users and self._url != url:
+                self._cond.wait()
+            if not self._users and url != None:
+                self._previous = getattr(getattr(linkhub, 'TokenInstance', None), '_ServiceURL', '')
+                linkhub.authURL(url)
+            self._url = url
+            self._users += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._users -= 1
+                if not self._users:
+                    if self._url != None:
+                        linkhub.authURL(self._previous)
+                    self._url = None
+                    self._cond.notify_all()
+
+_authURLGate = _AuthURLGate()
+
+
+def _lockGetconn(token):
+    # linkhub 의 Token._getconn 은 새 커넥션을 인스턴스 속성에 저장한 뒤 그 속성을 반환하므로,
+    # 동시에 호출되면 두 스레드가 같은 커넥션을 받을 수 있다. 커넥션 생성만 직렬화하고
+    # 요청은 각자 받은 커넥션으로 동시에 수행한다.
+    getconn = getattr(token, '_getconn', None)
+    if getconn == None or getattr(getconn, 'serialized', False):
+        return
+    lock = threading.Lock()
+
+    def _getconn(*args, **kwargs):
+        with lock:
+            return getconn(*args, **kwargs)
+    _getconn.serialized = True
+    token._getconn = _getconn
+
+_lockGetconn(getattr(linkhub, 'TokenInstance', None))
+
+class PopbillBase(__with_metaclass(ServiceRegistry,object)):
     IsTest = False
 
+    # API 서버 주소(ex. 'http://127.0.0.1:8000'). None 이면 IsTest 에 따라 팝빌 API 서버에 접속한다.
+    # 링크허브 인증서버 주소(AuthURL)는 linkhub 모듈의 프로세스 전역 설정(linkhub.authURL)을 호출하는 동안만
+    # 바꿔서 적용하며, None 이면 linkhub 모듈의 설정을 그대로 사용한다.
+    # 기본값은 환경변수 POPBILL_SERVICE_URL, POPBILL_AUTH_URL 이다. 로컬 대역 서버는 Reference MockPopbillServer class
+    ServiceURL = os.environ.get('POPBILL_SERVICE_URL') or None
+    AuthURL = os.environ.get('POPBILL_AUTH_URL') or None
+
+    # 커넥션 풀 설정. 최대 커넥션 개수, 커넥션 대여 대기시간(초, None 이면 무한대기),
+    # 커넥션 최대 사용시간(초, None 이면 keep-alive 상태로만 재사용 여부를 판단)
+    PoolMaxSize = 10
+    PoolTimeout = None
+    PoolMaxAge = None
+
+    # 연결(TCP 연결, TLS handshake) 제한시간과 읽기 제한시간(초). None 이면 제한없음
+    ConnectTimeout = 10
+    ReadTimeout = 60
+
+    # 요청 재시도 정책. Reference RetryPolicy class
+    Retry = RetryPolicy()
+
+    # 팝빌 서버 장애시 즉시 실패처리하기 위한 circuit breaker. None 이면 사용하지 않는다.
+    # Reference CircuitBreaker class
+    Breaker = None
+
+    # API 응답 반환형식. 'object' : JsonObject, 'dict' : dict/list, 'raw' : 응답 bytes
+    ResponseMode = 'object'
+
+    # 요청 본문 압축방식('gzip', 'deflate'). None 이면 압축하지 않으며,
+    # CompressionThreshold(bytes) 이상인 JSON 요청 본문만 압축한다.
+    RequestCompression = None
+    CompressionThreshold = 1024
+
+    # True 이면 Accept-Encoding 헤더로 응답 압축을 요청한다.
+    ResponseCompression = False
+
+    # 토큰 만료 판단. 만료 TokenExpiryMargin 초 전에 토큰을 갱신하며, 만료시각은
+    # ClockSyncInterval 초마다 한번 조회하는 서버 시간과 로컬 시계의 차이로 계산한다.
+    TokenExpiryMargin = 10
+    ClockSyncInterval = 3600
+
+    # 토큰 백그라운드 갱신. None 이면 API 호출시 필요할 때만 갱신한다.
+    # Reference TokenRefresher class
+    Refresher = None
+
+    # 토큰 캐시 최대 CorpNum 수. 넘으면 가장 오래 사용하지 않은 CorpNum 의 토큰을 제거한다.
+    # None 이면 제한없음
+    TokenCacheSize = 10000
+
+    # 프로세스간 토큰 공유 저장소. None 이면 프로세스마다 토큰을 발급한다.
+    # Reference TokenStore class (MemoryTokenStore, SQLiteTokenStore, SharedMemoryTokenStore)
+    TokenStore = None
+
+    # API 호출 이벤트 callback. None 이면 호출 정보를 수집하지 않는다.
+    # Reference RequestHooks class
+    Hooks = None
+
+    # 공개 메소드 호출, 토큰 확보, 연결, HTTP 요청을 span 으로 기록할 tracer.
+    # None 이면 OpenTelemetry 가 설치되어 있을 때 전역 tracer 를 사용하고, 아니면 기록하지 않는다.
+    # Reference tracing.getTracer
+    Tracer = None
+
+    # 느린 호출 기록. None 이면 기록하지 않는다. Reference SlowCallLog class
+    SlowCallLog = None
+
+    # 공개 메소드 호출 표본 profile. None 이면 profile 하지 않는다. Reference CallProfiler class
+    Profiler = None
+
     def __init__(self,LinkID,SecretKey,timeOut = 60):
         """ 생성자.
             args
                 LinkID : 링크허브에서 발급받은 LinkID
                 SecretKey : 링크허브에서 발급받은 SecretKey
+                timeOut : 유휴 커넥션 유지시간(초). 마지막 사용 이후 이 시간이 지난 커넥션은 재연결한다.
         """
         self.__linkID = LinkID
         self.__secretKey = SecretKey
-        self.__scopes = ["member"]
-        self.__tokenCache = {}
-        self.__conn = None
-        self.__connectedAt = stime()
-        self.__timeOut = timeOut
-
-
-    def _getConn(self,ForceReconnect=False):
-        if ForceReconnect or self.__conn == None or stime() - self.__connectedAt >= self.__timeOut:
-            self.__conn = httpclient.HTTPSConnection(ServiceURL_TEST if self.IsTest else ServiceURL_REAL);
-            self.__connectedAt = stime()
-            return self.__conn
+        self.__context = ClientContext(timeOut, self.TokenCacheSize)
+        self.__context.linkID = LinkID
+        self.__context.clock = ServerClock(self._serverTime, self.ClockSyncInterval)
+        self.__local = threading.local()
+
+    @untraced
+    @contextmanager
+    def deadline(self,seconds):
+        """ 호출 제한시간 지정.
+            with 블록 안에서 현재 스레드가 수행하는 API 호출은 커넥션 대기, 재시도,
+            토큰갱신을 모두 포함해 seconds 안에 끝나야 한다. 중첩되면 더 짧은 쪽이 적용된다.
+            args
+                seconds : 제한시간(초)
+            raise
+                PopbillException (제한시간 초과시)
+        """
+        previous = getattr(self.__local, 'deadline', None)
+        deadline = monotonic() + seconds
+        if previous != None:
+            deadline = min(previous, deadline)
+
+        self.__local.deadline = deadline
+        try:
+            yield
+        finally:
+            self.__local.deadline = previous
+
+    @untraced
+    @contextmanager
+    def responseMode(self,mode):
+        """ 응답 반환형식 지정.
+            with 블록 안에서 현재 스레드가 수행하는 API 호출은 ResponseMode 대신 mode 형식으로 응답을 반환한다.
+            args
+                mode : 'object', 'dict', 'raw' 중 하나
+        """
+        _checkResponseMode(mode)
+
+        previous = getattr(self.__local, 'responseMode', None)
+        self.__local.responseMode = mode
+        try:
+            yield
+        finally:
+            self.__local.responseMode = previous
+
+    def _responseMode(self):
+        mode = getattr(self.__local, 'responseMode', None)
+        return self.ResponseMode if mode == None else mode
+
+    def _remainingTime(self):
+        deadline = getattr(self.__local, 'deadline', None)
+        if deadline == None:
+            return None
+
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            raise PopbillException(int(-99999999), 'DEADLINE EXCEEDED')
+        return remaining
+
+    @untraced
+    def useContext(self,context):
+        """ 다른 서비스와 커넥션 풀, 토큰을 공유한다.
+            같은 context 를 사용하는 서비스들은 CorpNum 별로 하나의 토큰을 사용하며,
+            토큰은 모든 서비스의 scope 를 합쳐 발급한다.
+            args
+                context : 공유할 ClientContext. 다른 서비스의 getContext() 결과 또는 새로 만든 ClientContext
+            raise
+                PopbillException (context 를 사용중인 서비스와 LinkID, IsTest, ServiceURL 중 하나라도 다른 경우)
+        """
+        if context is self.__context:
+            return
+
+        if context.linkID != None and context.linkID != self.__linkID:
+            raise PopbillException(-99999999,"LinkID가 다른 서비스와는 context를 공유할 수 없습니다.")
+
+        environment = self._environment()
+        for other in type(self)._sharing(context):
+            if other is not self and other._environment() != environment:
+                raise PopbillException(-99999999,"IsTest 또는 ServiceURL이 다른 서비스와는 context를 공유할 수 없습니다.")
+
+        context.linkID = self.__linkID
+
+        if context.clock == None:
+            context.clock = self.__context.clock
+        context.addScopes(self.__context.scopes)
+        self.__context = context
+
+    @untraced
+    def getContext(self):
+        """ 이 서비스가 사용하는 ClientContext """
+        return self.__context
+
+    def _tracer(self):
+        return getTracer(self.Tracer)
+
+    def _environment(self):
+        # 토큰과 커넥션을 공유할 수 있는지 판단하는 (테스트 환경 여부, 서비스 주소)
+        return bool(self.IsTest), self._serviceAddress()
+
+    def _serviceAddress(self):
+        # (풀 host, 접속 host, port, HTTPS 여부)
+        if self.ServiceURL == None:
+            host = ServiceURL_TEST if self.IsTest else ServiceURL_REAL
+            return host, host, 443, True
+        return _parseServiceURL(self.ServiceURL)
+
+    def _getPool(self):
+        host, hostname, port, secure = self._serviceAddress()
+        connectionClass = PopbillHTTPSConnection if secure else PopbillHTTPConnection
+        context = self.__context
+        pool = context.pool
+
+        if pool == None or pool.closed or pool.host != host:
+            with context.poolLock:
+                pool = context.pool
+                if pool == None or pool.closed or pool.host != host:
+                    if pool != None:
+                        pool.close()
+                    pool = ConnectionPool(host, self.PoolMaxSize, context.timeOut, self.PoolMaxAge,
+                                          lambda host: connectionClass(host, self.ConnectTimeout, self.ReadTimeout))
+                    context.pool = pool
+
+        return pool
+
+    @contextmanager
+    def _instrument(self,CorpNum,UserID):
+        # Hooks 나 SlowCallLog 가 지정되어 있으면 API 호출 1건의 RequestEvent 를 만들고,
+        # 예외로 끝나면 error callback 을 호출한다. 호출이 끝나면 느린 호출인지 검사한다.
+        hooks = self.Hooks
+        slowCallLog = self.SlowCallLog
+        if hooks == None and slowCallLog == None:
+            yield None
+            return
+
+        event = RequestEvent(type(self).__name__, CorpNum, UserID)
+        try:
+            yield event
+        except Exception as E:
+            event.error = E
+            event.timings['total'] = monotonic() - event.started
+            if hooks != None:
+                hooks.error(event)
+            raise
         else:
-            return self.__conn
+            # 응답 해석까지 포함한다.
+            event.timings['total'] = monotonic() - event.started
+        finally:
+            if slowCallLog != None:
+                slowCallLog.check(event)
+
+    def _fireHook(self,name,Event):
+        hooks = self.Hooks
+        if hooks != None:
+            if name != 'beforeRequest':
+                Event.timings['total'] = monotonic() - Event.started
+            getattr(hooks, name)(Event)
+
+    def _eventToken(self,CorpNum,Event):
+        if CorpNum == None:
+            return None
+
+        with self._tracer().start_as_current_span('popbill.token'):
+            if Event == None:
+                return self._getToken(CorpNum)
+
+            started = monotonic()
+            try:
+                return self._getToken(CorpNum)
+            finally:
+                Event.addTiming('token', monotonic() - started)
+
+    def _request(self,method,url,body,headers,Idempotent = False,Event = None):
+        if Event != None:
+            describeRequest(Event, method, url, body, headers)
+            self._fireHook('beforeRequest', Event)
+
+        with self._tracer().start_as_current_span('popbill.http') as span:
+            _describeSpan(span, method, url, headers)
+
+            breaker = self.Breaker
+            if breaker == None:
+                status, responseString = self._exchange(method, url, body, headers, Idempotent, Event)
+            else:
+                if not breaker.allowRequest():
+                    raise PopbillException(int(-99999999), 'CIRCUIT BREAKER OPEN')
+
+                started = monotonic()
+                try:
+                    status, responseString = self._exchange(method, url, body, headers, Idempotent, Event)
+                except BaseException as E:
+                    # 커넥션 풀 대기, 호출 제한시간 초과 등 로컬에서 생긴 오류는 서버 장애로 보지 않는다.
+                    if _isTransportError(E):
+                        breaker.record(False, monotonic() - started)
+                    else:
+                        breaker.ignore()
+                    raise
+
+                # 업무 오류(4xx)는 서버가 정상 응답한 것이므로 실패로 보지 않는다.
+                breaker.record(status < 500, monotonic() - started)
+
+            _finishSpan(span, status, Event)
+
+        if Event != None:
+            Event.status = status
+            self._fireHook('afterResponse', Event)
+        return status, responseString
+
+    def _exchange(self,method,url,body,headers,Idempotent = False,Event = None):
+        pool = self._getPool()
+        policy = self.Retry
+        idempotent = policy.isIdempotent(method, headers.get("X-HTTP-Method-Override"), Idempotent)
+        watch = Stopwatch(Event)
+
+        attempt = 1
+        while True:
+            if Event != None:
+                Event.attempts = attempt
+            remaining = self._remainingTime()
+
+            try:
+                pooled = pool.checkout(_shorter(self.PoolTimeout, remaining))
+            except ConnectionPoolTimeout:
+                raise PopbillException(int(-99999999), 'CONNECTION POOL TIMEOUT')
+            except ValueError:
+                # release() 로 풀이 닫혔다. 새 풀에서 다시 대여한다.
+                pool = self._getPool()
+                continue
+            watch.lap('poolWait')
+
+            # 남은 호출 제한시간보다 길게 기다리지 않는다.
+            pooled.conn.setTimeouts(_shorter(self.ConnectTimeout, remaining), _shorter(self.ReadTimeout, remaining))
+
+            sent = False
+            try:
+                if pooled.conn.sock == None:
+                    with self._tracer().start_as_current_span('popbill.connect') as span:
+                        pooled.conn.connect()
+                        _describeConnect(span, pooled.conn)
+                    watch.connected(pooled.conn)
+                sent = True
+
+                if hasattr(body, 'seek'):
+                    # 스트리밍 본문은 시도할 때마다 처음부터 다시 읽는다.
+                    body.seek(0)
+                pooled.conn.request(method, url, body, headers)
+                watch.lap('send')
+
+                response = pooled.conn.getresponse()
+                watch.lap('serverWait')
+                responseString = response.read()
+                watch.lap('read')
+            except Exception as E:
+                # 문제가 생긴 커넥션은 폐기한다.
+                pool.discard(pooled)
+                if remaining != None and _isTimeout(E):
+                    # 호출 제한시간에 맞춰 줄인 제한시간을 넘긴 경우이다.
+                    self._remainingTime()
+                # 연결 단계에서 실패했다면 요청이 전달되지 않았으므로 멱등성과 상관없이 재시도할 수 있다.
+                if not policy.shouldRetry(attempt, E, idempotent or not sent):
+                    raise _networkError(E)
+            else:
+                pool.checkin(pooled, response=response)
+                if not policy.shouldRetryStatus(attempt, response.status, idempotent):
+                    if Event != None:
+                        Event.responseSize = len(responseString)
+                    return response.status, _decodeBody(response, responseString)
+
+            delay = policy.backoffTime(attempt)
+            remaining = self._remainingTime()
+            if remaining != None and delay >= remaining:
+                raise PopbillException(int(-99999999), 'DEADLINE EXCEEDED')
+            sleep(delay)
+            watch.lap('backoff')
+
+            attempt += 1
+
+    def _parseResponse(self,status,responseString,Mode = None):
+        if status != 200 :
+            err = Utils.json2obj(responseString)
+            raise PopbillException(int(err.code),err.message)
+
+        mode = self._responseMode() if Mode == None else Mode
+        if mode == 'object':
+            return Utils.json2obj(responseString)
+        if mode == 'dict':
+            return Utils.json2dict(responseString)
+        if mode == 'raw':
+            return RawResponse(responseString)
+        _checkResponseMode(mode)
 
     def _addScope(self,newScope):
-        self.__scopes.append(newScope)
+        self.__context.addScopes([newScope])
 
     def getBalance(self,CorpNum):
         """ 팝빌 회원 잔여포인트 확인
@@ -82,7 +556,8 @@ class PopbillBase(__with_metaclass(Singleton,object)):
                 PopbillException
         """
         try:
-            return linkhub.getBalance(self._getToken(CorpNum))
+            token = self._getToken(CorpNum)
+            return self._linkhub(linkhub.getBalance,token)
         except LinkhubException as LE:
                 raise PopbillException(LE.code,LE.message)
 
@@ -96,7 +571,8 @@ class PopbillBase(__with_metaclass(Singleton,object)):
                 PopbillException
         """
         try:
-            return linkhub.getPartnerBalance(self._getToken(CorpNum))
+            token = self._getToken(CorpNum)
+            return self._linkhub(linkhub.getPartnerBalance,token)
         except LinkhubException as LE:
                 raise PopbillException(LE.code,LE.message)
 
@@ -140,78 +616,178 @@ class PopbillBase(__with_metaclass(Singleton,object)):
 
     def _getToken(self,CorpNum):
 
+        token = self._cachedToken(CorpNum)
+        if token != None:
+            return token
+
+        # 같은 CorpNum 에 대한 갱신은 한 스레드만 수행하고, 나머지 스레드는 그 결과를 기다린다.
+        context = self.__context
+        with context.tokenLock:
+            entry = context.tokenCache.entry(CorpNum)
+            if entry != None and monotonic() < entry[1]:
+                # 기다리는 동안 다른 스레드가 이미 갱신했다.
+                return entry[0]
+
+            refresh = context.tokenRefreshes.get(CorpNum)
+            leader = refresh == None
+            if leader:
+                refresh = context.tokenRefreshes[CorpNum] = _TokenRefresh()
+            elif entry != None and monotonic() < entry[2]:
+                # 갱신시점은 지났지만 아직 만료되지 않은 토큰은 갱신을 기다리지 않고 계속 사용한다.
+                return entry[0]
+
+        remaining = self._remainingTime()
+
+        if leader:
+            if remaining == None:
+                self._refreshToken(CorpNum, refresh)
+            else:
+                # linkhub 호출 자체에는 제한시간이 없으므로 별도 스레드에서 수행하고 남은 시간만큼만 기다린다.
+                # 제한시간이 지나도 갱신은 계속되어 기다리는 다른 스레드가 결과를 받는다.
+                worker = threading.Thread(target=self._refreshToken, args=(CorpNum, refresh))
+                worker.daemon = True
+                worker.start()
+
+        return refresh.result(remaining)
+
+    def _refreshToken(self,CorpNum,refresh,minLifetime = None):
+        token = None
+        error = PopbillException(int(-99999999), 'UNEXPECTED EXCEPTION')
         try:
-            token = self.__tokenCache[CorpNum]
-        except KeyError :
-            token = None
+            token = self._generateAndCacheToken(CorpNum, minLifetime)
+            error = None
+        except Exception as E:
+            error = E
+        finally:
+            context = self.__context
+            with context.tokenLock:
+                if context.tokenRefreshes.get(CorpNum) is refresh:
+                    del context.tokenRefreshes[CorpNum]
+            refresh.finish(token, error)
+
+    def _generateAndCacheToken(self,CorpNum,minLifetime = None):
+        # minLifetime : 저장소의 토큰을 재사용할 최소 남은 시간(초). 기본값은 TokenExpiryMargin
+        scopes = self.__context.scopes
+        store = self.TokenStore
+        if store == None:
+            token = self._generateToken(CorpNum)
+            self.__context.countGeneration()
+        else:
+            if minLifetime == None:
+                minLifetime = self.TokenExpiryMargin
+            key = self._tokenStoreKey(CorpNum)
+
+            # 저장소를 공유하는 프로세스 중 하나만 발급하고, 나머지는 저장된 토큰을 사용한다.
+            with store.lock(key):
+                token = store.load(key)
+                if token == None or self._tokenLifetime(token) <= minLifetime:
+                    token = self._generateToken(CorpNum)
+                    self.__context.countGeneration()
+                    store.save(key, token, stime() + self._tokenLifetime(token))
+
+        # 발급중에 다른 서비스가 context 에 참여해 scope 가 늘었으면, 이 토큰은 캐시하지 않는다.
+        if self.__context.scopes is scopes:
+            self._cacheToken(CorpNum, token)
+        return token
+
+    def _tokenStoreKey(self,CorpNum):
+        return "%s/%s/%s/%s" % (ServiceID_TEST if self.IsTest else ServiceID_REAL, self.__linkID,
+                                CorpNum, ",".join(sorted(self.__context.scopes)))
 
-        refreshToken = True
+    def _cachedToken(self,CorpNum):
+        return self.__context.tokenCache.lookup(CorpNum)
 
-        if token != None :
-            refreshToken = token.expiration[:-5] < linkhub.getTime()
+    def _cacheToken(self,CorpNum,token):
+        expiresAt = monotonic() + self._tokenLifetime(token)
+        self.__context.tokenCache.maxSize = self.TokenCacheSize
+        self.__context.tokenCache.put(CorpNum, token, expiresAt - self.TokenExpiryMargin, expiresAt)
 
-        if refreshToken :
+        if self.Refresher != None:
+            self.Refresher.register(self)
+
+    @untraced
+    def tokenCacheStats(self):
+        """ 토큰 캐시 현황
+            return
+                dict of (size, maxSize, hits, misses, evictions, expired)
+        """
+        return self.__context.tokenCache.stats()
+
+    def _refreshTokens(self,margin,idleTimeout):
+        # TokenRefresher 가 주기적으로 호출한다. 갱신시점까지 margin 초 이하로 남은 토큰을 갱신하고,
+        # idleTimeout 초 동안 사용하지 않은 토큰은 제거한다. (갱신 수, 제거 수, 실패 수)를 반환한다.
+        context = self.__context
+        context.tokenCache.sweep()
+        now = monotonic()
+        due = []
+        dropped = 0
+
+        with context.tokenLock:
+            for CorpNum, entry, used in context.tokenCache.items():
+                if used != None and now - used >= idleTimeout:
+                    context.tokenCache.pop(CorpNum)
+                    dropped += 1
+                elif now >= entry[1] - margin and CorpNum not in context.tokenRefreshes:
+                    # API 호출과 같은 갱신 경로를 사용하므로, 갱신중에 호출한 스레드는 기존 토큰을 계속 사용한다.
+                    refresh = context.tokenRefreshes[CorpNum] = _TokenRefresh()
+                    due.append((CorpNum, refresh))
+
+        refreshed = failed = 0
+        for CorpNum, refresh in due:
+            self._refreshToken(CorpNum, refresh, margin + self.TokenExpiryMargin)
             try:
-                token = linkhub.generateToken(self.__linkID,self.__secretKey,ServiceID_TEST if self.IsTest else ServiceID_REAL ,CorpNum,self.__scopes)
+                refresh.result()
+                refreshed += 1
+            except Exception:
+                failed += 1
 
-                try:
-                    del self.__tokenCache[CorpNum]
-                except KeyError:
-                    pass
+        return refreshed, dropped, failed
 
-                self.__tokenCache[CorpNum] = token
+    def _tokenLifetime(self,token):
+        # 토큰 만료까지 남은 시간(초). 서버 시간은 로컬 시계와 추정한 offset 으로 계산한다.
+        return parseTime(token.expiration) - self._serverClock().now()
 
-            except LinkhubException as LE:
-                raise PopbillException(LE.code,LE.message)
+    def _isTokenExpired(self,token):
+        return self._tokenLifetime(token) <= self.TokenExpiryMargin
 
-        return token
+    def _serverClock(self):
+        self.__context.clock.syncInterval = self.ClockSyncInterval
+        return self.__context.clock
 
-    def _httpget(self,url,CorpNum = None,UserID = None):
+    def _serverTime(self):
+        with self._tracer().start_as_current_span('linkhub.getTime'):
+            try:
+                return self._linkhub(linkhub.getTime)
+            except LinkhubException as LE:
+                raise PopbillException(LE.code,LE.message)
 
-        headers = {"x-pb-version" : APIVersion}
+    def _linkhub(self,func,*args):
+        # linkhub 호출. AuthURL 이 지정되어 있으면 호출하는 동안만 linkhub 의 인증서버 주소를 바꾼다.
+        if self.AuthURL != None and not hasattr(linkhub, 'authURL'):
+            raise PopbillException(-99999999,"설치된 linkhub 모듈은 인증서버 주소 지정을 지원하지 않습니다.")
 
-        if CorpNum != None:
-            headers["Authorization"] = "Bearer " + self._getToken(CorpNum).session_token
+        with _authURLGate.use(self.AuthURL):
+            return func(*args)
 
-        if UserID != None:
-            headers["x-pb-userid"] = UserID
+    def _secretKey(self):
+        return self.__secretKey
 
-        # SEH 의 EXCEPTION_EXECUTE_HANDLER 를 모방해서, 한번의 실패에 한해 강제 재연결을 수행한다.
-        # 그 후에 발생하는 에러에 대해서는 그냥 예외처리한다.
-        for i in range(2):
+    def _generateToken(self,CorpNum):
+        with self._tracer().start_as_current_span('linkhub.generateToken'):
             try:
-                conn = self._getConn()
-                conn.request('GET', url, '', headers)
+                return self._linkhub(linkhub.generateToken,self.__linkID,self.__secretKey,ServiceID_TEST if self.IsTest else ServiceID_REAL ,CorpNum,self.__context.scopes)
+            except LinkhubException as LE:
+                raise PopbillException(LE.code,LE.message)
 
-                response = conn.getresponse()
-                responseString = response.read()
-                break
-            except httpclient.HTTPException:
-                if i == 0:
-                    # 처음 예외가 발생했을 경우는 재연결을 시도한다.
-                    try:
-                        self._getConn(ForceReconnect=True)
-                        continue
-                    except Exception:
-                        # 재연결에서 어떤 에러가 발생한다면?
-                        # 처리할 수 없는 상황, 아마도 서버에의 초기 연결이 실패한경우
-                        raise PopbillException(int(-99999999), 'UNEXPECTED EXCEPTION')
-                else:
-                    # 이미 한번 예외 처리를 했음에도 불구하고 에러가 난 경우.
-                    raise PopbillException(int(-99999999), 'UNEXPECTED EXCEPTION')
-
-        if response.status != 200 :
-            err = Utils.json2obj(responseString)
-            raise PopbillException(int(err.code),err.message)
-        else:
-            return Utils.json2obj(responseString)
+    def _makeHeaders(self,token,UserID = None,ContentType = None,ActionOverride = None):
 
-    def _httppost(self,url,postData, CorpNum = None,UserID = None,ActionOverride = None ):
+        headers = {"x-pb-version" : APIVersion}
 
-        headers = {"x-pb-version" : APIVersion, "Content-Type" : "Application/json"}
+        if ContentType != None:
+            headers["Content-Type"] = ContentType
 
-        if CorpNum != None:
-            headers["Authorization"] = "Bearer " + self._getToken(CorpNum).session_token
+        if token != None:
+            headers["Authorization"] = "Bearer " + token.session_token
 
         if UserID != None:
             headers["x-pb-userid"] = UserID
@@ -219,116 +795,253 @@ class PopbillBase(__with_metaclass(Singleton,object)):
         if ActionOverride != None:
             headers["X-HTTP-Method-Override"] = ActionOverride
 
-        # SEH 의 EXCEPTION_EXECUTE_HANDLER 를 모방해서, 한번의 실패에 한해 강제 재연결을 수행한다.
-        # 그 후에 발생하는 에러에 대해서는 그냥 예외처리한다.
-        for i in range(2):
-            try:
-                conn = self._getConn()
-                conn.request('POST', url, postData, headers)
+        if self.ResponseCompression:
+            headers["Accept-Encoding"] = AcceptEncoding
 
-                response = conn.getresponse()
-                responseString = response.read()
-                break
-            except httpclient.HTTPException:
-                if i == 0:
-                    # 처음 예외가 발생했을 경우는 재연결을 시도한다.
-                    try:
-                        self._getConn(ForceReconnect=True)
-                        continue
-                    except Exception:
-                        # 재연결에서 어떤 에러가 발생한다면?
-                        # 처리할 수 없는 상황, 아마도 서버에의 초기 연결이 실패한경우
-                        raise PopbillException(int(-99999999), 'UNEXPECTED EXCEPTION')
-                else:
-                    # 이미 한번 예외 처리를 했음에도 불구하고 에러가 난 경우.
-                    raise PopbillException(int(-99999999), 'UNEXPECTED EXCEPTION')
-
-        if response.status != 200 :
-            err = Utils.json2obj(responseString)
-            raise PopbillException(int(err.code),err.message)
-        else:
-            return Utils.json2obj(responseString)
+        return headers
 
-    def _httppost_files(self,url,postData,Files,CorpNum,UserID = None):
+    def _compressBody(self,postData,headers):
+        encoding = self.RequestCompression
+        if encoding == None or postData == None:
+            return postData
 
-        boundary = "--POPBILL_PYTHON--"
+        body = postData if isinstance(postData, bytes) else postData.encode('utf-8')
+        if len(body) < self.CompressionThreshold:
+            return postData
 
-        headers = {"x-pb-version" : APIVersion, "Content-Type" : "multipart/form-data; boundary=%s" % boundary}
+        headers["Content-Encoding"] = encoding
+        return compress(body, encoding)
 
-        if CorpNum != None:
-            headers["Authorization"] = "Bearer " + self._getToken(CorpNum).session_token
+    def _httpget(self,url,CorpNum = None,UserID = None):
 
-        if UserID != None:
-            headers["x-pb-userid"] = UserID
+        with self._instrument(CorpNum, UserID) as event:
+            token = self._eventToken(CorpNum, event)
+            headers = self._makeHeaders(token, UserID)
+
+            status, responseString = self._request('GET', url, '', headers, Event = event)
 
+            return self._parseResponse(status, responseString)
 
-        #oraganize postData
-        CRLF = '\r\n'
+    def _httppost(self,url,postData, CorpNum = None,UserID = None,ActionOverride = None,Idempotent = False):
 
-        buff = BytesIO()
+        with self._instrument(CorpNum, UserID) as event:
+            if event != None:
+                event.payload = postData
+            token = self._eventToken(CorpNum, event)
+            headers = self._makeHeaders(token, UserID, "Application/json", ActionOverride)
+            postData = self._compressBody(postData, headers)
 
-        if postData != None and postData != '':
-            buff.write((CRLF + '--' + boundary + CRLF).encode('utf-8'))
-            buff.write(('Content-Disposition: form-data; name="form"' + CRLF).encode('utf-8'))
-            buff.write(CRLF.encode('utf-8'))
-            buff.write(postData.encode('utf-8'))
+            status, responseString = self._request('POST', url, postData, headers, Idempotent, event)
 
-        for f in Files:
-            buff.write(( CRLF + '--' + boundary + CRLF).encode('utf-8'))
-            buff.write(('Content-Disposition: form-data; name="%s"; filename="%s"' % (f.fieldName, f.fileName) + CRLF).encode('utf-8'))
-            buff.write(('Content-Type: Application/octet-stream' + CRLF).encode('utf-8'))
-            buff.write(CRLF.encode('utf-8'))
-            buff.write(f.fileData)
+            return self._parseResponse(status, responseString)
 
-        buff.write(( CRLF + '--' + boundary + '--' + CRLF + CRLF).encode('utf-8'))
+    def _httppost_files(self,url,postData,Files,CorpNum,UserID = None):
+
+        boundary = "--POPBILL_PYTHON--"
 
-        multiparted = buff.getvalue()
+        with self._instrument(CorpNum, UserID) as event:
+            if event != None:
+                event.payload = postData
+            token = self._eventToken(CorpNum, event)
+            headers = self._makeHeaders(token, UserID, "multipart/form-data; boundary=%s" % boundary)
+
+            multiparted = self._multipart(boundary, postData, Files)
+            headers["Content-Length"] = str(len(multiparted))
 
-        # SEH 의 EXCEPTION_EXECUTE_HANDLER 를 모방해서, 한번의 실패에 한해 강제 재연결을 수행한다.
-        # 그 후에 발생하는 에러에 대해서는 그냥 예외처리한다.
-        for i in range(2):
             try:
-                conn = self._getConn()
-                conn.request('POST', url, multiparted, headers)
+                status, responseString = self._request('POST', url, multiparted, headers, Event = event)
+            except MultipartError:
+                raise PopbillException(-99999999,"해당경로에 파일이 없거나 읽을 수 없습니다.")
+            finally:
+                multiparted.close()
 
-                response = conn.getresponse()
-                responseString = response.read()
-                break
-            except httpclient.HTTPException:
-                if i == 0:
-                    # 처음 예외가 발생했을 경우는 재연결을 시도한다.
-                    try:
-                        self._getConn(ForceReconnect=True)
-                        continue
-                    except Exception:
-                        # 재연결에서 어떤 에러가 발생한다면?
-                        # 처리할 수 없는 상황, 아마도 서버에의 초기 연결이 실패한경우
-                        raise PopbillException(int(-99999999), 'UNEXPECTED EXCEPTION')
-                else:
-                    # 이미 한번 예외 처리를 했음에도 불구하고 에러가 난 경우.
-                    raise PopbillException(int(-99999999), 'UNEXPECTED EXCEPTION')
-
-        if response.status != 200 :
-            err = Utils.json2obj(responseString)
-            raise PopbillException(int(err.code),err.message)
-        else:
-            return Utils.json2obj(responseString)
+            return self._parseResponse(status, responseString)
+
+    def _multipart(self,boundary,postData,Files):
+        # 첨부파일은 전송하면서 읽는다. Reference MultipartBody class
+        return MultipartBody(boundary, postData, Files)
 
     def _parse(self,jsonString):
         return Utils.json2obj(jsonString);
 
     def _stringtify(self,obj):
-        return json.dumps(obj,cls=PopbillEncoder)
+        return getBackend().dumps(obj)
 
 
-class JoinForm(object):
-    def __init__(self,**kwargs):
-        self.__dict__ = kwargs
+try:
+    _stringTypes = basestring
+except NameError:
+    _stringTypes = str
+
+
+def _shorter(timeout, remaining):
+    if timeout == None:
+        return remaining
+    if remaining == None:
+        return timeout
+    return min(timeout, remaining)
+
+
+_serviceAddresses = {}
+
+def _parseServiceURL(url):
+    # ServiceURL 을 (풀 host, 접속 host, port, HTTPS 여부)로 변환한다. 호출마다 파싱하지 않도록 결과를 보관한다.
+    address = _serviceAddresses.get(url)
+    if address == None:
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+            raise PopbillException(-99999999,"ServiceURL에 전송 프로토콜(HTTP 또는 HTTPS)을 포함하여 주시기 바랍니다.")
+        secure = parsed.scheme == 'https'
+        port = parsed.port or (443 if secure else 80)
+        address = _serviceAddresses[url] = (parsed.netloc, parsed.hostname, port, secure)
+    return address
+
+
+_transportErrors = ('REQUEST TIMEOUT', 'UNEXPECTED EXCEPTION', 'CONNECTION ERROR')
+
+def _networkError(E):
+    # 재시도 후에도 실패한 요청의 예외를 PopbillException 으로 변환한다.
+    if isinstance(E, PopbillException):
+        return E
+    if _isTimeout(E):
+        return PopbillException(int(-99999999), 'REQUEST TIMEOUT')
+    if isinstance(E, httpclient.HTTPException):
+        return PopbillException(int(-99999999), 'UNEXPECTED EXCEPTION')
+    if isinstance(E, socket.error):
+        return PopbillException(int(-99999999), 'CONNECTION ERROR')
+    return E
+
+
+def _isTimeout(E):
+    # Python 2 는 TLS handshake 제한시간 초과를 socket.timeout 이 아닌 ssl.SSLError 로 알린다.
+    if isinstance(E, socket.timeout):
+        return True
+    return isinstance(E, ssl.SSLError) and 'timed out' in str(E)
+
+
+def _isTransportError(E):
+    # circuit breaker 가 실패로 기록하는 오류. _networkError 로 변환된 네트워크 오류만 해당한다.
+    return isinstance(E, PopbillException) and E.message in _transportErrors
+
+
+def _describeSpan(span, method, url, headers):
+    # span 속성은 기록중인 span 에만 만든다. (NoopTracer 는 기록하지 않는다.)
+    if span.is_recording():
+        span.set_attribute('http.method', method)
+        span.set_attribute('popbill.endpoint', endpointTemplate(url))
+        action = headers.get("X-HTTP-Method-Override")
+        if action != None:
+            span.set_attribute('popbill.action', action)
+
+
+def _finishSpan(span, status, Event):
+    if span.is_recording():
+        span.set_attribute('http.status_code', status)
+        if Event != None:
+            span.set_attribute('popbill.attempts', Event.attempts)
+            if Event.responseSize != None:
+                span.set_attribute('popbill.response_size', Event.responseSize)
+
+
+def _describeConnect(span, conn):
+    if span.is_recording():
+        span.set_attribute('net.peer.name', conn.host)
+        for name in ('connectTime', 'tlsTime'):
+            value = getattr(conn, name, None)
+            if value != None:
+                span.set_attribute('popbill.' + name, value)
+
+
+def _decodeBody(response, body):
+    try:
+        return decompress(body, response.getheader('Content-Encoding'))
+    except (zlib.error, ValueError):
+        raise PopbillException(int(-99999999), 'UNEXPECTED EXCEPTION')
+
+
+def _checkResponseMode(mode):
+    if mode not in ('object', 'dict', 'raw'):
+        raise ValueError("unknown response mode : %r" % (mode,))
+
+
+class _TokenRefresh(object):
+    # 진행중인 토큰갱신. 같은 CorpNum 의 토큰을 요청한 스레드들이 결과를 함께 받는다.
+
+    def __init__(self):
+        self.__done = threading.Event()
+        self.__token = None
+        self.__error = None
+
+    def finish(self,token,error):
+        self.__token = token
+        self.__error = error
+        self.__done.set()
+
+    def result(self,timeout = None):
+        self.__done.wait(timeout)
+        if not self.__done.is_set():
+            raise PopbillException(int(-99999999), 'DEADLINE EXCEEDED')
+        if self.__error != None:
+            raise self.__error
+        return self.__token
+
+
+class JoinForm(PopbillModel):
+    __slots__ = ('LinkID', 'CorpNum', 'CorpName', 'CEOName', 'Addr', 'ZipCode', 'BizType',
+                 'BizClass', 'ContactName', 'ContactEmail', 'ContactTEL', 'ContactHP',
+                 'ContactFAX', 'ID', 'PWD')
 
 class File(object):
     def __init__(self,**kwargs):
         self.__dict__ = kwargs
 
+    @classmethod
+    def fromPath(cls,fieldName,FilePath):
+        """ 디스크의 파일로 첨부파일 생성. 파일 내용은 전송할 때 읽는다.
+            args
+                fieldName : multipart 필드명
+                FilePath : 파일경로
+            raise
+                IOError (파일이 없거나 읽을 수 없는 경우)
+        """
+        # 열 수 있는지 미리 확인하고 Content-Length 계산에 쓸 크기를 구한다.
+        with open(FilePath,"rb") as F:
+            F.seek(0, 2)
+            size = F.tell()
+        return cls(fieldName=fieldName, fileName=FilePath, filePath=FilePath, fileSize=size)
+
+    @classmethod
+    def fromSource(cls,fieldName,Source):
+        """ 첨부파일 생성. 메모리의 내용은 복사하지 않고 전송할 때 그대로 읽는다.
+            args
+                fieldName : multipart 필드명
+                Source : 파일경로(str 또는 os.PathLike), name 속성이 있는 읽기 가능한 file 객체,
+                         또는 (파일명, 내용) tuple.
+                         내용은 bytes, bytearray, memoryview, 읽기 가능한 file 객체 중 하나.
+            raise
+                IOError (파일경로의 파일이 없거나 읽을 수 없는 경우)
+                PopbillException
+        """
+        if hasattr(Source, '__fspath__'):
+            # pathlib.Path 등. __fspath__ 는 Python 3.6 부터 있으므로 os.fspath 도 있다.
+            Source = os.fspath(Source)
+            if isinstance(Source, bytes):
+                Source = os.fsdecode(Source)
+        if isinstance(Source, _stringTypes):
+            return cls.fromPath(fieldName, Source)
+
+        if isinstance(Source, tuple) and len(Source) == 2:
+            fileName, data = Source
+        else:
+            fileName, data = getattr(Source, 'name', None), Source
+
+        if not (isinstance(data, (bytes, bytearray, memoryview)) or hasattr(data, 'read')):
+            raise PopbillException(-99999999,"첨부파일은 파일경로, file 객체, (파일명, 내용) 중 하나로 입력해야 합니다.")
+        if not isinstance(fileName, _stringTypes) or fileName == '':
+            raise PopbillException(-99999999,"첨부파일명이 입력되지 않았습니다.")
+
+        return cls(fieldName=fieldName, fileName=fileName, fileData=data)
+
 
 class PopbillException(Exception):
     def __init__(self,code,message):
@@ -337,27 +1050,68 @@ class PopbillException(Exception):
 
 class JsonObject(object):
     def __init__(self,dic):
-        try:
-            d = dic.__dict__
-        except AttributeError :
-            d = dic._asdict()
+        if isinstance(dic, dict):
+            d = dic
+        else:
+            try:
+                d = dic.__dict__
+            except AttributeError :
+                d = dic._asdict()
 
         self.__dict__.update(d)
 
+    @classmethod
+    def _fromDict(cls,d):
+        # 디코딩한 dict 를 복사없이 그대로 속성 저장소로 사용한다.
+        obj = cls.__new__(cls)
+        obj.__dict__ = d
+        return obj
+
     def __getattr__(self,name):
         return None
 
 
+class JsonDict(dict):
+    """ 'dict' 응답형식에서 최상위 JSON 객체를 디코딩한 dict. 하위 객체는 일반 dict 이다.
+        그대로 dict 로 사용할 수 있고, 서비스 메소드가 응답필드를 꺼낼 수 있도록 속성접근도 허용한다.
+    """
+    def __getattr__(self,name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return self.get(name)
+
+
+class RawResponse(bytes):
+    """ 'raw' 응답형식에서 반환하는 응답 bytes.
+        속성에 접근할 때만 디코딩하므로 응답을 그대로 전달하는 경우에는 파싱비용이 없다.
+    """
+    def __getattr__(self,name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        try:
+            parsed = self.__dict__['_parsed']
+        except KeyError:
+            parsed = self.__dict__['_parsed'] = Utils.json2obj(bytes(self))
+        return getattr(parsed, name)
+
+
 class PopbillEncoder(JSONEncoder):
     def default(self, o):
-        return o.__dict__
+        return toJson(o)
 
 
 class Utils:
-    @staticmethod
-    def _json_object_hook(d): return JsonObject(namedtuple('JsonObject', d.keys())(*d.values()))
+    # JSON 객체마다 namedtuple 클래스를 새로 만들지 않고 디코딩된 dict 를 바로 감싼다.
+    _json_object_hook = staticmethod(JsonObject._fromDict)
 
     @staticmethod
     def json2obj(data):
-        if(type(data) is bytes): data = data.decode()
-        return json.loads(data, object_hook=Utils._json_object_hook)
+        return getBackend().loads(data, Utils._json_object_hook)
+
+    @staticmethod
+    def json2dict(data):
+        # hook 없이 디코딩하고, 서비스 메소드가 필드를 꺼내는 최상위 객체만 JsonDict 로 바꾼다.
+        result = getBackend().loads(data)
+        if type(result) is dict:
+            result = JsonDict(result)
+        return result
@@ -8,7 +8,7 @@
 # Written : 2015-03-24
 # Thanks for your interest.
 
-from .base import PopbillBase,PopbillException
+from .base import PopbillBase,PopbillException,PopbillModel
 
 class CashbillService(PopbillBase):
     """ 팝빌 현금영수증 API Service Implementation. """
@@ -20,7 +20,7 @@ class CashbillService(PopbillBase):
                 SecretKeye 링크허브에서 발급받은 비밀키(SecretKey)
         """
 
-        super(self.__class__,self).__init__(LinkID,SecretKey)
+        super(CashbillService,self).__init__(LinkID,SecretKey)
         self._addScope("140")
 
     def getURL(self, CorpNum, UserID, ToGo):
@@ -217,7 +217,7 @@ class CashbillService(PopbillBase):
        
         postData = self._stringtify(MgtKeyList)
 
-        return self._httppost('/Cashbill/States',postData,CorpNum)
+        return self._httppost('/Cashbill/States',postData,CorpNum,Idempotent = True)
 
     def getDetailInfo(self, CorpNum, MgtKey):
         """ 상세정보 조회
@@ -417,10 +417,13 @@ class CashbillService(PopbillBase):
 
         postData = self._stringtify(MgtKeyList)
 
-        result = self._httppost('/Cashbill/Prints', postData, CorpNum, UserID)
+        result = self._httppost('/Cashbill/Prints', postData, CorpNum, UserID, Idempotent = True)
 
         return result.url
 
-class Cashbill(object):
-    def __init__(self,**kwargs):
-        self.__dict__ = kwargs
\ No newline at end of file
+class Cashbill(PopbillModel):
+    __slots__ = ('mgtKey', 'orgConfirmNum', 'tradeType', 'tradeUsage', 'taxationType',
+                 'supplyCost', 'tax', 'serviceFee', 'totalAmount', 'franchiseCorpNum',
+                 'franchiseCorpName', 'franchiseCEOName', 'franchiseAddr', 'franchiseTEL',
+                 'identityNum', 'customerName', 'itemName', 'orderNumber', 'email', 'hp', 'fax',
+                 'smssendYN')
\ No newline at end of file
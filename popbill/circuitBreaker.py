@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill circuit breaker. It watches the error rate and latency
+# of recent API calls and fails fast while the Popbill endpoint is degraded.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import threading
+from collections import deque
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+
+class CircuitBreaker(object):
+    """ API 호출 circuit breaker.
+
+        CLOSED    : 정상 상태. 최근 windowSize 건의 호출 중 실패율이 failureRateThreshold
+                    이상이거나, slowCallThreshold 초 이상 걸린 호출 비율이
+                    slowCallRateThreshold 이상이면 OPEN 으로 전환한다.
+                    판단은 최소 minimumCalls 건이 쌓인 후에 한다.
+        OPEN      : 호출을 보내지 않고 즉시 실패시킨다. openTimeout 초가 지나면 HALF_OPEN.
+        HALF_OPEN : halfOpenCalls 건의 시험 호출만 허용한다. 모두 성공하면 CLOSED,
+                    하나라도 실패하면 다시 OPEN 으로 전환한다.
+    """
+
+    CLOSED = 'CLOSED'
+    OPEN = 'OPEN'
+    HALF_OPEN = 'HALF_OPEN'
+
+    def __init__(self, failureRateThreshold=0.5, slowCallThreshold=None, slowCallRateThreshold=0.8,
+                 windowSize=20, minimumCalls=10, openTimeout=30, halfOpenCalls=1):
+        """ 생성자.
+            args
+                failureRateThreshold : OPEN 으로 전환할 실패율 (0 ~ 1)
+                slowCallThreshold : 느린 호출로 판단할 소요시간(초), None 이면 지연은 보지 않는다.
+                slowCallRateThreshold : OPEN 으로 전환할 느린 호출 비율 (0 ~ 1)
+                windowSize : 실패율을 계산할 최근 호출 건수
+                minimumCalls : 판단에 필요한 최소 호출 건수
+                openTimeout : OPEN 상태 유지시간(초)
+                halfOpenCalls : HALF_OPEN 상태에서 허용할 시험 호출 건수
+        """
+        self.failureRateThreshold = failureRateThreshold
+        self.slowCallThreshold = slowCallThreshold
+        self.slowCallRateThreshold = slowCallRateThreshold
+        self.windowSize = windowSize
+        self.minimumCalls = minimumCalls
+        self.openTimeout = openTimeout
+        self.halfOpenCalls = halfOpenCalls
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._window = deque(maxlen=windowSize)
+        self._openedAt = None
+        self._probes = 0
+        self._probeSuccesses = 0
+        self._rejected = 0
+
+    @property
+    def state(self):
+        """ 현재 상태 (CLOSED, OPEN, HALF_OPEN) """
+        with self._lock:
+            self._checkOpenTimeout()
+            return self._state
+
+    def allowRequest(self):
+        """ 호출 허용 여부. False 이면 호출하지 않고 즉시 실패시켜야 한다. """
+        with self._lock:
+            self._checkOpenTimeout()
+
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.HALF_OPEN and self._probes < self.halfOpenCalls:
+                self._probes += 1
+                return True
+
+            self._rejected += 1
+            return False
+
+    def record(self, success, elapsed):
+        """ 호출 결과 기록
+            args
+                success : 성공 여부
+                elapsed : 소요시간(초)
+        """
+        slow = self.slowCallThreshold != None and elapsed >= self.slowCallThreshold
+
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                if not success or slow:
+                    self._open()
+                else:
+                    self._probeSuccesses += 1
+                    if self._probeSuccesses >= self.halfOpenCalls:
+                        self._close()
+                return
+
+            if self._state == self.OPEN:
+                # OPEN 되기 전에 시작한 호출의 결과. 판단에 반영하지 않는다.
+                return
+
+            self._window.append((success, slow))
+
+            calls = len(self._window)
+            if calls < self.minimumCalls:
+                return
+
+            failures = sum(1 for s, _ in self._window if not s)
+            slows = sum(1 for _, sl in self._window if sl)
+
+            if float(failures) / calls >= self.failureRateThreshold or \
+               (self.slowCallThreshold != None and float(slows) / calls >= self.slowCallRateThreshold):
+                self._open()
+
+    def ignore(self):
+        """ 결과를 판단에 반영하지 않는 호출 기록.
+            커넥션 풀 대기시간 초과, 호출 제한시간 초과처럼 팝빌 서버와 무관하게 끝난 호출에 사용한다.
+            HALF_OPEN 상태에서는 시험 호출 기회를 돌려준다.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > self._probeSuccesses:
+                self._probes -= 1
+
+    def reset(self):
+        """ CLOSED 상태로 초기화한다. """
+        with self._lock:
+            self._close()
+
+    def stats(self):
+        """ 현황
+            return
+                dict of (state, calls, failures, slowCalls, rejected)
+        """
+        with self._lock:
+            self._checkOpenTimeout()
+            return {"state": self._state,
+                    "calls": len(self._window),
+                    "failures": sum(1 for s, _ in self._window if not s),
+                    "slowCalls": sum(1 for _, sl in self._window if sl),
+                    "rejected": self._rejected}
+
+    def _checkOpenTimeout(self):
+        if self._state == self.OPEN and monotonic() - self._openedAt >= self.openTimeout:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+            self._probeSuccesses = 0
+
+    def _open(self):
+        self._state = self.OPEN
+        self._openedAt = monotonic()
+        self._window.clear()
+
+    def _close(self):
+        self._state = self.CLOSED
+        self._openedAt = None
+        self._window.clear()
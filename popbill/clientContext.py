@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill shared client context. Services attached to the same
+# context share one connection pool and one session token per CorpNum,
+# requested with the union of the services' scopes.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import threading
+
+from .tokenCache import TokenCache
+
+
+class ClientContext(object):
+    """ 서비스간 공유 상태.
+
+        서비스마다 하나씩 만들어지며, useContext() 로 여러 서비스가 같은 객체를 사용하면
+        커넥션 풀, 토큰 캐시, 서버 시계를 공유한다.
+        토큰은 참여한 모든 서비스의 scope 를 합쳐 발급하므로 CorpNum 별로 하나만 발급된다.
+    """
+
+    def __init__(self, timeOut=60, tokenCacheSize=10000):
+        """ 생성자.
+            args
+                timeOut : 유휴 커넥션 유지시간(초)
+                tokenCacheSize : 토큰 캐시 최대 CorpNum 수, None 이면 제한없음
+        """
+        self.timeOut = timeOut
+        self.linkID = None
+        self.scopes = ["member"]
+
+        self.tokenCache = TokenCache(tokenCacheSize)
+        self.tokenLock = threading.Lock()
+        self.tokenRefreshes = {}
+        self.tokenGenerations = 0
+        self.clock = None
+
+        self.pool = None
+        self.poolLock = threading.Lock()
+
+        # AsyncPopbillBase 용. 이벤트루프에 묶여 있다.
+        self.asyncLoop = None
+        self.asyncPool = None
+        self.asyncTokenRefreshes = {}
+
+    def close(self):
+        """ 커넥션 풀을 닫는다. 이후 요청시 새 풀을 만든다. """
+        with self.poolLock:
+            pool, self.pool = self.pool, None
+        if pool != None:
+            pool.close()
+
+        asyncPool, self.asyncPool = self.asyncPool, None
+        if asyncPool != None:
+            loop = self.asyncLoop
+            if loop != None and loop.is_running():
+                # 풀은 이벤트루프에 묶여 있으므로 그 루프에서 닫는다.
+                loop.call_soon_threadsafe(loop.create_task, asyncPool.close())
+            else:
+                asyncPool.terminate()
+
+    def countGeneration(self):
+        """ linkhub 토큰 발급 횟수 기록 """
+        with self.tokenLock:
+            self.tokenGenerations += 1
+
+    def addScopes(self, scopes):
+        """ scope 추가. 새로운 scope 가 있으면 기존 토큰으로는 호출할 수 없으므로 토큰 캐시를 비운다. """
+        with self.tokenLock:
+            added = [scope for scope in scopes if scope not in self.scopes]
+            if not added:
+                return False
+            self.scopes = self.scopes + added
+
+        self.tokenCache.clear()
+        return True
@@ -8,7 +8,7 @@
 # Written : 2015-07-16
 # Thanks for your interest.
 
-from .base import PopbillBase,PopbillException
+from .base import PopbillBase,PopbillException,PopbillModel
 
 class ClosedownService(PopbillBase):
     """ 팝빌 휴폐업조회 API Service Implementation. """
@@ -20,7 +20,7 @@ class ClosedownService(PopbillBase):
                 SecretKeye 링크허브에서 발급받은 비밀키(SecretKey)
         """
 
-        super(self.__class__,self).__init__(LinkID,SecretKey)
+        super(ClosedownService,self).__init__(LinkID,SecretKey)
         self._addScope("170")
 
     def getUnitCost(self, CorpNum):
@@ -72,8 +72,7 @@ class ClosedownService(PopbillBase):
        
         postData = self._stringtify(CorpNumList)
 
-        return self._httppost('/CloseDown',postData,MemberCorpNum)
+        return self._httppost('/CloseDown',postData,MemberCorpNum,Idempotent = True)
 
-class CorpState(object):
-    def __init__(self,**kwargs):
-        self.__dict__ = kwargs
\ No newline at end of file
+class CorpState(PopbillModel):
+    __slots__ = ('corpNum', 'type', 'state', 'stateDate', 'checkDate')
\ No newline at end of file
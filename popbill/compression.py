@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill HTTP body compression. It gzip/deflate encodes large
+# request bodies and decodes compressed responses.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import zlib
+
+# 응답 압축 요청시 보내는 Accept-Encoding 값
+AcceptEncoding = 'gzip, deflate'
+
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def compress(data, encoding, level=6):
+    """ 요청 본문 압축
+        args
+            data : 압축할 bytes
+            encoding : 'gzip' 또는 'deflate'
+            level : 압축 수준 (1 ~ 9)
+        return
+            압축된 bytes
+    """
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+        return compressor.compress(data) + compressor.flush()
+    if encoding == 'deflate':
+        return zlib.compress(data, level)
+    raise ValueError("unsupported content encoding : %r" % (encoding,))
+
+
+def decompress(data, encoding):
+    """ 응답 본문 압축해제
+        args
+            data : 응답 bytes
+            encoding : 응답의 Content-Encoding 헤더값, 없으면 None
+        return
+            압축해제된 bytes
+    """
+    if not encoding or not data:
+        return data
+
+    encoding = encoding.strip().lower()
+    if encoding == 'identity':
+        return data
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompress(data, _GZIP_WBITS)
+    if encoding == 'deflate':
+        # zlib 헤더 없이 raw deflate 로 보내는 서버도 있다.
+        try:
+            return zlib.decompress(data)
+        except zlib.error:
+            return zlib.decompress(data, -zlib.MAX_WBITS)
+    raise ValueError("unsupported content encoding : %r" % (encoding,))
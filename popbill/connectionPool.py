@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill HTTPS connection pool. It keeps a bounded set of
+# keep-alive connections to the Popbill API host so that several threads
+# can have requests in flight at once.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import select
+import socket
+import threading
+from time import time as stime
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+try:
+    import http.client as httpclient
+except ImportError:
+    import httplib as httpclient
+
+
+class ConnectionPoolTimeout(Exception):
+    """ 제한시간 내에 커넥션을 확보하지 못한 경우 발생. """
+    pass
+
+
+def keepAliveTimeout(response):
+    """ 응답의 Keep-Alive 헤더에서 서버측 유휴 커넥션 유지시간(초)을 구한다.
+        args
+            response : HTTP 응답
+        return
+            유지시간 by float, 헤더가 없으면 None
+    """
+    header = response.getheader('Keep-Alive')
+    if not header:
+        return None
+    for param in header.split(','):
+        name, _, value = param.strip().partition('=')
+        if name.strip().lower() == 'timeout':
+            try:
+                return float(value.strip())
+            except ValueError:
+                return None
+    return None
+
+
+class PopbillHTTPSConnection(httpclient.HTTPSConnection):
+    """ 연결 제한시간과 읽기 제한시간을 따로 지정하는 HTTPSConnection.
+
+        connectTimeout 은 TCP 연결과 TLS handshake 에, readTimeout 은 연결 이후의
+        소켓 송수신 각각에 적용된다. None 이면 제한하지 않는다.
+        마지막 연결의 TCP 연결, TLS handshake 소요시간(초)을 connectTime, tlsTime 에 기록한다.
+    """
+
+    def __init__(self, host, connectTimeout=None, readTimeout=None):
+        httpclient.HTTPSConnection.__init__(self, host, timeout=connectTimeout)
+        self.readTimeout = readTimeout
+        self.connectTime = None
+        self.tlsTime = None
+
+        createConnection = self._create_connection
+        def timedCreateConnection(*args, **kwargs):
+            started = monotonic()
+            try:
+                return createConnection(*args, **kwargs)
+            finally:
+                self.connectTime = monotonic() - started
+        self._create_connection = timedCreateConnection
+
+    def setTimeouts(self, connectTimeout, readTimeout):
+        self.timeout = connectTimeout
+        self.readTimeout = readTimeout
+        if self.sock != None:
+            self.sock.settimeout(readTimeout)
+
+    def connect(self):
+        started = monotonic()
+        self.connectTime = self.tlsTime = None
+        httpclient.HTTPSConnection.connect(self)
+        if self.connectTime != None:
+            self.tlsTime = monotonic() - started - self.connectTime
+        self.sock.settimeout(self.readTimeout)
+
+
+class PopbillHTTPConnection(httpclient.HTTPConnection):
+    """ PopbillHTTPSConnection 의 평문 HTTP 버전. 로컬 대역 서버(ex. MockPopbillServer) 연결에 사용한다.
+
+        마지막 연결의 TCP 연결 소요시간(초)을 connectTime 에 기록한다.
+    """
+
+    def __init__(self, host, connectTimeout=None, readTimeout=None):
+        httpclient.HTTPConnection.__init__(self, host, timeout=connectTimeout)
+        self.readTimeout = readTimeout
+        self.connectTime = None
+        self.tlsTime = None
+
+    def setTimeouts(self, connectTimeout, readTimeout):
+        self.timeout = connectTimeout
+        self.readTimeout = readTimeout
+        if self.sock != None:
+            self.sock.settimeout(readTimeout)
+
+    def connect(self):
+        started = monotonic()
+        self.connectTime = None
+        httpclient.HTTPConnection.connect(self)
+        self.connectTime = monotonic() - started
+        self.sock.settimeout(self.readTimeout)
+
+
+def _readable(fileno):
+    # select 는 1024 이상의 fd 를 다루지 못하므로 poll 을 우선 사용한다.
+    if hasattr(select, 'poll'):
+        poller = select.poll()
+        poller.register(fileno, select.POLLIN | select.POLLPRI)
+        return bool(poller.poll(0))
+    try:
+        readable, _, _ = select.select([fileno], [], [], 0)
+    except ValueError:
+        # 확인할 수 없는 fd 는 살아있는 것으로 보고, 요청이 실패하면 재시도 정책에 맡긴다.
+        return False
+    return bool(readable)
+
+
+class PooledConnection(object):
+    """ 커넥션 풀에서 관리하는 단일 커넥션. """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.createdAt = stime()
+        self.lastUsedAt = self.createdAt
+        self.keepAliveTimeout = None
+
+    def isExpired(self, now, idleTimeout, maxAge):
+        idle = now - self.lastUsedAt
+        if idleTimeout != None and idle >= idleTimeout:
+            return True
+        # 서버가 알려준 유지시간이 지났다면 이미 서버쪽에서 닫혔을 것이다.
+        if self.keepAliveTimeout != None and idle >= self.keepAliveTimeout:
+            return True
+        if maxAge != None and now - self.createdAt >= maxAge:
+            return True
+        return False
+
+    def isAlive(self):
+        """ 재사용 전 소켓 상태 확인. 유휴 소켓이 읽기 가능하다면 서버가 연결을 닫은 것이다. """
+        sock = getattr(self.conn, 'sock', None)
+        if sock == None:
+            # 아직 연결되지 않았거나 이미 닫힌 커넥션. 다음 요청시 연결된다.
+            return True
+        try:
+            fileno = sock.fileno()
+        except (ValueError, OSError, socket.error):
+            return False
+        if fileno < 0:
+            return False
+        try:
+            return not _readable(fileno)
+        except (select.error, OSError):
+            return False
+
+    def close(self):
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool(object):
+    """ 스레드 안전한 HTTPS 커넥션 풀.
+
+        커넥션은 checkout 으로 대여하고 checkin 으로 반납한다. 대여중인 커넥션과
+        유휴 커넥션을 합쳐 maxSize 개를 넘지 않으며, 모두 대여중이면 반납될 때까지
+        대기한다.
+
+        커넥션 재사용 여부는 keep-alive 상태로 결정한다. 서버가 Connection: close 로
+        응답했거나, 마지막 사용 이후 유휴시간(또는 서버가 Keep-Alive 헤더로 알려준
+        유지시간)이 지났거나, 재사용 직전 확인에서 소켓이 닫혀 있으면 폐기한다.
+    """
+
+    def __init__(self, host, maxSize=10, idleTimeout=60, maxAge=None, connectionFactory=None):
+        """ 생성자.
+            args
+                host : 접속할 호스트
+                maxSize : 최대 커넥션 개수
+                idleTimeout : 마지막 사용 이후 유휴 커넥션을 폐기하기까지의 시간(초)
+                maxAge : 커넥션 최대 사용시간(초), None 이면 제한없음
+                connectionFactory : host 를 인자로 커넥션을 생성하는 함수
+        """
+        if maxSize < 1:
+            raise ValueError("maxSize must be at least 1")
+
+        self.host = host
+        self.maxSize = maxSize
+        self.idleTimeout = idleTimeout
+        self.maxAge = maxAge
+        self._factory = connectionFactory or httpclient.HTTPSConnection
+        self._idle = []
+        self._inUse = 0
+        self._cond = threading.Condition(threading.Lock())
+        self._closed = False
+        self._created = 0
+        self._reused = 0
+        self._stale = 0
+
+    def checkout(self, timeout=None):
+        """ 커넥션 대여
+            args
+                timeout : 최대 대기시간(초), None 이면 무한대기
+            return
+                PooledConnection
+            raise
+                ConnectionPoolTimeout
+        """
+        deadline = None if timeout == None else stime() + timeout
+        stale = []
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise ValueError("connection pool is closed")
+
+                self._evictIdle(stale)
+
+                if self._idle:
+                    # 가장 최근에 사용한 커넥션을 우선 재사용한다.
+                    pooled = self._idle.pop()
+                    self._inUse += 1
+                    break
+
+                if self._inUse < self.maxSize:
+                    pooled = None
+                    self._inUse += 1
+                    break
+
+                if deadline == None:
+                    self._cond.wait()
+                else:
+                    remaining = deadline - stime()
+                    if remaining <= 0:
+                        raise ConnectionPoolTimeout("no connection available within %s seconds" % timeout)
+                    self._cond.wait(remaining)
+
+        for s in stale:
+            s.close()
+
+        if pooled != None and not pooled.isAlive():
+            # 서버가 닫은 커넥션은 요청을 보내보기 전에 걸러낸다.
+            pooled.close()
+            pooled = None
+            with self._cond:
+                self._stale += 1
+
+        if pooled == None:
+            try:
+                pooled = PooledConnection(self._factory(self.host))
+            except Exception:
+                self._release()
+                raise
+            with self._cond:
+                self._created += 1
+        else:
+            with self._cond:
+                self._reused += 1
+
+        return pooled
+
+    def checkin(self, pooled, reusable=True, response=None):
+        """ 커넥션 반납
+            args
+                pooled : checkout 으로 대여한 커넥션
+                reusable : False 이면 커넥션을 닫고 폐기한다.
+                response : 마지막 응답. Connection, Keep-Alive 헤더로 재사용 여부를 판단한다.
+        """
+        now = stime()
+        pooled.lastUsedAt = now
+
+        if response != None:
+            if response.will_close:
+                reusable = False
+            else:
+                pooled.keepAliveTimeout = keepAliveTimeout(response)
+
+        if reusable and self.maxAge != None and now - pooled.createdAt >= self.maxAge:
+            reusable = False
+
+        with self._cond:
+            self._inUse -= 1
+            if reusable and not self._closed:
+                self._idle.append(pooled)
+                pooled = None
+            self._cond.notify()
+
+        if pooled != None:
+            pooled.close()
+
+    def discard(self, pooled):
+        """ 대여한 커넥션을 닫고 폐기한다. """
+        self.checkin(pooled, reusable=False)
+
+    def clear(self):
+        """ 유휴 커넥션을 모두 닫는다. 대여중인 커넥션은 반납시 재사용된다. """
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            pooled.close()
+
+    def close(self):
+        """ 풀을 닫는다. 이후 반납되는 커넥션은 모두 폐기된다. """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.clear()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def stats(self):
+        """ 풀 현황
+            return
+                dict of (idle, inUse, maxSize, created, reused, stale)
+        """
+        with self._cond:
+            return {"idle": len(self._idle), "inUse": self._inUse, "maxSize": self.maxSize,
+                    "created": self._created, "reused": self._reused, "stale": self._stale}
+
+    def _release(self):
+        with self._cond:
+            self._inUse -= 1
+            self._cond.notify()
+
+    def _evictIdle(self, stale):
+        # lock 을 잡은 상태에서 호출된다. 닫는 작업은 lock 밖에서 수행한다.
+        if not self._idle:
+            return
+        now = stime()
+        keep = []
+        for pooled in self._idle:
+            if pooled.isExpired(now, self.idleTimeout, self.maxAge):
+                stale.append(pooled)
+            else:
+                keep.append(pooled)
+        self._idle = keep
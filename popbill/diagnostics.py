@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill call diagnostics. SlowCallLog logs API calls that take
+# longer than a threshold with their payload and timing breakdown, and
+# CallProfiler profiles a sample of public service method calls.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import cProfile
+import logging
+import pstats
+import threading
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+from .jsonBackend import getBackend
+
+# 네트워크 단계. total 에서 이 단계들을 뺀 나머지를 클라이언트 처리시간(client)으로 본다.
+_networkTimings = ('token', 'poolWait', 'connect', 'tls', 'send', 'serverWait', 'read', 'backoff')
+
+
+def countItems(payload):
+    """ 요청 본문의 항목 수. 목록이면 길이, 객체이면 가장 긴 목록 값의 길이(수신자, 관리번호 등)이다.
+        args
+            payload : JSON 요청 본문
+        return
+            항목 수, 본문이 없거나 JSON 이 아니면 None
+    """
+    if not payload:
+        return None
+    try:
+        data = getBackend().loads(payload)
+    except ValueError:
+        return None
+
+    if isinstance(data, list):
+        return len(data)
+    if isinstance(data, dict):
+        lengths = [len(value) for value in data.values() if isinstance(value, list)]
+        return max(lengths) if lengths else 1
+    return None
+
+
+def clientTime(event):
+    """ 호출 전체 시간 중 네트워크 단계를 제외한 클라이언트 처리시간(초). (응답 해석, multipart 구성 등) """
+    total = event.timings.get('total')
+    if total == None:
+        return None
+    return max(total - sum(event.timings.get(name, 0) for name in _networkTimings), 0)
+
+
+class SlowCallLog(object):
+    """ 느린 API 호출 기록.
+
+        PopbillBase.SlowCallLog 에 지정하면 threshold 초 이상 걸린 호출을 endpoint, 요청/응답 크기,
+        항목 수(수신자, 관리번호 등), 단계별 소요시간과 함께 logger 로 기록한다.
+        기록 내용은 log record 의 popbill 속성(dict)으로도 전달된다.
+    """
+
+    def __init__(self, threshold=1.0, logger=None, level=logging.WARNING):
+        """ 생성자.
+            args
+                threshold : 느린 호출 기준시간(초)
+                logger : 기록할 logger, None 이면 'popbill' logger
+                level : 기록 level
+        """
+        self.threshold = threshold
+        self.logger = logger if logger != None else logging.getLogger('popbill')
+        self.level = level
+
+    def check(self, event):
+        """ 호출이 끝난 RequestEvent 를 검사해 기준시간 이상 걸렸으면 기록한다. """
+        total = event.timings.get('total')
+        if total != None and total >= self.threshold:
+            self.log(event)
+
+    def log(self, event):
+        info = self.describe(event)
+        timings = ' '.join('%s=%.3f' % (name, seconds) for name, seconds in sorted(info['timings'].items()))
+        self.logger.log(self.level, "slow popbill call %s %s %s %.3fs status=%s attempts=%d "
+                                    "requestSize=%s responseSize=%s items=%s %s",
+                        info['service'], info['action'], info['endpoint'], info['total'], info['status'],
+                        info['attempts'], info['requestSize'], info['responseSize'], info['items'], timings,
+                        extra={'popbill': info})
+
+    def describe(self, event):
+        """ 기록할 호출 정보
+            return
+                dict of (service, action, endpoint, corpNum, total, status, attempts, requestSize,
+                         responseSize, items, timings, error)
+        """
+        timings = dict(event.timings)
+        client = clientTime(event)
+        if client != None:
+            timings['client'] = client
+
+        return {"service": event.service, "action": event.action or event.method, "endpoint": event.endpoint,
+                "corpNum": event.corpNum, "total": timings.get('total', 0), "status": event.status,
+                "attempts": event.attempts, "requestSize": event.requestSize, "responseSize": event.responseSize,
+                "items": countItems(event.payload), "timings": timings, "error": event.error}
+
+
+class ProfileSample(object):
+    """ profile 한 호출 1건. stats 는 pstats.Stats 이다. """
+    __slots__ = ('name', 'duration', 'stats')
+
+    def __init__(self, name, duration, stats):
+        self.name = name
+        self.duration = duration
+        self.stats = stats
+
+    def format(self, sortBy='cumulative', limit=30):
+        """ 소요시간 상위 함수 목록 문자열 """
+        stream = StringIO()
+        self.stats.stream = stream
+        self.stats.sort_stats(sortBy).print_stats(limit)
+        return stream.getvalue()
+
+    def __repr__(self):
+        return "<ProfileSample %s %.3fs>" % (self.name, self.duration)
+
+
+class CallProfiler(object):
+    """ 공개 서비스 메소드 호출 표본 profile.
+
+        PopbillBase.Profiler 에 지정하면 sampleRate 번 호출마다 한번 호출 전체를 cProfile 로 측정해
+        ProfileSample 을 callback 에 넘긴다. JSON 변환(PopbillEncoder, json2obj), multipart 구성 등
+        클라이언트에서 소비한 시간을 함수 단위로 볼 수 있다.
+        callback 을 지정하지 않으면 'popbill.profile' logger 에 소요시간 상위 함수 목록을 기록한다.
+        asyncio 서비스는 다른 task 의 실행이 섞이므로 profile 하지 않는다.
+    """
+
+    def __init__(self, sampleRate=100, callback=None, sortBy='cumulative', limit=30):
+        """ 생성자.
+            args
+                sampleRate : 표본 주기. N 이면 N 번 호출마다 한번 profile 한다.
+                callback : ProfileSample 을 인자로 호출할 함수
+                sortBy, limit : 기본 callback 의 함수 목록 정렬기준과 개수
+        """
+        self.sampleRate = sampleRate
+        self.callback = callback
+        self.sortBy = sortBy
+        self.limit = limit
+
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._local = threading.local()
+
+    def shouldSample(self):
+        """ 이번 호출을 profile 할지 여부 """
+        with self._lock:
+            self._calls += 1
+            return self._calls % self.sampleRate == 0
+
+    def run(self, name, func, *args, **kwargs):
+        """ func 을 profile 하며 실행한다. 이미 profile 중인 호출 안에서 불린 메소드는 그대로 실행한다. """
+        if getattr(self._local, 'active', False):
+            return func(*args, **kwargs)
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 다른 profiler 가 동작중이다.
+            return func(*args, **kwargs)
+
+        self._local.active = True
+        started = monotonic()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            duration = monotonic() - started
+            self._local.active = False
+            self._report(ProfileSample(name, duration, pstats.Stats(profile)))
+
+    def _report(self, sample):
+        try:
+            if self.callback != None:
+                self.callback(sample)
+            else:
+                logger = logging.getLogger('popbill.profile')
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("profiled popbill call %s %.3fs\n%s", sample.name, sample.duration,
+                                sample.format(self.sortBy, self.limit))
+        except Exception:
+            # profile 결과 처리 오류는 API 호출에 영향을 주지 않는다.
+            pass
@@ -8,7 +8,7 @@
 # Written : 2015-01-21
 # Thanks for your interest. 
 from datetime import datetime
-from .base import PopbillBase,PopbillException,File
+from .base import PopbillBase,PopbillException,File,PopbillModel
 
 class FaxService(PopbillBase):
     """ 팝빌 팩스 API Service Implementation. """
@@ -19,7 +19,7 @@ class FaxService(PopbillBase):
                 LinkID : 링크허브에서 발급받은 링크아이디(LinkID)
                 SecretKeye 링크허브에서 발급받은 비밀키(SecretKey)
         """
-        super(self.__class__,self).__init__(LinkID,SecretKey)
+        super(FaxService,self).__init__(LinkID,SecretKey)
         self._addScope("160")
         
     def getURL(self, CorpNum, UserID, ToGo):
@@ -88,7 +88,7 @@ class FaxService(PopbillBase):
                 SenderNum : 발신자 번호 
                 ReceiverNum : 수신자 번호
                 ReceiverName : 수신자 명 
-                FilePath : 발신 파일경로 
+                FilePath : 발신 파일. 파일경로, file 객체 또는 (파일명, 내용) tuple. 최대 5개의 목록도 가능
                 ReserveDT : 예약시간(형식 yyyyMMddHHmmss)
                 UserID : 팝빌회원 아이디
             return
@@ -109,7 +109,7 @@ class FaxService(PopbillBase):
                 CorpNum : 팝빌회원 사업자번호
                 SenderNum : 발신자 번호 (동보전송용)
                 Receiver : 수신자 번호(동보전송용)
-                FilePath : 발신 파일경로 
+                FilePath : 발신 파일. 파일경로, file 객체 또는 (파일명, 내용) tuple. 최대 5개의 목록도 가능
                 ReserveDT : 예약시간(형식 yyyyMMddHHmmss)
                 UserID : 팝빌회원 아이디
             return
@@ -126,12 +126,12 @@ class FaxService(PopbillBase):
             raise PopbillException(-99999999,"'Receiver' argument type error. 'FaxReceiver' or List of 'FaxReceiver'.")
         if FilePath == None :
             raise PopbillException(-99999999,"발신 파일경로가 입력되지 않았습니다.")
-        if not (type(FilePath) is str or type(FilePath) is list) :
-            raise PopbillException(-99999999,"발신 파일은 파일경로 또는 경로목록만 입력 가능합니다.")
-        if type(FilePath) is list and (len(FilePath) < 1 or len(FilePath) > 5) :
+        if not type(FilePath) is list :
+            FilePath = [FilePath]
+        if len(FilePath) < 1 or len(FilePath) > 5 :
             raise PopbillException(-99999999,"파일은 1개 이상, 5개 까지 전송 가능합니다.")
 
-        req = {"snd" : SenderNum , "fCnt": 1 if type(FilePath) is str else len(FilePath) , "rcvs" : [] , "sndDT" : None}
+        req = {"snd" : SenderNum , "fCnt": len(FilePath) , "rcvs" : [] , "sndDT" : None}
 
         if(type(Receiver) is str):        
             Receiver = FaxReceiver(receiveNum=Receiver)
@@ -147,24 +147,21 @@ class FaxService(PopbillBase):
 
         postData = self._stringtify(req)
 
-        if(type(FilePath) is str):
-            FilePath = [FilePath]
-        
         files = []
 
         for filePath in FilePath:
-            with open(filePath,"rb") as f:
-                files.append(File(fieldName='file',
-                              fileName=f.name,
-                              fileData=f.read())
-                            )
+            files.append(File.fromSource('file',filePath))
                 
         result = self._httppost_files('/FAX',postData,files,CorpNum,UserID)
 
         return result.receiptNum
 
 
-class FaxReceiver(object):
-    def __init__(self,**kwargs):
-        self.__dict__ = dict.fromkeys(['receiveNum','receiveName'])
-        self.__dict__.update(kwargs)
\ No newline at end of file
+class FaxReceiver(PopbillModel):
+    __slots__ = ('receiveNum', 'receiveName')
+
+    def __init__(self,receiveNum=None,receiveName=None,**kwargs):
+        self.receiveNum = receiveNum
+        self.receiveName = receiveName
+        if kwargs:
+            self._assign(kwargs)
\ No newline at end of file
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill request instrumentation. Callbacks registered on
+# RequestHooks are told about every API call: which endpoint it hit, how
+# large the request and response were and where the time went.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+# endpoint 에 그대로 남기는 경로와 조회값. 목록에 없는 값은 관리번호, 접수번호 등 호출마다 바뀌는 값으로 보고
+# {} 로 바꾸므로 endpoint 종류(metric label 값)는 이 목록으로 제한된다.
+_routeSegments = frozenset(['Taxinvoice', 'Statement', 'Cashbill', 'FAX', 'Message', 'CloseDown', 'Join',
+                            'SELL', 'BUY', 'TRUSTEE', 'SMS', 'LMS', 'XMS', 'MMS',
+                            'Logs', 'Files', 'Cancel', 'UnitCost', 'EmailPublicKeys', 'Prints', 'States'])
+_routeParams = {'TG': frozenset(['LOGIN', 'CHRG', 'CERT', 'BOX', 'SBOX', 'PBOX', 'TBOX',
+                                 'POPUP', 'PRINT', 'EPRINT', 'MAIL']),
+                'cfg': frozenset(['UNITCOST', 'CERT']),
+                'Type': frozenset(['SMS', 'LMS', 'XMS', 'MMS'])}
+
+
+def endpointTemplate(url):
+    """ 요청 URL 에서 관리번호, 접수번호 등 호출마다 바뀌는 값을 {} 로 바꾼 endpoint.
+        ex) /Taxinvoice/SELL/20150101-01/Logs -> /Taxinvoice/SELL/{}/Logs
+            /CloseDown?CN=1234567890 -> /CloseDown?CN={}
+        팝빌 API 경로(SELL, Files 등)와 기능 지정 조회값(TG=POPUP 등)만 그대로 둔다.
+    """
+    path, _, query = url.partition('?')
+    segments = [s if s == '' or s in _routeSegments else '{}' for s in path.split('/')]
+    template = '/'.join(segments)
+
+    if query:
+        params = []
+        for param in query.split('&'):
+            name, sep, value = param.partition('=')
+            if sep and value not in _routeParams.get(name, ()):
+                value = '{}'
+            params.append(name + sep + value)
+        template += '?' + '&'.join(params)
+    return template
+
+
+class RequestEvent(object):
+    """ API 호출 1건의 정보.
+
+        timings 는 단계별 소요시간(초)이며 재시도한 경우 모든 시도의 합이다.
+            token      : 세션토큰 확보 (캐시에 없으면 linkhub 토큰발급 포함)
+            poolWait   : 커넥션 풀에서 커넥션을 빌리기까지 대기
+            connect    : TCP 연결
+            tls        : TLS handshake
+            send       : 요청 전송
+            serverWait : 요청 전송 완료부터 응답 헤더 수신까지
+            read       : 응답 본문 수신
+            backoff    : 재시도 전 대기
+            total      : 호출 전체
+        연결하지 않은 단계는 timings 에 없다.
+        payload 는 압축 전 JSON 요청 본문이며 GET 요청은 None 이다.
+    """
+    __slots__ = ('service', 'method', 'url', 'endpoint', 'action', 'corpNum', 'userID',
+                 'payload', 'requestSize', 'responseSize', 'status', 'attempts', 'reconnects',
+                 'timings', 'error', 'started')
+
+    def __init__(self, service, corpNum=None, userID=None):
+        self.service = service
+        self.method = None
+        self.url = None
+        self.endpoint = None
+        self.action = None
+        self.corpNum = corpNum
+        self.userID = userID
+        self.payload = None
+        self.requestSize = None
+        self.responseSize = None
+        self.status = None
+        self.attempts = 0
+        self.reconnects = 0
+        self.timings = {}
+        self.error = None
+        self.started = monotonic()
+
+    @property
+    def retries(self):
+        """ 재시도 횟수 """
+        return max(self.attempts - 1, 0)
+
+    def addTiming(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0) + seconds
+
+    def __repr__(self):
+        return "<RequestEvent %s %s %s status=%s attempts=%d>" % (self.service, self.method, self.endpoint,
+                                                                 self.status, self.attempts)
+
+
+class Stopwatch(object):
+    """ 요청 단계별 소요시간을 RequestEvent 에 기록한다. event 가 None 이면 기록하지 않는다. """
+    __slots__ = ('event', 'last')
+
+    def __init__(self, event):
+        self.event = event
+        self.last = monotonic()
+
+    def lap(self, name):
+        """ 직전 lap 이후 경과시간을 name 단계에 더한다. """
+        now = monotonic()
+        if self.event != None:
+            self.event.addTiming(name, now - self.last)
+        self.last = now
+
+    def split(self, names, durations):
+        """ 이미 측정된 단계별 소요시간을 더한다. (ex. 비동기 커넥션이 측정한 전송, 대기, 수신 시간) """
+        if self.event != None:
+            for name, seconds in zip(names, durations):
+                self.event.addTiming(name, seconds)
+        self.last = monotonic()
+
+    def connected(self, conn):
+        """ 새 커넥션 연결. 커넥션이 TCP 연결과 TLS handshake 시간을 따로 기록했으면 나눠서 더한다. """
+        now = monotonic()
+        event = self.event
+        if event != None:
+            event.reconnects += 1
+            connectTime = getattr(conn, 'connectTime', None)
+            tlsTime = getattr(conn, 'tlsTime', None)
+            if connectTime != None and tlsTime != None:
+                event.addTiming('connect', connectTime)
+                event.addTiming('tls', tlsTime)
+            else:
+                event.addTiming('connect', now - self.last)
+        self.last = now
+
+
+def describeRequest(event, method, url, body, headers):
+    """ 요청 정보를 RequestEvent 에 기록한다. """
+    event.method = method
+    event.url = url
+    event.endpoint = endpointTemplate(url)
+    event.action = headers.get("X-HTTP-Method-Override")
+    if body == None:
+        event.requestSize = 0
+    elif isinstance(body, bytes) or hasattr(body, 'read'):
+        event.requestSize = len(body)
+    else:
+        event.requestSize = len(body.encode('utf-8'))
+
+
+class RequestHooks(object):
+    """ API 호출 이벤트 callback.
+
+        PopbillBase.Hooks 에 지정하면 API 호출마다 RequestEvent 를 인자로 callback 을 호출한다.
+            beforeRequest : 세션토큰을 확보하고 요청을 보내기 직전
+            afterResponse : HTTP 응답을 받은 후 (팝빌 오류 응답 포함)
+            error         : 호출이 예외로 끝난 경우 (팝빌 오류 응답, 네트워크 오류 등). event.error 에 예외가 있다.
+        callback 에서 발생한 예외는 API 호출에 영향을 주지 않도록 무시한다.
+    """
+
+    def __init__(self):
+        self._beforeRequest = []
+        self._afterResponse = []
+        self._error = []
+
+    def onBeforeRequest(self, callback):
+        """ beforeRequest callback 등록. decorator 로도 사용할 수 있다. """
+        self._beforeRequest.append(callback)
+        return callback
+
+    def onAfterResponse(self, callback):
+        """ afterResponse callback 등록. decorator 로도 사용할 수 있다. """
+        self._afterResponse.append(callback)
+        return callback
+
+    def onError(self, callback):
+        """ error callback 등록. decorator 로도 사용할 수 있다. """
+        self._error.append(callback)
+        return callback
+
+    def beforeRequest(self, event):
+        self._fire(self._beforeRequest, event)
+
+    def afterResponse(self, event):
+        self._fire(self._afterResponse, event)
+
+    def error(self, event):
+        self._fire(self._error, event)
+
+    def _fire(self, callbacks, event):
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception:
+                pass
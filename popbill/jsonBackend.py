@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill JSON backend. It encodes request payloads and decodes
+# API responses with the fastest JSON library installed (orjson, ujson,
+# simplejson) and falls back to the standard json module.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import json
+
+from .model import PopbillModel
+
+
+def toJson(o):
+    """ JSON 기본형이 아닌 모델 객체(Taxinvoice, MessageReceiver 등)를 변환한다. PopbillEncoder.default 와 같다. """
+    if isinstance(o, PopbillModel):
+        return o._toDict()
+    return o.__dict__
+
+
+def _applyHook(value, hook):
+    # object_hook 을 지원하지 않는 라이브러리용. json 모듈과 같이 안쪽 객체부터 hook 을 적용한다.
+    if type(value) is dict:
+        for k, v in value.items():
+            if type(v) is dict or type(v) is list:
+                value[k] = _applyHook(v, hook)
+        return hook(value)
+    if type(value) is list:
+        return [_applyHook(v, hook) if type(v) is dict or type(v) is list else v for v in value]
+    return value
+
+
+class JsonBackend(object):
+    """ JSON 인코딩/디코딩 구현.
+
+        dumps 는 요청 본문으로 그대로 보낼 수 있는 str(ASCII) 또는 UTF-8 bytes 를 반환하고,
+        loads 는 hook 이 있으면 모든 JSON 객체(dict)에 hook 을 적용한 결과를 반환한다.
+    """
+    name = None
+
+    def dumps(self, obj):
+        raise NotImplementedError
+
+    def loads(self, data, hook=None):
+        raise NotImplementedError
+
+
+class StdlibBackend(JsonBackend):
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=toJson)
+
+    def loads(self, data, hook=None):
+        if type(data) is bytes: data = data.decode()
+        if hook == None:
+            return json.loads(data)
+        return json.loads(data, object_hook=hook)
+
+
+class SimplejsonBackend(JsonBackend):
+    name = 'simplejson'
+
+    def __init__(self):
+        import simplejson
+        self._json = simplejson
+
+    def dumps(self, obj):
+        return self._json.dumps(obj, default=toJson)
+
+    def loads(self, data, hook=None):
+        if type(data) is bytes: data = data.decode()
+        if hook == None:
+            return self._json.loads(data)
+        return self._json.loads(data, object_hook=hook)
+
+
+class UjsonBackend(JsonBackend):
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        # default 인자는 ujson 5.4 이상에서 지원한다.
+        ujson.dumps(None, default=toJson)
+        self._json = ujson
+
+    def dumps(self, obj):
+        return self._json.dumps(obj, default=toJson)
+
+    def loads(self, data, hook=None):
+        value = self._json.loads(data)
+        return value if hook == None else _applyHook(value, hook)
+
+
+class OrjsonBackend(JsonBackend):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._json = orjson
+
+    def dumps(self, obj):
+        # UTF-8 bytes 를 반환한다. 요청 본문으로 바로 보낼 수 있으므로 str 로 바꾸지 않는다.
+        return self._json.dumps(obj, default=toJson)
+
+    def loads(self, data, hook=None):
+        value = self._json.loads(data)
+        return value if hook == None else _applyHook(value, hook)
+
+
+_Backends = (('orjson', OrjsonBackend), ('ujson', UjsonBackend),
+             ('simplejson', SimplejsonBackend), ('json', StdlibBackend))
+
+_backend = None
+
+
+def selectBackend(name=None):
+    """ 사용할 JSON backend 지정
+        args
+            name : 'orjson', 'ujson', 'simplejson', 'json' 중 하나 또는 JsonBackend 객체.
+                   None 이면 설치된 것 중 가장 빠른 것을 사용한다.
+        return
+            선택된 JsonBackend
+        raise
+            ImportError (지정한 라이브러리가 없는 경우)
+    """
+    global _backend
+
+    if isinstance(name, JsonBackend):
+        _backend = name
+        return _backend
+
+    for backendName, backendClass in _Backends:
+        if name != None and name != backendName:
+            continue
+        try:
+            _backend = backendClass()
+        except (ImportError, TypeError):
+            if name != None:
+                raise ImportError("json backend %s is not available" % name)
+            continue
+        return _backend
+
+    raise ValueError("unknown json backend : %r" % (name,))
+
+
+def getBackend():
+    """ 현재 사용중인 JSON backend """
+    if _backend == None:
+        selectBackend()
+    return _backend
@@ -7,7 +7,7 @@
 # Author : John Yohan (yhjeong@linkhub.co.kr)
 # Written : 2015-03-20
 # Thanks for your interest.
-from .base import PopbillBase,PopbillException,File
+from .base import PopbillBase,PopbillException,File,PopbillModel
 
 class MessageService(PopbillBase):
     """ 팝빌 문자 API Service Implementation. """
@@ -18,7 +18,7 @@ class MessageService(PopbillBase):
                 LinkID : 링크허브에서 발급받은 링크아이디(LinkID)
                 SecretKeye 링크허브에서 발급받은 비밀키(SecretKey)
         """
-        super(self.__class__, self).__init__(LinkID,SecretKey)
+        super(MessageService,self).__init__(LinkID,SecretKey)
         self._addScope("150")
         self._addScope("151")
         self._addScope("152")
@@ -164,7 +164,7 @@ class MessageService(PopbillBase):
                 Subject : 장문 메시지 제목 (동보전송용)
                 Contents : 장문 문자 내용 (동보전송용)
                 Messages : 개별전송정보 배열
-                FilePath : 전송하고자 하는 파일 경로
+                FilePath : 전송하고자 하는 파일. 파일경로, file 객체 또는 (파일명, 내용) tuple
                 reserveDT : 예약전송시간 (형식. yyyyMMddHHmmss)
                 UserID : 팝빌회원 아이디
             return
@@ -192,10 +192,7 @@ class MessageService(PopbillBase):
 
         files = []
         try:
-            with open(FilePath,"rb") as F:
-                files = [File(fieldName='file',
-                              fileName=F.name,
-                              fileData=F.read())]
+            files = [File.fromSource('file',FilePath)]
         except IOError :
             raise PopbillException(-99999999,"해당경로에 파일이 없거나 읽을 수 없습니다.")
 
@@ -338,7 +335,14 @@ class MessageService(PopbillBase):
         
         return result.url
 
-class MessageReceiver(object):
-    def __init__(self,**kwargs):
-        self.__dict__ = dict.fromkeys(['snd','rcv','rcvnm','msg','sjt'])
-        self.__dict__.update(kwargs)
\ No newline at end of file
+class MessageReceiver(PopbillModel):
+    __slots__ = ('snd', 'rcv', 'rcvnm', 'msg', 'sjt')
+
+    def __init__(self,snd=None,rcv=None,rcvnm=None,msg=None,sjt=None,**kwargs):
+        self.snd = snd
+        self.rcv = rcv
+        self.rcvnm = rcvnm
+        self.msg = msg
+        self.sjt = sjt
+        if kwargs:
+            self._assign(kwargs)
\ No newline at end of file
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill metrics. It collects per-endpoint latency histograms,
+# call outcome counters, bytes in/out, token and connection pool figures
+# from the request hooks and renders them in the Prometheus text format.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import threading
+from bisect import bisect_left
+
+from .instrumentation import RequestHooks
+
+# 응답시간 histogram 기본 구간(초)
+DefaultBuckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = ['%s="%s"' % (name, _escape(value)) for name, value in zip(names, values)]
+    if extra != None:
+        pairs.append('%s="%s"' % extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return repr(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value)
+
+
+class _Histogram(object):
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, buckets, value):
+        index = bisect_left(buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsCollector(object):
+    """ API 호출 metric 수집.
+
+        install() 로 서비스에 RequestHooks callback 을 등록하고, render() 로 Prometheus
+        text exposition 형식(version 0.0.4)의 문자열을 만든다.
+
+        popbill_request_duration_seconds  : endpoint, action 별 응답시간 histogram
+        popbill_requests_total            : endpoint, action, 결과(success/error), 오류코드별 호출 수
+        popbill_request_bytes_total       : 요청 본문 전송량
+        popbill_response_bytes_total      : 응답 본문 수신량
+        popbill_request_retries_total     : 재시도 횟수
+        popbill_token_generations_total   : linkhub 토큰 발급 횟수
+        popbill_token_cache_*             : 토큰 캐시 현황
+        popbill_pool_connections          : 커넥션 풀 현황 (idle, inUse)
+    """
+
+    def __init__(self, buckets=DefaultBuckets):
+        """ 생성자.
+            args
+                buckets : 응답시간 histogram 구간(초), 오름차순
+        """
+        self.buckets = tuple(sorted(buckets))
+
+        self._lock = threading.Lock()
+        self._services = []
+        self._hooks = []
+        self._durations = {}
+        self._requests = {}
+        self._bytesOut = {}
+        self._bytesIn = {}
+        self._retries = {}
+
+    def install(self, *services):
+        """ 서비스의 API 호출을 수집한다. 서비스에 Hooks 가 없으면 새로 지정한다.
+            args
+                services : 수집할 서비스 객체
+        """
+        for service in services:
+            hooks = service.Hooks
+            if hooks == None:
+                hooks = service.Hooks = RequestHooks()
+
+            with self._lock:
+                if not any(s is service for s in self._services):
+                    self._services.append(service)
+                if any(h is hooks for h in self._hooks):
+                    continue
+                self._hooks.append(hooks)
+
+            hooks.onAfterResponse(self._afterResponse)
+            hooks.onError(self._error)
+
+    def observe(self, event, code=None):
+        """ API 호출 1건 기록
+            args
+                event : RequestEvent
+                code : 실패한 경우 오류코드 (PopbillException.code), 성공이면 None
+        """
+        key = (event.service, event.endpoint or '', event.action or event.method or '')
+        duration = event.timings.get('total')
+
+        with self._lock:
+            if duration != None:
+                histogram = self._durations.get(key)
+                if histogram == None:
+                    histogram = self._durations[key] = _Histogram(len(self.buckets))
+                histogram.observe(self.buckets, duration)
+
+            outcome = key + (('success', '0') if code == None else ('error', str(code)))
+            self._requests[outcome] = self._requests.get(outcome, 0) + 1
+
+            if event.requestSize:
+                self._bytesOut[key] = self._bytesOut.get(key, 0) + event.requestSize
+            if event.responseSize:
+                self._bytesIn[key] = self._bytesIn.get(key, 0) + event.responseSize
+            if event.retries:
+                self._retries[key] = self._retries.get(key, 0) + event.retries
+
+    def render(self):
+        """ Prometheus text exposition 형식 문자열 """
+        lines = []
+        requestLabels = ('service', 'endpoint', 'action')
+
+        with self._lock:
+            durations = sorted(self._durations.items())
+            requests = sorted(self._requests.items())
+            counters = [('popbill_request_bytes_total', "Request body bytes sent.", sorted(self._bytesOut.items())),
+                        ('popbill_response_bytes_total', "Response body bytes received.", sorted(self._bytesIn.items())),
+                        ('popbill_request_retries_total', "Request retries.", sorted(self._retries.items()))]
+            services = list(self._services)
+
+        self._header(lines, 'popbill_request_duration_seconds', "API call latency.", 'histogram')
+        for key, histogram in durations:
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram.counts):
+                cumulative += count
+                lines.append('popbill_request_duration_seconds_bucket%s %d'
+                             % (_labels(requestLabels, key, ('le', _number(float(bound)))), cumulative))
+            lines.append('popbill_request_duration_seconds_bucket%s %d'
+                         % (_labels(requestLabels, key, ('le', '+Inf')), histogram.count))
+            lines.append('popbill_request_duration_seconds_sum%s %s' % (_labels(requestLabels, key), _number(histogram.sum)))
+            lines.append('popbill_request_duration_seconds_count%s %d' % (_labels(requestLabels, key), histogram.count))
+
+        self._header(lines, 'popbill_requests_total', "API calls by outcome and Popbill error code.", 'counter')
+        for key, count in requests:
+            lines.append('popbill_requests_total%s %d' % (_labels(requestLabels + ('outcome', 'code'), key), count))
+
+        for name, help, items in counters:
+            self._header(lines, name, help, 'counter')
+            for key, value in items:
+                lines.append('%s%s %d' % (name, _labels(requestLabels, key), value))
+
+        self._renderServices(lines, services)
+        return '\n'.join(lines) + '\n'
+
+    def _renderServices(self, lines, services):
+        # context 를 공유하는 서비스는 한번만 출력한다.
+        contexts = []
+        for service in services:
+            context = service.getContext()
+            if not any(c is context for c, name in contexts):
+                contexts.append((context, type(service).__name__))
+
+        gauges = {'generations': [], 'size': [], 'hits': [], 'misses': [], 'evictions': [], 'pool': []}
+        for context, name in contexts:
+            labels = _labels(('service', 'linkID'), (name, context.linkID))
+            stats = context.tokenCache.stats()
+            gauges['generations'].append('popbill_token_generations_total%s %d' % (labels, context.tokenGenerations))
+            gauges['size'].append('popbill_token_cache_size%s %d' % (labels, stats['size']))
+            gauges['hits'].append('popbill_token_cache_hits_total%s %d' % (labels, stats['hits']))
+            gauges['misses'].append('popbill_token_cache_misses_total%s %d' % (labels, stats['misses']))
+            gauges['evictions'].append('popbill_token_cache_evictions_total%s %d' % (labels, stats['evictions']))
+
+            for pool in (context.pool, context.asyncPool):
+                if pool != None:
+                    poolStats = pool.stats()
+                    for state in ('idle', 'inUse'):
+                        gauges['pool'].append('popbill_pool_connections%s %d'
+                                              % (_labels(('service', 'linkID', 'host', 'state'),
+                                                         (name, context.linkID, pool.host, state)),
+                                                 poolStats[state]))
+
+        for key, name, help, kind in (
+                ('generations', 'popbill_token_generations_total', "Session tokens generated through linkhub.", 'counter'),
+                ('size', 'popbill_token_cache_size', "CorpNums in the token cache.", 'gauge'),
+                ('hits', 'popbill_token_cache_hits_total', "Token cache hits.", 'counter'),
+                ('misses', 'popbill_token_cache_misses_total', "Token cache misses.", 'counter'),
+                ('evictions', 'popbill_token_cache_evictions_total', "Token cache LRU evictions.", 'counter'),
+                ('pool', 'popbill_pool_connections', "Pooled connections by state.", 'gauge')):
+            self._header(lines, name, help, kind)
+            lines.extend(gauges[key])
+
+    def _header(self, lines, name, help, kind):
+        lines.append('# HELP %s %s' % (name, help))
+        lines.append('# TYPE %s %s' % (name, kind))
+
+    def _afterResponse(self, event):
+        # 오류 응답은 error callback 에서 오류코드와 함께 기록한다.
+        if event.status == 200:
+            self.observe(event)
+
+    def _error(self, event):
+        self.observe(event, getattr(event.error, 'code', -99999999))
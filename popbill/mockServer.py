@@ -0,0 +1,561 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill local mock server. It stands in for the Popbill API
+# and the Linkhub auth server on localhost, so that the SDK can be tested
+# and benchmarked offline with configurable latency, errors and drops.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import base64
+import hashlib
+import hmac
+import json
+import random
+import re
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+
+from .compression import decompress
+from .jsonBackend import toJson
+
+# 대역 서버 오류코드
+CODE_UNEXPECTED = -99999999
+CODE_AUTH_FAILED = -11000001
+CODE_INVALID_TOKEN = -11000002
+CODE_NOT_FOUND = -11000005
+CODE_DUPLICATED = -11000006
+CODE_BAD_REQUEST = -11000010
+
+_ServiceIDs = ('POPBILL', 'POPBILL_TEST')
+_MessageTypes = ('SMS', 'LMS', 'XMS', 'MMS')
+
+# 문서 서비스별 문서 식별 경로 길이. /Taxinvoice/SELL/KEY, /Statement/121/KEY, /Cashbill/KEY
+_DocumentServices = {'Taxinvoice': 2, 'Statement': 2, 'Cashbill': 1}
+
+# 문서 서비스별 "문서 없음" 오류코드. checkMgtKeyInUse 가 이 코드로 미사용을 판단한다.
+_NotFoundCodes = {'Taxinvoice': CODE_NOT_FOUND, 'Statement': -12000004, 'Cashbill': -14000003}
+
+# 처리 요청(X-HTTP-Method-Override)별 변경되는 문서 상태코드
+_ActionStates = {'SEND': 200, 'REQUEST': 200, 'ACCEPT': 300, 'ISSUE': 300, 'DENY': 400, 'REFUSE': 400,
+                 'CANCELSEND': 500, 'CANCELREQUEST': 500, 'CANCELISSUE': 600, 'CANCEL': 600}
+
+_TaxinvoiceKeyFields = (('SELL', 'invoicerMgtKey'), ('BUY', 'invoiceeMgtKey'), ('TRUSTEE', 'trusteeMgtKey'))
+
+
+class MockError(Exception):
+    """ 대역 서버의 팝빌 오류 응답 """
+
+    def __init__(self, status, code, message):
+        Exception.__init__(self, message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+def _now():
+    return datetime.now().strftime('%Y%m%d%H%M%S')
+
+
+def _parseMultipart(body, contentType):
+    # (form JSON, [(필드명, 파일명, 크기)])
+    match = re.search(r'boundary="?([^";]+)"?', contentType or '')
+    if match == None:
+        raise MockError(400, CODE_BAD_REQUEST, "multipart boundary 가 없습니다.")
+
+    form = None
+    files = []
+    for part in body.split(b'--' + match.group(1).encode('utf-8')):
+        head, sep, content = part.partition(b'\r\n\r\n')
+        if not sep:
+            continue
+        if content.endswith(b'\r\n'):
+            content = content[:-2]
+        disposition = head.decode('utf-8', 'replace')
+        name = re.search(r' name="([^"]*)"', disposition)
+        fileName = re.search(r'filename="([^"]*)"', disposition)
+        if fileName != None:
+            files.append((name.group(1) if name else None, fileName.group(1), len(content)))
+        elif name != None and name.group(1) == 'form':
+            form = content
+    return form, files
+
+
+class _MockHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    # keep-alive 커넥션을 유지한다.
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.mock._handle(self)
+
+    def do_POST(self):
+        self.server.mock._handle(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockPopbillServer(object):
+    """ 팝빌 API, 링크허브 인증 API 로컬 대역 서버.
+
+        세금계산서, 전자명세서, 현금영수증, 문자, 팩스, 휴폐업조회 API 와 토큰발급, 잔여포인트 API 를
+        localhost 의 HTTP 서버로 제공한다. 문서와 전송내역은 메모리에 저장되며 서버를 멈추면 사라진다.
+        attach() 로 서비스의 ServiceURL, AuthURL 을 이 서버로 지정한다.
+
+            server = MockPopbillServer(latency=0.05).start()
+            server.attach(taxinvoiceService)
+
+        장애 상황은 다음과 같이 만든다.
+            latency   : 응답 지연(초). (최소, 최대) 로 지정하면 그 사이의 임의 값
+            errorRate : 임의로 500 오류 응답을 보낼 확률
+            dropRate  : 임의로 응답 없이 연결을 끊을 확률
+            inject()  : 다음 요청들에 오류 응답, 연결 끊기를 순서대로 적용
+        credentials(LinkID: SecretKey) 를 지정하면 토큰발급 요청의 HMAC 서명을 검증한다.
+    """
+
+    UnitCost = 10
+    RemainPoint = 100000.0
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0, errorRate=0, dropRate=0, seed=None,
+                 credentials=None, tokenLifetime=3600):
+        """ 생성자.
+            args
+                host, port : 대기 주소. port 가 0 이면 사용 가능한 port 를 고른다.
+                latency : 응답 지연(초) 또는 (최소, 최대)
+                errorRate : 500 오류 응답 확률 (0 ~ 1)
+                dropRate : 연결 끊기 확률 (0 ~ 1)
+                seed : 지연, 장애 난수 seed
+                credentials : 토큰발급 서명을 검증할 {LinkID: SecretKey}, None 이면 검증하지 않는다.
+                tokenLifetime : 발급 토큰 유효시간(초)
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.errorRate = errorRate
+        self.dropRate = dropRate
+        self.credentials = credentials
+        self.tokenLifetime = tokenLifetime
+
+        # 휴폐업조회 결과. {사업자번호: (type, state, stateDate)}, 없으면 사업중
+        self.corpStates = {}
+        self.members = set()
+        self.requests = []
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._faults = []
+        self._tokens = {}
+        self._documents = {}
+        self._receipts = {}
+        self._sequence = 0
+        self._counts = {"requests": 0, "tokens": 0, "errors": 0, "drops": 0}
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """ 서버 주소 (ex. http://127.0.0.1:8000) """
+        return 'http://%s:%d' % (self.host, self.port)
+
+    def start(self):
+        """ 별도 스레드에서 서버를 시작한다. 자기 자신을 반환한다. """
+        self._server = _MockHTTPServer((self.host, self.port), _MockHandler)
+        self._server.mock = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """ 서버를 멈춘다. """
+        if self._server != None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        if self._server == None:
+            self.start()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.stop()
+        return False
+
+    def attach(self, *services):
+        """ 서비스가 이 서버에 접속하도록 ServiceURL, AuthURL 을 지정한다.
+            args
+                services : 서비스 객체
+        """
+        for service in services:
+            service.ServiceURL = self.url
+            service.AuthURL = self.url
+
+    def inject(self, fault, count=1):
+        """ 다음 count 개 요청에 장애를 적용한다.
+            args
+                fault : 'error' (500 오류 응답), 'drop' (응답 없이 연결 끊기),
+                        또는 (HTTP 상태코드, 오류코드, 오류메시지)
+                count : 적용할 요청 수
+        """
+        with self._lock:
+            self._faults.extend([fault] * count)
+
+    def stats(self):
+        """ 처리 현황
+            return
+                dict of (requests, tokens, errors, drops)
+        """
+        with self._lock:
+            return dict(self._counts)
+
+    def addDocument(self, CorpNum, document, MgtKeyType=None):
+        """ 미리 등록된 문서를 만든다. (ex. 기존 문서를 조회하는 테스트)
+            args
+                CorpNum : 회원 사업자번호
+                document : Taxinvoice, Statement, Cashbill 객체 또는 dict
+                MgtKeyType : 세금계산서 관리번호 유형, None 이면 관리번호 필드로 정한다.
+        """
+        payload = json.loads(json.dumps(document, default=toJson))
+        if 'invoicerMgtKey' in payload or 'invoiceeMgtKey' in payload or 'trusteeMgtKey' in payload:
+            service = 'Taxinvoice'
+        elif 'itemCode' in payload:
+            service = 'Statement'
+        else:
+            service = 'Cashbill'
+
+        with self._lock:
+            self.members.add(CorpNum)
+            self._register(service, payload, CorpNum, MgtKeyType)
+
+    def _handle(self, handler):
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length) if length else b''
+        action = handler.headers.get('X-HTTP-Method-Override')
+
+        with self._lock:
+            self.requests.append((handler.command, handler.path, action))
+            self._counts["requests"] += 1
+            fault = self._faults.pop(0) if self._faults else None
+            if fault == None and self.dropRate and self._random.random() < self.dropRate:
+                fault = 'drop'
+            if fault == None and self.errorRate and self._random.random() < self.errorRate:
+                fault = 'error'
+            delay = self.latency
+            if isinstance(delay, (tuple, list)):
+                delay = self._random.uniform(delay[0], delay[1])
+
+        if delay:
+            time.sleep(delay)
+
+        if fault == 'drop':
+            with self._lock:
+                self._counts["drops"] += 1
+            handler.close_connection = True
+            try:
+                handler.connection.shutdown(socket.SHUT_RDWR)
+            except (socket.error, OSError):
+                pass
+            return
+
+        try:
+            if fault == 'error':
+                raise MockError(500, CODE_UNEXPECTED, "MOCK SERVER ERROR")
+            if fault != None:
+                raise MockError(*fault)
+            status, result = 200, self._route(handler, body, action)
+        except MockError as E:
+            with self._lock:
+                self._counts["errors"] += 1
+            status, result = E.status, {"code": E.code, "message": E.message}
+
+        if isinstance(result, bytes):
+            self._send(handler, status, result, 'text/plain')
+        else:
+            self._send(handler, status, json.dumps(result).encode('utf-8'), 'application/json; charset=utf-8')
+
+    def _send(self, handler, status, payload, contentType):
+        handler.send_response(status)
+        handler.send_header('Content-Type', contentType)
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def _route(self, handler, body, action):
+        parsed = urlparse(handler.path)
+        segments = [s for s in parsed.path.split('/') if s]
+        query = parsed.query
+        method = handler.command
+        body = decompress(body, handler.headers.get('Content-Encoding'))
+
+        # 링크허브 인증 API
+        if segments == ['Time'] and method == 'GET':
+            return datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ').encode('utf-8')
+        if segments and segments[0] in _ServiceIDs:
+            return self._linkhub(handler, method, segments, query, body)
+
+        # 팝빌 API
+        payload, files = None, []
+        contentType = handler.headers.get('Content-Type') or ''
+        if contentType.startswith('multipart/form-data'):
+            form, files = _parseMultipart(body, contentType)
+            payload = json.loads(form.decode('utf-8')) if form else None
+        elif body:
+            try:
+                payload = json.loads(body.decode('utf-8'))
+            except ValueError:
+                raise MockError(400, CODE_BAD_REQUEST, "요청 본문이 JSON 형식이 아닙니다.")
+
+        if segments == ['Join']:
+            return self._join(method, query, payload)
+
+        # 토큰을 발급받은 사업자번호
+        corpNum = self._token(handler)
+
+        if (method == 'GET' and 'TG=' in query) or (method == 'POST' and (query == 'Print' or segments[-1:] == ['Prints'])):
+            return {"url": "https://popbill.mock/%s?%s" % ('/'.join(segments), query or 'TG=PRINT')}
+        if query == 'cfg=UNITCOST' or segments[-1:] == ['UnitCost']:
+            return {"unitCost": str(self.UnitCost)}
+        if query == 'cfg=CERT':
+            return {"certificateExpiration": (datetime.now() + timedelta(days=365)).strftime('%Y%m%d%H%M%S')}
+        if segments == ['Taxinvoice', 'EmailPublicKeys']:
+            return []
+
+        service = segments[0] if segments else ''
+        if service in _DocumentServices:
+            return self._document(method, service, segments, query, action, payload, files, corpNum)
+        if service in _MessageTypes or service == 'FAX' and method == 'POST':
+            return self._sendRequest(service, payload, corpNum)
+        if service in ('Message', 'FAX') and len(segments) >= 2:
+            return self._receipt(segments, corpNum)
+        if service == 'CloseDown':
+            if method == 'POST':
+                return [self._corpState(CorpNum) for CorpNum in payload or []]
+            return self._corpState(parse_qs(query).get('CN', [''])[0])
+
+        raise MockError(404, CODE_BAD_REQUEST, "지원하지 않는 API 입니다. %s %s" % (method, handler.path))
+
+    def _linkhub(self, handler, method, segments, query, body):
+        serviceID = segments[0]
+        if segments[1:] == ['Token'] and method == 'POST':
+            return self._issueToken(handler, serviceID, body)
+
+        self._token(handler)
+        if segments[1:] in (['Point'], ['PartnerPoint']):
+            return {"remainPoint": self.RemainPoint}
+        if segments[1:] == ['URL']:
+            return {"url": "https://popbill.mock/Partner?%s" % query}
+        raise MockError(404, CODE_BAD_REQUEST, "지원하지 않는 API 입니다.")
+
+    def _issueToken(self, handler, serviceID, body):
+        authorization = (handler.headers.get('Authorization') or '').split(' ')
+        if len(authorization) != 3 or authorization[0] != 'LINKHUB':
+            raise MockError(401, CODE_AUTH_FAILED, "인증정보가 올바르지 않습니다.")
+        linkID, signature = authorization[1], authorization[2]
+
+        if self.credentials != None:
+            secretKey = self.credentials.get(linkID)
+            if secretKey == None or signature != self._signature(handler, secretKey, body):
+                raise MockError(401, CODE_AUTH_FAILED, "링크아이디 또는 비밀키가 올바르지 않습니다.")
+
+        request = json.loads(body.decode('utf-8'))
+        sessionToken = uuid.uuid4().hex
+        expiration = datetime.utcnow() + timedelta(seconds=self.tokenLifetime)
+        with self._lock:
+            self._tokens[sessionToken] = (request.get("access_id"), time.time() + self.tokenLifetime)
+            self._counts["tokens"] += 1
+            if request.get("access_id"):
+                self.members.add(request.get("access_id"))
+
+        return {"session_token": sessionToken, "serviceID": serviceID, "linkID": linkID,
+                "usercode": request.get("access_id"), "ipaddress": handler.client_address[0],
+                "expiration": expiration.strftime('%Y-%m-%dT%H:%M:%S.000Z'), "scope": request.get("scope")}
+
+    def _signature(self, handler, secretKey, body):
+        # linkhub 모듈과 같은 방식으로 계산한 HMAC-SHA256 서명
+        target = "POST\n" + base64.b64encode(hashlib.sha256(body).digest()).decode('utf-8') + "\n"
+        target += handler.headers.get('x-lh-date', '') + "\n"
+        forwarded = handler.headers.get('x-lh-forwarded')
+        if forwarded != None:
+            target += forwarded + "\n"
+        target += handler.headers.get('x-lh-version', '') + "\n" + urlparse(handler.path).path
+        digest = hmac.new(base64.b64decode(secretKey.encode('utf-8')), target.encode('utf-8'), hashlib.sha256).digest()
+        return base64.b64encode(digest).decode('utf-8')
+
+    def _token(self, handler):
+        authorization = handler.headers.get('Authorization') or ''
+        if not authorization.startswith('Bearer '):
+            raise MockError(401, CODE_INVALID_TOKEN, "토큰이 없습니다.")
+        with self._lock:
+            entry = self._tokens.get(authorization[7:])
+        if entry == None or time.time() >= entry[1]:
+            raise MockError(401, CODE_INVALID_TOKEN, "토큰이 유효하지 않거나 만료되었습니다.")
+        return entry[0]
+
+    def _join(self, method, query, payload):
+        if method == 'GET':
+            CorpNum = parse_qs(query).get('CorpNum', [''])[0]
+            with self._lock:
+                member = CorpNum in self.members
+            if member:
+                return {"code": 1, "message": "가입"}
+            return {"code": 0, "message": "미가입"}
+
+        CorpNum = (payload or {}).get('CorpNum')
+        with self._lock:
+            if CorpNum in self.members:
+                raise MockError(400, CODE_DUPLICATED, "이미 가입된 사업자번호입니다.")
+            self.members.add(CorpNum)
+        return {"code": 1, "message": "회원가입 완료"}
+
+    def _nextNumber(self):
+        # 잠금을 잡은 상태에서 호출된다. 18자리 접수번호, 문서번호
+        self._sequence += 1
+        return _now() + '%04d' % (self._sequence % 10000)
+
+    def _document(self, method, service, segments, query, action, payload, files, corpNum):
+        size = _DocumentServices[service]
+        docID = '/'.join(segments[1:1 + size])
+        rest = segments[1 + size:]
+
+        with self._lock:
+            if len(segments) == 1 and method == 'POST':
+                return self._register(service, payload, corpNum)
+            if method == 'POST' and (segments[1:] == ['States'] if service == 'Cashbill' else len(segments) == 2):
+                # 목록 상태조회 (getInfos). /Taxinvoice/SELL, /Statement/121, /Cashbill/States
+                prefix = '' if service == 'Cashbill' else segments[1] + '/'
+                keys = [prefix + key for key in payload or []]
+                return [self._documents[(corpNum, service, key)]['info']
+                        for key in keys if (corpNum, service, key) in self._documents]
+
+            document = self._documents.get((corpNum, service, docID))
+            if document == None:
+                raise MockError(400, _NotFoundCodes[service], "해당 관리번호의 문서가 존재하지 않습니다.")
+
+            if method == 'GET':
+                if rest == ['Logs']:
+                    return document['logs']
+                if rest == ['Files']:
+                    return document['files']
+                if query == 'Detail':
+                    return dict(document['detail'], **document['info'])
+                return document['info']
+
+            if rest[:1] == ['Files']:
+                if len(rest) == 1:
+                    for fieldName, fileName, size in files:
+                        fileID = uuid.uuid4().hex
+                        document['files'].append({"serialNum": len(document['files']) + 1, "attachedFile": fileID,
+                                                  "displayName": fileName, "regDT": _now()})
+                elif action == 'DELETE':
+                    document['files'] = [f for f in document['files'] if f['attachedFile'] != rest[1]]
+                return {"code": 1, "message": "처리 완료"}
+
+            if action == 'DELETE':
+                del self._documents[(corpNum, service, docID)]
+            elif action == 'PATCH':
+                document['detail'] = payload or {}
+            elif action in _ActionStates:
+                document['info']['stateCode'] = _ActionStates[action]
+                document['info']['stateDT'] = _now()
+            document['logs'].append({"docLogType": 1, "log": action, "procType": action,
+                                     "procCorpName": corpNum, "regDT": _now()})
+            return {"code": 1, "message": "처리 완료"}
+
+    def _register(self, service, payload, corpNum, MgtKeyType=None):
+        # 잠금을 잡은 상태에서 호출된다.
+        payload = payload or {}
+        if service == 'Taxinvoice':
+            keyName, key = next(((name, type + '/' + payload[name]) for type, name in _TaxinvoiceKeyFields
+                                 if payload.get(name) and MgtKeyType in (None, type)), (None, None))
+        elif service == 'Statement':
+            keyName, key = 'mgtKey', '%s/%s' % (payload.get('itemCode'), payload.get('mgtKey'))
+        else:
+            keyName, key = 'mgtKey', payload.get('mgtKey')
+
+        if not key or not payload.get(keyName):
+            raise MockError(400, CODE_BAD_REQUEST, "관리번호가 입력되지 않았습니다.")
+        if (corpNum, service, key) in self._documents:
+            raise MockError(400, CODE_DUPLICATED, "이미 사용중인 관리번호입니다.")
+
+        info = {"itemKey": self._nextNumber(), keyName: payload[keyName], "stateCode": 100,
+                "regDT": _now(), "stateDT": _now()}
+        if service == 'Statement':
+            info["itemCode"] = payload.get('itemCode')
+        self._documents[(corpNum, service, key)] = {"info": info, "detail": payload, "logs": [], "files": []}
+        return {"code": 1, "message": "등록 완료"}
+
+    def _sendRequest(self, service, payload, corpNum):
+        payload = payload or {}
+        if service == 'FAX':
+            receivers = [{"state": 1, "result": 0, "sendNum": payload.get("snd"), "receiveNum": r.get("rcv"),
+                          "receiveName": r.get("rcvnm")} for r in payload.get("rcvs") or []]
+        else:
+            receivers = [{"state": 1, "result": 0, "type": service, "sendnum": m.get("snd") or payload.get("snd"),
+                          "receiveNum": m.get("rcv"), "receiveName": m.get("rcvnm"),
+                          "content": m.get("msg") or payload.get("content")} for m in payload.get("msgs") or []]
+        if not receivers:
+            raise MockError(400, CODE_BAD_REQUEST, "수신자 정보가 입력되지 않았습니다.")
+
+        with self._lock:
+            receiptNum = self._nextNumber()
+            self._receipts[(corpNum, receiptNum)] = receivers
+        return {"receiptNum": receiptNum}
+
+    def _receipt(self, segments, corpNum):
+        with self._lock:
+            receivers = self._receipts.get((corpNum, segments[1]))
+            if receivers == None:
+                raise MockError(400, CODE_NOT_FOUND, "해당 접수번호의 전송내역이 존재하지 않습니다.")
+            if segments[2:] == ['Cancel']:
+                for receiver in receivers:
+                    receiver['state'] = 4
+                return {"code": 1, "message": "예약전송 취소 완료"}
+            return receivers
+
+    def _corpState(self, CorpNum):
+        type, state, stateDate = self.corpStates.get(CorpNum, ('1', '1', ''))
+        return {"corpNum": CorpNum, "type": type, "state": state, "stateDate": stateDate,
+                "checkDate": datetime.now().strftime('%Y%m%d')}
+
+
+def main(argv=None):
+    """ 대역 서버 단독 실행. ex) python -m popbill.mockServer --port 8000 --latency 0.05 """
+    from optparse import OptionParser
+
+    parser = OptionParser(usage="python -m popbill.mockServer [options]")
+    parser.add_option('--host', default='127.0.0.1')
+    parser.add_option('--port', type='int', default=8000)
+    parser.add_option('--latency', type='float', default=0, help="응답 지연(초)")
+    parser.add_option('--error-rate', dest='errorRate', type='float', default=0, help="500 오류 응답 확률")
+    parser.add_option('--drop-rate', dest='dropRate', type='float', default=0, help="연결 끊기 확률")
+    options, args = parser.parse_args(argv)
+
+    server = MockPopbillServer(options.host, options.port, options.latency, options.errorRate, options.dropRate)
+    server.start()
+    print("Popbill mock server listening on %s (ServiceURL, AuthURL)" % server.url)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
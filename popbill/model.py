@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill request models. Model classes declare their fields in
+# __slots__ so that bulk requests (MessageReceiver, TaxinvoiceDetail, ...)
+# do not carry a dict per instance.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+
+# 모델 클래스별 (필드명, slot descriptor) 목록
+_fieldCache = {}
+# 모델 클래스별 선언 필드명 집합
+_nameCache = {}
+
+
+def _fieldsOf(cls):
+    try:
+        return _fieldCache[cls]
+    except KeyError:
+        pass
+
+    fields = []
+    for klass in reversed(cls.__mro__):
+        for name in klass.__dict__.get('__slots__', ()):
+            if name != '_extra':
+                fields.append((name, klass.__dict__[name]))
+
+    _fieldCache[cls] = fields = tuple(fields)
+    return fields
+
+
+def _namesOf(cls):
+    try:
+        return _nameCache[cls]
+    except KeyError:
+        pass
+
+    _nameCache[cls] = names = frozenset(name for name, field in _fieldsOf(cls))
+    return names
+
+
+class PopbillModel(object):
+    """ 요청 모델 기반 클래스.
+
+        하위 클래스는 __slots__ 에 필드를 선언한다. 선언하지 않은 필드는 생성자 인자로
+        전달할 수 있으며, 이 경우에만 별도 dict 를 만들어 보관한다. 생성 후에는
+        setExtra() 로 설정한다.
+        JSON 으로 변환할 때는 값을 설정한 필드만 포함한다.
+    """
+    __slots__ = ('_extra',)
+
+    def __init__(self, **kwargs):
+        if kwargs:
+            self._assign(kwargs)
+
+    def _assign(self, values):
+        names = _namesOf(type(self))
+        for name, value in values.items():
+            if name in names:
+                setattr(self, name, value)
+            else:
+                self.setExtra(name, value)
+
+    def setExtra(self, name, value):
+        """ 선언하지 않은 필드 설정
+            args
+                name : 필드명
+                value : 값
+        """
+        extra = getattr(self, '_extra', None)
+        if extra == None:
+            extra = self._extra = {}
+        extra[name] = value
+
+    def __getattr__(self, name):
+        # 선언한 필드는 slot 에서 먼저 찾으므로, 여기서는 선언하지 않은 필드만 찾는다.
+        if name != '_extra':
+            extra = getattr(self, '_extra', None)
+            if extra != None and name in extra:
+                return extra[name]
+        raise AttributeError(name)
+
+    def __getstate__(self):
+        return self._toDict()
+
+    def __setstate__(self, state):
+        self._assign(state)
+
+    def _toDict(self):
+        cls = type(self)
+        d = {}
+        for name, field in _fieldsOf(cls):
+            try:
+                d[name] = field.__get__(self, cls)
+            except AttributeError:
+                pass
+
+        extra = getattr(self, '_extra', None)
+        if extra != None:
+            d.update(extra)
+        return d
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill multipart/form-data request body. File parts are read
+# from disk or from caller supplied buffers and file objects in chunks while
+# the request is being sent, so the whole body is never assembled in memory.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import os
+import sys
+
+CRLF = '\r\n'
+
+# Python 2 의 str.join 과 httplib 는 memoryview 를 받지 않는다.
+_viewsAsBytes = sys.version_info < (3,)
+
+
+class MultipartError(Exception):
+    """ 전송 도중 첨부파일을 읽지 못한 경우 발생. """
+    pass
+
+
+class _FilePart(object):
+    # 디스크의 파일. 전송할 때 열어서 읽는다.
+
+    def __init__(self, path, size=None):
+        self.name = path
+        self.size = os.path.getsize(path) if size == None else size
+
+    def __len__(self):
+        return self.size
+
+    def open(self):
+        try:
+            return open(self.name, 'rb')
+        except (IOError, OSError) as E:
+            raise MultipartError("%s : %s" % (self.name, E))
+
+    def release(self, handle):
+        handle.close()
+
+
+class _StreamPart(object):
+    # 호출자가 넘긴 file 객체. 현재 위치부터 끝까지 전송하고, 닫지 않는다.
+
+    def __init__(self, stream):
+        self.name = getattr(stream, 'name', '<stream>')
+        self.stream = stream
+        self.start = stream.tell()
+        stream.seek(0, 2)
+        self.size = stream.tell() - self.start
+        stream.seek(self.start)
+
+    def __len__(self):
+        return self.size
+
+    def open(self):
+        self.stream.seek(self.start)
+        return self.stream
+
+    def release(self, handle):
+        pass
+
+
+def _dataPart(data):
+    # 첨부파일 내용을 복사하지 않고 전송할 수 있는 형태로 바꾼다.
+    if isinstance(data, bytes):
+        return data
+
+    if hasattr(data, 'read'):
+        try:
+            return _StreamPart(data)
+        except (AttributeError, IOError, OSError, ValueError):
+            # 위치를 옮길 수 없는 stream 은 크기를 미리 알 수 없으므로 한번에 읽는다.
+            return data.read()
+
+    view = memoryview(data)
+    if view.itemsize != 1 or view.ndim != 1 or not getattr(view, 'c_contiguous', True):
+        return view.tobytes()
+    return view
+
+
+class MultipartBody(object):
+    """ multipart/form-data 요청 본문.
+
+        Content-Length 를 미리 계산하고, read() 로 본문을 조금씩 돌려주는 file-like 객체이다.
+        HTTPConnection.request 에 그대로 넘기면 첨부파일을 chunk 단위로 읽어 전송한다.
+        재시도할 때는 seek(0) 으로 처음부터 다시 읽는다.
+    """
+
+    def __init__(self, boundary, postData, Files):
+        """ 생성자.
+            args
+                boundary : multipart boundary
+                postData : form 필드로 전송할 JSON 문자열, None 이면 생략
+                Files : File 목록. filePath(파일경로) 또는 fileData 를 가진다.
+                        fileData 는 bytes, bytearray, memoryview 또는 읽기 가능한 file 객체이다.
+        """
+        parts = []
+
+        if postData != None and postData != '':
+            parts.append((CRLF + '--' + boundary + CRLF +
+                          'Content-Disposition: form-data; name="form"' + CRLF + CRLF).encode('utf-8'))
+            parts.append(postData if isinstance(postData, bytes) else postData.encode('utf-8'))
+
+        for f in Files:
+            parts.append((CRLF + '--' + boundary + CRLF +
+                          'Content-Disposition: form-data; name="%s"; filename="%s"' % (f.fieldName, f.fileName) + CRLF +
+                          'Content-Type: Application/octet-stream' + CRLF + CRLF).encode('utf-8'))
+            filePath = getattr(f, 'filePath', None)
+            if filePath != None:
+                parts.append(_FilePart(filePath, getattr(f, 'fileSize', None)))
+            else:
+                parts.append(_dataPart(f.fileData))
+
+        parts.append((CRLF + '--' + boundary + '--' + CRLF + CRLF).encode('utf-8'))
+
+        self._parts = parts
+        self._length = sum(len(p) for p in parts)
+        self._index = 0
+        self._offset = 0
+        self._file = None
+
+    def __len__(self):
+        return self._length
+
+    def read(self, size=-1):
+        """ 최대 size 바이트를 읽는다. 끝에 도달하면 b'' 를 반환한다. """
+        if size == None or size < 0:
+            size = self._length
+
+        chunks = []
+        while size > 0 and self._index < len(self._parts):
+            part = self._parts[self._index]
+
+            if isinstance(part, (_FilePart, _StreamPart)):
+                if self._file == None:
+                    self._file = part.open()
+                try:
+                    data = self._file.read(min(size, len(part) - self._offset))
+                except (IOError, OSError, ValueError) as E:
+                    raise MultipartError("%s : %s" % (part.name, E))
+                if not data:
+                    # Content-Length 를 계산한 이후 파일이 바뀌었다.
+                    raise MultipartError("%s : file size changed while sending" % part.name)
+            else:
+                data = part[self._offset:self._offset + size]
+                if _viewsAsBytes and isinstance(data, memoryview):
+                    data = data.tobytes()
+
+            chunks.append(data)
+            self._offset += len(data)
+            size -= len(data)
+
+            if self._offset >= len(part):
+                self._closeFile()
+                self._index += 1
+                self._offset = 0
+
+        return chunks[0] if len(chunks) == 1 else b''.join(chunks)
+
+    def seek(self, offset, whence=0):
+        """ 처음으로 되돌린다. seek(0) 만 지원한다. """
+        if offset != 0 or whence != 0:
+            raise ValueError("MultipartBody can only be rewound to the beginning")
+        self._closeFile()
+        self._index = 0
+        self._offset = 0
+
+    def tell(self):
+        return sum(len(p) for p in self._parts[:self._index]) + self._offset
+
+    def close(self):
+        self._closeFile()
+
+    def _closeFile(self):
+        if self._file != None:
+            self._parts[self._index].release(self._file)
+            self._file = None
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill request retry policy. It decides which failed requests
+# may be replayed, how many times, and how long to wait between attempts.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import random
+import socket
+import ssl
+try:
+    import http.client as httpclient
+except ImportError:
+    import httplib as httpclient
+
+
+class RetryPolicy(object):
+    """ API 요청 재시도 정책.
+
+        재시도 가능한 에러(retryableErrors)가 발생했을 때 최대 maxAttempts 번까지
+        요청을 다시 보낸다. 재시도 사이에는 지수적으로 늘어나는 대기시간(backoff)에
+        jitter 를 적용해 기다린다.
+
+        요청이 서버에 전달된 뒤에 발생한 에러는 다시 보내도 안전한(멱등) 요청만
+        재시도한다. GET 요청과 호출부에서 멱등으로 표시한 조회성 POST(getInfos 등)가
+        이에 해당하며, ISSUE 같은 X-HTTP-Method-Override 처리나 문자/팩스 전송은
+        idempotentActions 에 지정하지 않는 한 재시도하지 않는다. 연결 단계에서 실패해
+        요청이 전달되지 않은 경우는 요청 종류와 상관없이 재시도한다.
+    """
+
+    def __init__(self, maxAttempts=3, backoff=0.1, maxBackoff=2.0, jitter=True,
+                 retryableErrors=(httpclient.HTTPException, socket.error),
+                 retryableStatuses=(502, 503, 504), idempotentActions=()):
+        """ 생성자.
+            args
+                maxAttempts : 최초 요청을 포함한 최대 시도횟수
+                backoff : 첫 재시도 전 대기시간(초), 이후 시도마다 2배씩 늘어난다.
+                maxBackoff : 최대 대기시간(초)
+                jitter : True 이면 0 ~ 대기시간 사이에서 임의로 기다린다.
+                retryableErrors : 재시도할 예외 클래스 tuple
+                retryableStatuses : 멱등 요청에 한해 재시도할 HTTP 응답코드
+                idempotentActions : 재시도해도 안전한 X-HTTP-Method-Override 값 (ex. 'PATCH')
+        """
+        if maxAttempts < 1:
+            raise ValueError("maxAttempts must be at least 1")
+
+        self.maxAttempts = maxAttempts
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+        self.jitter = jitter
+        self.retryableErrors = tuple(retryableErrors)
+        self.retryableStatuses = tuple(retryableStatuses)
+        self.idempotentActions = tuple(a.upper() for a in idempotentActions)
+
+    def isIdempotent(self, method, actionOverride=None, hint=False):
+        """ 요청을 다시 보내도 안전한지 여부
+            args
+                method : HTTP method
+                actionOverride : X-HTTP-Method-Override 값
+                hint : 호출부에서 멱등 요청으로 표시했는지 여부
+        """
+        if actionOverride != None:
+            return actionOverride.upper() in self.idempotentActions
+        return method == 'GET' or hint
+
+    def isRetryableError(self, error):
+        # 인증서 검증 실패는 다시 시도해도 같은 결과이다.
+        if isinstance(error, _CertificateErrors):
+            return False
+        return isinstance(error, self.retryableErrors)
+
+    def shouldRetry(self, attempt, error, replayable):
+        """ 에러 발생시 재시도 여부
+            args
+                attempt : 방금 실패한 시도 순번(1부터)
+                error : 발생한 예외
+                replayable : 요청이 멱등이거나 아직 서버에 전달되지 않았는지 여부
+        """
+        return attempt < self.maxAttempts and replayable and self.isRetryableError(error)
+
+    def shouldRetryStatus(self, attempt, status, idempotent):
+        """ 응답코드에 따른 재시도 여부 """
+        return attempt < self.maxAttempts and idempotent and status in self.retryableStatuses
+
+    def backoffTime(self, attempt):
+        """ attempt 번째 시도가 실패한 후 기다릴 시간(초) """
+        delay = min(self.maxBackoff, self.backoff * (2 ** (attempt - 1)))
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+
+_CertificateErrors = tuple(e for e in (getattr(ssl, 'CertificateError', None),
+                                       getattr(ssl, 'SSLCertVerificationError', None)) if e != None)
+
+# 재시도 하지 않는 정책
+NoRetry = RetryPolicy(maxAttempts=1)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill server clock estimation. It measures the skew between
+# the local clock and the Linkhub server clock once in a while, so that
+# token expiry can be checked locally without asking the server for its time.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import calendar
+import threading
+from time import strptime, time as stime
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+
+def parseTime(value):
+    """ 링크허브 시간 문자열(ex. 2016-05-31T10:30:00Z, 2016-05-31T10:30:00.000Z)을 epoch 초로 변환한다. """
+    if isinstance(value, bytes):
+        value = value.decode('utf-8')
+    return calendar.timegm(strptime(value.strip()[:19], '%Y-%m-%dT%H:%M:%S'))
+
+
+class ServerClock(object):
+    """ 서버 시계 추정.
+
+        syncInterval 초마다 한번 timeSource 로 서버 시간을 조회해 로컬 시계와의 차이(offset)를
+        구한다. 조회 요청의 왕복시간 중간 시점을 서버 시간으로 보며, 그 사이에는
+        로컬 시계에 offset 을 더해 서버 시간을 계산한다.
+    """
+
+    def __init__(self, timeSource, syncInterval=3600):
+        """ 생성자.
+            args
+                timeSource : 서버 시간 문자열을 반환하는 함수 (ex. linkhub.getTime)
+                syncInterval : 서버 시간 재조회 주기(초), None 이면 처음 한번만 조회한다.
+        """
+        self.timeSource = timeSource
+        self.syncInterval = syncInterval
+        self._lock = threading.Lock()
+        self._offset = None
+        self._syncedAt = None
+
+    def offset(self):
+        """ 서버 시계 - 로컬 시계 (초). 필요하면 서버 시간을 다시 조회한다. """
+        if self._needSync():
+            with self._lock:
+                if self._needSync():
+                    self.sync()
+        return self._offset
+
+    def now(self):
+        """ 추정한 현재 서버 시간 (epoch 초) """
+        return stime() + self.offset()
+
+    def sync(self):
+        """ 서버 시간을 조회해 offset 을 다시 구한다. """
+        started = stime()
+        serverTime = parseTime(self.timeSource())
+        finished = stime()
+
+        self._offset = serverTime - (started + finished) / 2.0
+        self._syncedAt = monotonic()
+
+    def _needSync(self):
+        if self._syncedAt == None:
+            return True
+        return self.syncInterval != None and monotonic() - self._syncedAt >= self.syncInterval
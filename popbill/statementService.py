@@ -7,7 +7,7 @@
 # Author : John Yohan (yhjeong@linkhub.co.kr)
 # Written : 2015-03-20
 # Thanks for your interest.
-from .base import PopbillBase,PopbillException,File
+from .base import PopbillBase,PopbillException,File,PopbillModel
 
 class StatementService(PopbillBase):
     """ 팝빌 전자명세서 API Service Implementation. """
@@ -18,7 +18,7 @@ class StatementService(PopbillBase):
                 LinkID : 링크허브에서 발급받은 링크아이디(LinkID)
                 SecretKeye 링크허브에서 발급받은 비밀키(SecretKey)
         """
-        super(self.__class__,self).__init__(LinkID,SecretKey)
+        super(StatementService,self).__init__(LinkID,SecretKey)
         self._addScope("121")
         self._addScope("122")
         self._addScope("123")
@@ -253,7 +253,7 @@ class StatementService(PopbillBase):
        
         postData = self._stringtify(MgtKeyList)
 
-        return self._httppost('/Statement/' + str(ItemCode),postData,CorpNum)
+        return self._httppost('/Statement/' + str(ItemCode),postData,CorpNum,Idempotent = True)
 
     def getDetailInfo(self, CorpNum, ItemCode, MgtKey):
         """ 전자명세서 상세정보 확인
@@ -386,7 +386,7 @@ class StatementService(PopbillBase):
                     [121 - 거래명세서], [122 - 청구서], [123 - 견적서],
                     [124 - 발주서], [125 - 입금표], [126 - 영수증]
                 MgtKey : 파트너 문서관리번호
-                FilePath : 첨부파일의 경로
+                FilePath : 첨부파일. 파일경로, file 객체 또는 (파일명, 내용) tuple
                 UserID : 팝빌 회원아이디
             return
                 처리결과. consist of code and message
@@ -401,10 +401,7 @@ class StatementService(PopbillBase):
         files = []
 
         try:
-            with open(FilePath,"rb") as F:
-                files = [File(fieldName='Filedata',
-                              fileName=F.name,
-                              fileData=F.read())]
+            files = [File.fromSource('Filedata',FilePath)]
         except IOError :
             raise PopbillException(-99999999,"해당경로에 파일이 없거나 읽을 수 없습니다.")
 
@@ -576,16 +573,23 @@ class StatementService(PopbillBase):
 
         postData = self._stringtify(MgtKeyList)
 
-        result = self._httppost('/Statement/' + str(ItemCode) + '?Print', postData, CorpNum, UserID)
+        result = self._httppost('/Statement/' + str(ItemCode) + '?Print', postData, CorpNum, UserID, Idempotent = True)
 
         return result.url
 
 
-class Statement(object):
-    def __init__(self,**kwargs):
-        self.__dict__ = kwargs
+class Statement(PopbillModel):
+    __slots__ = ('writeDate', 'purposeType', 'taxType', 'formCode', 'itemCode', 'mgtKey',
+                 'senderCorpNum', 'senderTaxRegID', 'senderCorpName', 'senderCEOName',
+                 'senderAddr', 'senderBizClass', 'senderBizType', 'senderContactName',
+                 'senderEmail', 'senderTEL', 'senderHP', 'receiverCorpNum', 'receiverTaxRegID',
+                 'receiverCorpName', 'receiverCEOName', 'receiverAddr', 'receiverBizClass',
+                 'receiverBizType', 'receiverContactName', 'receiverEmail', 'receiverTEL',
+                 'receiverHP', 'supplyCostTotal', 'taxTotal', 'totalAmount', 'serialNum',
+                 'remark1', 'remark2', 'remark3', 'businessLicenseYN', 'bankBookYN', 'detailList',
+                 'propertyBag')
 
 
-class StatementDetail(object):
-    def __init__(self,**kwargs):
-        self.__dict__ = kwargs
\ No newline at end of file
+class StatementDetail(PopbillModel):
+    __slots__ = ('serialNum', 'purchaseDT', 'itemName', 'spec', 'qty', 'unitCost', 'supplyCost',
+                 'tax', 'remark')
\ No newline at end of file
@@ -8,7 +8,7 @@
 # Written : 2015-01-21
 # Thanks for your interest. 
 from datetime import datetime
-from .base import PopbillBase,PopbillException,File
+from .base import PopbillBase,PopbillException,File,PopbillModel
 
 
 class TaxinvoiceService(PopbillBase):
@@ -22,7 +22,7 @@ class TaxinvoiceService(PopbillBase):
                 LinkID : 링크허브에서 발급받은 LinkID
                 SecretKey : 링크허브에서 발급받은 SecretKey
         """
-        super(self.__class__,self).__init__(LinkID,SecretKey)
+        super(TaxinvoiceService,self).__init__(LinkID,SecretKey)
         self._addScope("110")
         
     def getURL(self,CorpNum, UserID , ToGo):
@@ -558,7 +558,7 @@ class TaxinvoiceService(PopbillBase):
                 CorpNum : 회원 사업자 번호
                 MgtKeyType : 관리번호 유형 one of ['SELL','BUY','TRUSTEE']
                 MgtKey : 파트너 관리번호
-                FilePath : 첨부파일의 경로
+                FilePath : 첨부파일. 파일경로, file 객체 또는 (파일명, 내용) tuple
                 UserID : 팝빌 회원아이디
             return
                 처리결과. consist of code and message
@@ -574,10 +574,7 @@ class TaxinvoiceService(PopbillBase):
         
         files = []
         try:
-            with open(FilePath,"rb") as F:
-                files = [File(fieldName='Filedata',
-                              fileName=F.name,
-                              fileData=F.read())]
+            files = [File.fromSource('Filedata',FilePath)]
         except IOError :
             raise PopbillException(-99999999,"해당경로에 파일이 없거나 읽을 수 없습니다.")
 
@@ -724,7 +721,7 @@ class TaxinvoiceService(PopbillBase):
        
         postData = self._stringtify(MgtKeyList)
 
-        return self._httppost('/Taxinvoice/' + MgtKeyType ,postData,CorpNum)
+        return self._httppost('/Taxinvoice/' + MgtKeyType ,postData,CorpNum,Idempotent = True)
 
     def getMassPrintURL(self,CorpNum,MgtKeyType,MgtKeyList,UserID):
         """ 다량 인쇄 URL 확인
@@ -743,21 +740,30 @@ class TaxinvoiceService(PopbillBase):
        
         postData = self._stringtify(MgtKeyList)
 
-        Result = self._httppost('/Taxinvoice/' + MgtKeyType + "?Print" ,postData,CorpNum,UserID)
+        Result = self._httppost('/Taxinvoice/' + MgtKeyType + "?Print" ,postData,CorpNum,UserID,Idempotent = True)
 
         return Result.url
 
 
-class Taxinvoice(object):
-    def __init__(self,**kwargs):
-        self.__dict__ = kwargs
+class Taxinvoice(PopbillModel):
+    __slots__ = ('writeDate', 'chargeDirection', 'issueType', 'purposeType', 'taxType',
+                 'issueTiming', 'invoicerCorpNum', 'invoicerMgtKey', 'invoicerTaxRegID',
+                 'invoicerCorpName', 'invoicerCEOName', 'invoicerAddr', 'invoicerBizClass',
+                 'invoicerBizType', 'invoicerContactName', 'invoicerEmail', 'invoicerTEL',
+                 'invoicerHP', 'invoicerSMSSendYN', 'invoiceeType', 'invoiceeCorpNum',
+                 'invoiceeMgtKey', 'invoiceeTaxRegID', 'invoiceeCorpName', 'invoiceeCEOName',
+                 'invoiceeAddr', 'invoiceeBizClass', 'invoiceeBizType', 'invoiceeContactName1',
+                 'invoiceeEmail1', 'invoiceeTEL1', 'invoiceeHP1', 'invoiceeFAX1',
+                 'invoiceeSMSSendYN', 'supplyCostTotal', 'taxTotal', 'totalAmount', 'modifyCode',
+                 'originalTaxinvoiceKey', 'serialNum', 'cash', 'chkBill', 'credit', 'note',
+                 'remark1', 'remark2', 'remark3', 'kwon', 'ho', 'businessLicenseYN', 'bankBookYN',
+                 'writeSpecification', 'detailList', 'addContactList')
 
 
-class TaxinvoiceDetail(object):
-    def __init__(self,**kwargs):
-        self.__dict__ = kwargs
+class TaxinvoiceDetail(PopbillModel):
+    __slots__ = ('serialNum', 'purchaseDT', 'itemName', 'spec', 'qty', 'unitCost', 'supplyCost',
+                 'tax', 'remark')
 
 
-class Contact(object):
-    def __init__(self,**kwargs):
-        self.__dict__ = kwargs
\ No newline at end of file
+class Contact(PopbillModel):
+    __slots__ = ('serialNum', 'contactName', 'email')
\ No newline at end of file
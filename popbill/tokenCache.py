@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill session token cache. It keeps one token per CorpNum,
+# evicts the least recently used CorpNum when the cache is full and sweeps
+# expired tokens, so memory stays flat with many member CorpNums.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import threading
+from collections import OrderedDict
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+
+class TokenCache(object):
+    """ CorpNum 별 세션토큰 캐시.
+
+        항목은 (토큰, 갱신시각, 만료시각) 이며 시각은 monotonic clock 기준이다.
+        maxSize 개를 넘으면 가장 오래 사용하지 않은 항목을 제거하고,
+        sweepInterval 초마다 한번 토큰을 저장할 때 만료된 항목을 정리한다.
+    """
+
+    def __init__(self, maxSize=None, sweepInterval=60):
+        """ 생성자.
+            args
+                maxSize : 최대 항목 수, None 이면 제한없음
+                sweepInterval : 만료 항목 정리 주기(초)
+        """
+        self.maxSize = maxSize
+        self.sweepInterval = sweepInterval
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._used = {}
+        self._sweptAt = monotonic()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expired = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def lookup(self, key):
+        """ 갱신시각이 지나지 않은 토큰을 반환한다. 없으면 None. 사용시각과 hit/miss 를 기록한다. """
+        now = monotonic()
+        with self._lock:
+            self._used[key] = now
+            entry = self._entries.get(key)
+            if entry == None or now >= entry[1]:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._touch(key, entry)
+            return entry[0]
+
+    def entry(self, key):
+        """ 저장된 항목 (토큰, 갱신시각, 만료시각). 없으면 None. 통계와 사용시각은 바꾸지 않는다. """
+        return self._entries.get(key)
+
+    def put(self, key, token, refreshAt, expiresAt):
+        """ 토큰 저장. 가득 차면 가장 오래 사용하지 않은 항목을 제거한다. """
+        now = monotonic()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (token, refreshAt, expiresAt)
+            self._used.setdefault(key, now)
+
+            if now - self._sweptAt >= self.sweepInterval:
+                self._sweep(now)
+
+            while self.maxSize != None and len(self._entries) > self.maxSize:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def pop(self, key):
+        """ 항목 제거. 제거한 항목을 반환한다. """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry != None:
+                self._remove(key)
+            return entry
+
+    def clear(self):
+        """ 모든 항목 제거 """
+        with self._lock:
+            self._entries.clear()
+            self._used.clear()
+
+    def items(self):
+        """ (CorpNum, 항목, 마지막 사용시각) 목록 """
+        with self._lock:
+            return [(key, entry, self._used.get(key)) for key, entry in self._entries.items()]
+
+    def sweep(self):
+        """ 만료된 항목을 정리한다. 정리한 항목 수를 반환한다. """
+        with self._lock:
+            return self._sweep(monotonic())
+
+    def stats(self):
+        """ 캐시 현황
+            return
+                dict of (size, maxSize, hits, misses, evictions, expired)
+        """
+        with self._lock:
+            return {"size": len(self._entries), "maxSize": self.maxSize, "hits": self._hits,
+                    "misses": self._misses, "evictions": self._evictions, "expired": self._expired}
+
+    def _touch(self, key, entry):
+        # lock 을 잡은 상태에서 호출된다. 최근 사용한 항목을 맨 뒤로 옮긴다.
+        try:
+            self._entries.move_to_end(key)
+        except AttributeError:
+            del self._entries[key]
+            self._entries[key] = entry
+
+    def _remove(self, key):
+        del self._entries[key]
+        self._used.pop(key, None)
+
+    def _sweep(self, now):
+        self._sweptAt = now
+        expired = [key for key, entry in self._entries.items() if now >= entry[2]]
+        for key in expired:
+            self._remove(key)
+        self._expired += len(expired)
+
+        # 캐시에 없는 CorpNum 의 사용시각 (갱신에 실패한 경우 등)
+        for key in [key for key in self._used if key not in self._entries]:
+            del self._used[key]
+        return len(expired)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill background token refresher. It renews cached session
+# tokens shortly before they expire, so that API calls do not wait for
+# linkhub token generation, and forgets tokens of idle CorpNums.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import threading
+
+
+class TokenRefresher(object):
+    """ 토큰 백그라운드 갱신.
+
+        PopbillBase.Refresher 에 지정하면, 토큰을 캐시한 서비스를 등록해두고
+        interval 초마다 캐시된 토큰을 검사한다.
+        갱신시점(만료 TokenExpiryMargin 초 전)까지 margin 초 이하로 남은 토큰은 미리 갱신하고,
+        idleTimeout 초 동안 사용하지 않은 CorpNum 의 토큰은 캐시에서 제거한다.
+        갱신은 데몬 스레드 하나에서 순서대로 수행한다.
+    """
+
+    def __init__(self, margin=60, idleTimeout=1800, interval=5):
+        """ 생성자.
+            args
+                margin : 갱신시점 몇 초 전에 미리 갱신할지
+                idleTimeout : 이 시간(초) 동안 사용하지 않은 CorpNum 의 토큰은 갱신하지 않고 제거한다.
+                interval : 캐시 검사 주기(초)
+        """
+        self.margin = margin
+        self.idleTimeout = idleTimeout
+        self.interval = interval
+
+        self._lock = threading.Lock()
+        self._services = []
+        self._thread = None
+        self._stopped = None
+        self._refreshed = 0
+        self._dropped = 0
+        self._failed = 0
+
+    def register(self, service):
+        """ 토큰 캐시를 검사할 서비스 등록. 검사 스레드가 없으면 시작한다. """
+        with self._lock:
+            if not any(s is service for s in self._services):
+                self._services.append(service)
+
+            if self._thread == None or not self._thread.is_alive():
+                self._stopped = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stopped,), name="PopbillTokenRefresher")
+                self._thread.daemon = True
+                self._thread.start()
+
+    def unregister(self, service):
+        """ 서비스 등록 해제. 검사 스레드는 유지된다. """
+        with self._lock:
+            self._services = [s for s in self._services if s is not service]
+
+    def stop(self, timeout=None):
+        """ 검사 스레드 종료. 등록된 서비스는 유지되며, 다시 토큰을 캐시하면 스레드가 재시작된다. """
+        with self._lock:
+            thread, stopped = self._thread, self._stopped
+            self._thread = self._stopped = None
+        if stopped != None:
+            stopped.set()
+        if thread != None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def runOnce(self):
+        """ 등록된 모든 서비스의 토큰 캐시를 한번 검사한다. """
+        with self._lock:
+            services = list(self._services)
+
+        for service in services:
+            refreshed, dropped, failed = service._refreshTokens(self.margin, self.idleTimeout)
+            with self._lock:
+                self._refreshed += refreshed
+                self._dropped += dropped
+                self._failed += failed
+
+    def stats(self):
+        """ 갱신 현황 (등록된 서비스 수, 미리 갱신한 토큰 수, 제거한 토큰 수, 갱신 실패 수) """
+        with self._lock:
+            return {
+                'services': len(self._services),
+                'refreshed': self._refreshed,
+                'dropped': self._dropped,
+                'failed': self._failed,
+            }
+
+    def _run(self, stopped):
+        while True:
+            stopped.wait(self.interval)
+            if stopped.is_set():
+                return
+            try:
+                self.runOnce()
+            except Exception:
+                # 갱신 실패는 API 호출시 다시 갱신하므로 스레드를 멈추지 않는다.
+                pass
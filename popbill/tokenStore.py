@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill shared token store. Worker processes on the same host
+# can share session tokens through a store, so that a token generated by one
+# worker is reused by the others instead of each one calling linkhub.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+import zlib
+from collections import namedtuple
+from contextlib import contextmanager
+from time import time as stime
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def dumpToken(token):
+    """ 토큰 객체를 JSON 문자열로 변환한다. """
+    return json.dumps(_tokenToDict(token))
+
+
+def loadToken(data):
+    """ dumpToken 결과를 linkhub.generateToken 반환값과 같은 형태(namedtuple)의 토큰으로 되돌린다. """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return json.loads(data, object_hook=lambda d: namedtuple('Token', d.keys())(*d.values()))
+
+
+def _tokenToDict(value):
+    if hasattr(value, '_asdict'):
+        value = value._asdict()
+    elif hasattr(value, '__dict__'):
+        value = value.__dict__
+
+    if isinstance(value, dict):
+        return dict((k, _tokenToDict(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [_tokenToDict(v) for v in value]
+    return value
+
+
+class TokenStore(object):
+    """ 토큰 저장소 인터페이스.
+
+        key 는 ServiceID, LinkID, CorpNum, scope 를 조합한 문자열이며,
+        expiresAt 은 로컬 시계 기준 토큰 만료시각(epoch 초)이다.
+        lock(key) 는 같은 key 의 토큰 발급을 저장소를 공유하는 모든 프로세스에서 한번만 수행하도록 한다.
+    """
+
+    def load(self, key):
+        """ 저장된 토큰. 없거나 만료되었으면 None """
+        raise NotImplementedError
+
+    def save(self, key, token, expiresAt):
+        """ 토큰 저장 """
+        raise NotImplementedError
+
+    def delete(self, key):
+        """ 토큰 삭제 """
+        raise NotImplementedError
+
+    @contextmanager
+    def lock(self, key):
+        yield
+
+
+class MemoryTokenStore(TokenStore):
+    """ 프로세스 메모리 저장소. 같은 프로세스의 서비스 객체끼리 토큰을 공유한다. """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = {}
+        self._keyLocks = {}
+
+    def load(self, key):
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry == None:
+                return None
+            if stime() >= entry[1]:
+                del self._tokens[key]
+                return None
+            return entry[0]
+
+    def save(self, key, token, expiresAt):
+        with self._lock:
+            self._tokens[key] = (token, expiresAt)
+
+    def delete(self, key):
+        with self._lock:
+            self._tokens.pop(key, None)
+
+    @contextmanager
+    def lock(self, key):
+        with self._lock:
+            keyLock = self._keyLocks.setdefault(key, threading.Lock())
+        with keyLock:
+            yield
+
+
+def _keyHash(key):
+    # 프로세스마다 달라질 수 있는 hash() 대신 crc32 를 사용한다.
+    return zlib.crc32(key.encode('utf-8')) & 0xffffffff
+
+
+class _FileLock(object):
+    # key 별 프로세스간 잠금. key 의 hash 를 lock 파일의 위치로 삼아 그 1 byte 만 fcntl.lockf 로 잠그므로
+    # 서로 다른 key 는 기다리지 않는다. fcntl 을 지원하지 않는 플랫폼에서는 프로세스 안에서만 잠근다.
+
+    def __init__(self, path):
+        self.path = path
+        self._reset()
+
+    def _reset(self):
+        # fork 한 프로세스는 부모의 스레드가 잡고 있던 lock 과 파일 잠금을 물려받지 않는다.
+        self._lock = threading.Lock()
+        # 위치별 [threading.Lock, 사용중인 스레드 수]
+        self._positions = {}
+        self._handle = None
+        self._pid = os.getpid()
+
+    @contextmanager
+    def hold(self, key):
+        position = _keyHash(key) & 0x7fffffff
+        if self._pid != os.getpid():
+            self._reset()
+
+        # POSIX record lock 은 프로세스 단위라서 같은 프로세스의 스레드끼리는 막지 못한다.
+        with self._lock:
+            entry = self._positions.get(position)
+            if entry == None:
+                entry = self._positions[position] = [threading.Lock(), 0]
+            entry[1] += 1
+
+        try:
+            with entry[0]:
+                if fcntl == None:
+                    yield
+                    return
+
+                fileno = self._fileno()
+                fcntl.lockf(fileno, fcntl.LOCK_EX, 1, position)
+                try:
+                    yield
+                finally:
+                    fcntl.lockf(fileno, fcntl.LOCK_UN, 1, position)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._positions[position]
+
+    def _fileno(self):
+        # 파일을 닫으면 그 프로세스가 잡은 잠금이 모두 풀리므로 프로세스마다 하나를 열어두고 계속 사용한다.
+        with self._lock:
+            if self._handle == None:
+                self._handle = open(self.path, 'a')
+            return self._handle.fileno()
+
+
+class SQLiteTokenStore(TokenStore):
+    """ SQLite 파일 저장소. 같은 파일을 지정한 프로세스끼리 토큰을 공유한다.
+
+        토큰 발급은 path + '.lock' 파일의 key 별 영역 잠금(fcntl)으로 프로세스간에 한번만 수행한다.
+    """
+
+    def __init__(self, path, timeout=10):
+        """ 생성자.
+            args
+                path : SQLite 데이터베이스 파일 경로
+                timeout : 데이터베이스 잠금 대기시간(초)
+        """
+        self.path = path
+        self.timeout = timeout
+        self._fileLock = _FileLock(path + '.lock')
+        self._local = threading.local()
+
+        with self._connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS popbill_token "
+                         "(key TEXT PRIMARY KEY, token TEXT NOT NULL, expiresAt REAL NOT NULL)")
+
+    def load(self, key):
+        with self._connection() as conn:
+            row = conn.execute("SELECT token, expiresAt FROM popbill_token WHERE key = ?", (key,)).fetchone()
+        if row == None or stime() >= row[1]:
+            return None
+        return loadToken(row[0])
+
+    def save(self, key, token, expiresAt):
+        with self._connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO popbill_token (key, token, expiresAt) VALUES (?, ?, ?)",
+                         (key, dumpToken(token), expiresAt))
+            conn.execute("DELETE FROM popbill_token WHERE expiresAt <= ?", (stime(),))
+
+    def delete(self, key):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM popbill_token WHERE key = ?", (key,))
+
+    def lock(self, key):
+        return self._fileLock.hold(key)
+
+    def _connection(self):
+        # sqlite3 커넥션은 스레드간에 공유할 수 없으므로 스레드별로 연다.
+        # with 블록은 트랜잭션 단위로 commit/rollback 한다.
+        conn = getattr(self._local, 'conn', None)
+        if conn == None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=self.timeout)
+            self._local.pid = os.getpid()
+        return conn
+
+
+class SharedMemoryTokenStore(TokenStore):
+    """ 공유메모리 저장소.
+
+        익명 mmap 영역을 사용하므로, 이 객체를 만든 프로세스에서 fork 한 worker 프로세스끼리 토큰을 공유한다.
+        (ex. gunicorn preload_app, multiprocessing 'fork' 방식)
+        slots 개의 고정 크기(slotSize bytes) 항목을 hash 로 찾으며, 가득 차면 만료시각이 가장 이른 항목을 덮어쓴다.
+        토큰 발급 잠금은 key 의 hash 로 고른 lockStripes 개의 프로세스간 lock 중 하나를 사용한다.
+    """
+
+    _HEADER = struct.Struct('!dI')
+
+    def __init__(self, slots=4096, slotSize=1024, lockStripes=16):
+        """ 생성자.
+            args
+                slots : 저장할 수 있는 최대 토큰 수
+                slotSize : 항목 하나의 크기(bytes). key 와 JSON 으로 변환한 토큰이 들어갈 수 있어야 한다.
+                lockStripes : 토큰 발급 잠금 개수
+        """
+        import multiprocessing
+
+        self.slots = slots
+        self.slotSize = slotSize
+        self._buffer = mmap.mmap(-1, slots * slotSize)
+        self._lock = multiprocessing.Lock()
+        self._keyLocks = [multiprocessing.Lock() for i in range(lockStripes)]
+
+    def load(self, key):
+        with self._lock:
+            index, entry = self._find(key)
+        if entry == None or stime() >= entry[0]:
+            return None
+        return loadToken(entry[1])
+
+    def save(self, key, token, expiresAt):
+        record = json.dumps([key, dumpToken(token)]).encode('utf-8')
+        if self._HEADER.size + len(record) > self.slotSize:
+            raise ValueError("token does not fit in a slot of %d bytes" % self.slotSize)
+
+        with self._lock:
+            index, entry = self._find(key)
+            offset = index * self.slotSize
+            self._buffer[offset:offset + self._HEADER.size + len(record)] = self._HEADER.pack(expiresAt, len(record)) + record
+
+    def delete(self, key):
+        with self._lock:
+            index, entry = self._find(key)
+            if entry != None:
+                # 같은 hash 로 뒤에 저장된 key 를 계속 찾을 수 있도록 항목은 남겨두고 만료만 시킨다.
+                offset = index * self.slotSize
+                expiresAt, size = self._HEADER.unpack(self._buffer[offset:offset + self._HEADER.size])
+                self._buffer[offset:offset + self._HEADER.size] = self._HEADER.pack(0, size)
+
+    @contextmanager
+    def lock(self, key):
+        with self._keyLocks[self._hash(key) % len(self._keyLocks)]:
+            yield
+
+    def _hash(self, key):
+        return _keyHash(key)
+
+    def _read(self, index):
+        offset = index * self.slotSize
+        expiresAt, size = self._HEADER.unpack(self._buffer[offset:offset + self._HEADER.size])
+        if size == 0:
+            return None, None
+        start = offset + self._HEADER.size
+        key, token = json.loads(self._buffer[start:start + size].decode('utf-8'))
+        return key, (expiresAt, token)
+
+    def _find(self, key):
+        # 잠금을 잡은 상태에서 호출된다. key 가 있는 slot, 없으면 쓸 수 있는 slot 을 찾는다.
+        start = self._hash(key) % self.slots
+        now = stime()
+        free = None
+        oldest = None
+        for step in range(self.slots):
+            index = (start + step) % self.slots
+            storedKey, entry = self._read(index)
+            if storedKey == key:
+                return index, entry
+            if storedKey == None:
+                # 한번도 쓰지 않은 slot 이후로는 같은 key 가 없다.
+                return (index if free == None else free), None
+            if free == None and entry[0] <= now:
+                free = index
+            if oldest == None or entry[0] < oldest[1]:
+                oldest = (index, entry[0])
+
+        if free != None:
+            return free, None
+        return oldest[0], None
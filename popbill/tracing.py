@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Module for Popbill tracing. Public service methods, token acquisition,
+# connection setup and HTTP exchanges are traced as nested spans through
+# OpenTelemetry when it is installed, and through a no-op tracer otherwise.
+#
+# http://www.popbill.com
+# Thanks for your interest.
+import functools
+import inspect
+try:
+    from opentelemetry import trace as _otelTrace
+except ImportError:
+    _otelTrace = None
+
+_iscoroutinefunction = getattr(inspect, 'iscoroutinefunction', lambda func: False)
+
+
+class _NoopSpan(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        return False
+
+    def is_recording(self):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def add_event(self, name, attributes=None):
+        pass
+
+    def record_exception(self, exception):
+        pass
+
+
+_noopSpan = _NoopSpan()
+
+
+class NoopTracer(object):
+    """ 아무것도 기록하지 않는 tracer. OpenTelemetry 가 설치되어 있지 않으면 사용한다. """
+
+    def start_as_current_span(self, name, **kwargs):
+        return _noopSpan
+
+
+_defaultTracer = None
+
+
+def getTracer(tracer=None):
+    """ span 을 만들 tracer.
+        args
+            tracer : OpenTelemetry Tracer 와 같이 start_as_current_span(name) 을 지원하는 객체.
+                     None 이면 OpenTelemetry 전역 tracer, 설치되어 있지 않으면 NoopTracer
+        return
+            tracer
+    """
+    global _defaultTracer
+
+    if tracer != None:
+        return tracer
+    if _defaultTracer == None:
+        if _otelTrace != None:
+            from . import __version__
+            _defaultTracer = _otelTrace.get_tracer('popbill', __version__)
+        else:
+            _defaultTracer = NoopTracer()
+    return _defaultTracer
+
+
+def untraced(func):
+    """ span 을 만들지 않는 공개 메소드 표시 (ex. 설정, 조회용 helper) """
+    func.__untraced__ = True
+    return func
+
+
+def traceMethod(name, method):
+    """ 공개 서비스 메소드를 '서비스클래스.메소드' 이름의 span 으로 감싼다.
+        PopbillBase.Profiler 가 지정되어 있으면 표본으로 고른 호출을 profile 한다.
+    """
+    @functools.wraps(method)
+    def traced(self, *args, **kwargs):
+        qualifiedName = type(self).__name__ + '.' + name
+        with self._tracer().start_as_current_span(qualifiedName):
+            profiler = self.Profiler
+            if profiler != None and profiler.shouldSample():
+                return profiler.run(qualifiedName, method, self, *args, **kwargs)
+            return method(self, *args, **kwargs)
+    traced.__traced__ = method
+    return traced
+
+
+def traceMethods(cls, attrs):
+    """ 클래스에 정의된 공개 메소드에 span 을 추가한다. coroutine 함수는 asyncService 에서 감싼다. """
+    for name, attr in attrs.items():
+        if name.startswith('_') or not inspect.isfunction(attr):
+            continue
+        if getattr(attr, '__untraced__', False) or hasattr(attr, '__traced__') or _iscoroutinefunction(attr):
+            continue
+        setattr(cls, name, traceMethod(name, attr))